@@ -0,0 +1,109 @@
+from __future__ import annotations
+from fractions import Fraction
+from typing import Any, Dict, List, Tuple
+
+
+class _NeedDraw(Exception):
+    """Шаг запросил бросок, которого нет в сценарии ветки."""
+
+
+class _ScriptedRng:
+    """
+    ГСЧ-заглушка для перебора ветвей: random() отдаёт заранее заданные исходы бросков.
+    True — крит (0.0 меньше любого шанса), False — не крит (максимальное значение random()).
+    """
+    _NO = 1.0 - 2.0 ** -53
+
+    def __init__(self, script: Tuple[bool, ...] = ()):
+        self.script = script
+        self.pos = 0
+
+    def random(self) -> float:
+        if self.pos >= len(self.script):
+            raise _NeedDraw
+        hit = self.script[self.pos]
+        self.pos += 1
+        return 0.0 if hit else self._NO
+
+    # для Battle.fork()
+    def getstate(self):
+        return self.script
+
+    def setstate(self, state):
+        self.script = state
+        self.pos = 0
+
+
+def _chance(actor) -> Fraction:
+    # точное значение float-шанса (0.1 -> 3602879701896397/2**55): ровно тот порог,
+    # с которым сравнивается бросок rng.random() < chance, без округления дроби
+    return Fraction(actor.crit_chance())
+
+
+def _branch_step(battle) -> List[Tuple[Fraction, Any]]:
+    """Все исходы одного шага: [(вероятность, бой после шага)]."""
+    actor = battle.next_actor()
+    outcomes = []
+    pending = [((), Fraction(1))]
+    while pending:
+        script, prob = pending.pop()
+        sim = battle.fork()
+        sim.rng = _ScriptedRng(script)
+        try:
+            sim.step()
+        except _NeedDraw:
+            p = _chance(actor)
+            pending.append((script + (False,), prob * (1 - p)))
+            pending.append((script + (True,), prob * p))
+            continue
+        outcomes.append((prob, sim))
+    return outcomes
+
+
+def _progress(battle) -> tuple:
+    # монотонно растёт с каждым шагом; одинаковые состояния имеют одинаковый прогресс
+    if battle._in_round:
+        return (battle.round_no, 1, battle._qpos - len(battle._queue))
+    return (battle.round_no, 2, 0)
+
+
+def exact_outcomes(battle, max_rounds: int | None = None) -> Dict[str, Any]:
+    """
+    Точное распределение исходов боя с текущего шага, без Монте-Карло.
+
+    Единственная случайность — броски крита (CritMixin.roll_crit в Battle._apply_crit):
+    шаги разветвляются на «крит / не крит» с вероятностями crit_chance, а одинаковые
+    состояния (Battle.state_key) сливаются со сложением вероятностей, поэтому число
+    состояний ограничено числом различных раскладов HP/эффектов, а не 2^бросков.
+    Шаги обрабатываются по возрастанию прогресса (раунд, позиция в очереди).
+
+    Возвращает {"party", "boss", "draw": Fraction, "rounds": {раунд окончания: Fraction}, "states": int}.
+    """
+    root = battle.fork()
+    if max_rounds is not None:
+        root.max_rounds = max_rounds
+    root.rng = _ScriptedRng()
+
+    result = {"party": Fraction(0), "boss": Fraction(0), "draw": Fraction(0), "rounds": {}, "states": 0}
+    # прогресс -> {state_key: [вероятность, бой]}
+    frontier: Dict[tuple, Dict[tuple, list]] = {_progress(root): {root.state_key(): [Fraction(1), root]}}
+    while frontier:
+        level = min(frontier)
+        states = frontier.pop(level)
+        result["states"] += len(states)
+        for prob, state in states.values():
+            if state.result is not None:
+                result[state.result] += prob
+                rounds = result["rounds"]
+                rounds[state.round_no] = rounds.get(state.round_no, Fraction(0)) + prob
+                continue
+            for p, nxt in _branch_step(state):
+                bucket = frontier.setdefault(_progress(nxt), {})
+                key = nxt.state_key()
+                entry = bucket.get(key)
+                if entry is None:
+                    bucket[key] = [prob * p, nxt]
+                else:
+                    entry[0] += prob * p
+    result["rounds"] = dict(sorted(result["rounds"].items()))
+    return result
@@ -0,0 +1,311 @@
+from __future__ import annotations
+import random
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from .heroes import Warrior, Mage, Healer
+from .boss import Boss, Phase1Aggro, Phase2Poison, Phase3Enrage
+from .effects import Poison, Regen, Shield, Silence
+
+# коды эффектов в массивах (0 — пустой слот)
+EMPTY, POISON, REGEN, SHIELD, SILENCE = 0, 1, 2, 3, 4
+_EFFECT_CODES = {Poison: POISON, Regen: REGEN, Shield: SHIELD, Silence: SILENCE}
+
+SKILLS = ("power_strike", "fireball", "heal", "toxic_spit", "enraged_blow")
+_SKILL_IDX = {s: i for i, s in enumerate(SKILLS)}
+
+RUNNING, PARTY, BOSS, DRAW = 0, 1, 2, 3
+_RESULT_NAMES = {PARTY: "party", BOSS: "boss", DRAW: "draw"}
+
+
+class BatchBattle:
+    """
+    Пакетный симулятор: N копий одного боя (шаблон пати + босс), которые идут
+    синхронно по раундам. Состояние хранится столбцами NumPy:
+      - hp/mp/str_/agi/int_ (+ max_hp/max_mp) — массивы (N, E), где E = len(party) + 1 (босс последний)
+      - кулдауны — матрица (N, E, len(SKILLS)) в оставшихся ходах
+      - эффекты — слоты (N, E, S): код эффекта, duration и «величина» (dps/hps/ёмкость щита)
+    Слоты эффектов упакованы слева в порядке наложения — так же, как список _effects.
+
+    Для сида seed результат i-го боя совпадает с
+    Battle(party, boss, rng=random.Random(seed)).run(max_rounds)["result"].
+    Поддерживаются только стандартные Warrior/Mage/Healer, Boss со стратегиями
+    по умолчанию и эффекты Poison/Regen/Shield/Silence.
+    """
+
+    def __init__(self, party: List, boss: Boss, seeds: Iterable[int]):
+        self._validate(party, boss)
+        self.party = party
+        self.boss = boss
+        self.seeds = list(seeds)
+
+    @staticmethod
+    def _validate(party, boss):
+        for h in party:
+            if type(h) not in (Warrior, Mage, Healer):
+                raise TypeError(f"Unsupported hero class for batch: {type(h).__name__}")
+        if type(boss) is not Boss:
+            raise TypeError(f"Unsupported boss class for batch: {type(boss).__name__}")
+        if [type(s) for s in boss.strategies] != [Phase1Aggro, Phase2Poison, Phase3Enrage]:
+            raise TypeError("Batch supports only the default boss strategies")
+        for e in list(party) + [boss]:
+            for eff in getattr(e, "_effects", []):
+                if type(eff) not in _EFFECT_CODES:
+                    raise TypeError(f"Unsupported effect for batch: {type(eff).__name__}")
+            for skill_id in e._cooldowns:
+                if skill_id not in _SKILL_IDX:
+                    raise TypeError(f"Unknown skill in cooldowns: {skill_id}")
+
+    # --------- загрузка шаблона в массивы ---------
+    def _load(self):
+        n = len(self.seeds)
+        entities = list(self.party) + [self.boss]
+        e_count = len(entities)
+
+        def column(attr):
+            row = np.array([getattr(e, attr) for e in entities], dtype=np.int64)
+            return np.repeat(row[None, :], n, axis=0)
+
+        self.hp = column("hp")
+        self.mp = column("mp")
+        self.str_ = column("str_")
+        self.agi = column("agi")
+        self.int_ = column("int_")
+        self.max_hp = column("max_hp")
+        self.max_mp = column("max_mp")
+
+        cd = np.zeros((e_count, len(SKILLS)), dtype=np.int64)
+        for i, e in enumerate(entities):
+            for skill_id, left in e._cooldowns.items():
+                cd[i, _SKILL_IDX[skill_id]] = left
+        self.cd = np.repeat(cd[None], n, axis=0)
+
+        sil = np.array([bool(getattr(e, "_silenced", False)) for e in entities])
+        self.silenced = np.repeat(sil[None, :], n, axis=0)
+
+        slots = max([len(e._effects) for e in entities] + [0]) + 2
+        kind = np.zeros((e_count, slots), dtype=np.int8)
+        dur = np.zeros((e_count, slots), dtype=np.int64)
+        mag = np.zeros((e_count, slots), dtype=np.int64)
+        for i, e in enumerate(entities):
+            for j, eff in enumerate(e._effects):
+                kind[i, j] = _EFFECT_CODES[type(eff)]
+                dur[i, j] = eff.duration
+                if isinstance(eff, Poison):
+                    mag[i, j] = eff.dps
+                elif isinstance(eff, Regen):
+                    mag[i, j] = eff.hps
+                elif isinstance(eff, Shield):
+                    mag[i, j] = eff.capacity
+        self.eff_kind = np.repeat(kind[None], n, axis=0)
+        self.eff_dur = np.repeat(dur[None], n, axis=0)
+        self.eff_mag = np.repeat(mag[None], n, axis=0)
+
+        self.phase = np.full(n, self.boss.current_phase, dtype=np.int64)
+        self.result = np.full(n, RUNNING, dtype=np.int8)
+        self.rounds = np.zeros(n, dtype=np.int64)
+        self.rngs = [random.Random(s) for s in self.seeds]
+
+        # статический порядок ходов: agi во время боя не меняется
+        self.order = sorted(range(e_count), key=lambda i: (-entities[i].agi, entities[i].name))
+        self.kinds = [type(e) for e in entities]
+        self.crit = {
+            i: (e.crit_chance(), e.crit_multiplier())
+            for i, e in enumerate(entities) if isinstance(e, (Warrior, Mage))
+        }
+
+    # --------- механика урона и эффектов ---------
+    def _receive_damage(self, rows, ents, amount):
+        """Векторный Character.receive_damage: щиты в порядке слотов, затем HP."""
+        amount = np.broadcast_to(np.asarray(amount, dtype=np.int64), rows.shape)
+        ok = (amount > 0) & (self.hp[rows, ents] > 0)
+        rows, ents, remaining = rows[ok], ents[ok], amount[ok].copy()
+        for j in range(self.eff_kind.shape[2]):
+            sh = (self.eff_kind[rows, ents, j] == SHIELD) & (remaining > 0)
+            if not sh.any():
+                continue
+            cap = self.eff_mag[rows[sh], ents[sh], j]
+            absorbed = np.where(cap > 0, np.minimum(cap, remaining[sh]), 0)
+            self.eff_mag[rows[sh], ents[sh], j] = cap - absorbed
+            remaining[sh] -= absorbed
+        self.hp[rows, ents] = np.maximum(0, self.hp[rows, ents] - remaining)
+
+    def _add_effect(self, rows, ents, code, duration, magnitude):
+        free = self.eff_kind[rows, ents] == EMPTY
+        if not free.any(axis=1).all():
+            self._grow_slots()
+            free = self.eff_kind[rows, ents] == EMPTY
+        slot = free.argmax(axis=1)
+        self.eff_kind[rows, ents, slot] = code
+        self.eff_dur[rows, ents, slot] = duration
+        self.eff_mag[rows, ents, slot] = magnitude
+        if code == SILENCE:
+            self.silenced[rows, ents] = True
+
+    def _grow_slots(self):
+        extra = max(2, self.eff_kind.shape[2])
+        pad = ((0, 0), (0, 0), (0, extra))
+        self.eff_kind = np.pad(self.eff_kind, pad)
+        self.eff_dur = np.pad(self.eff_dur, pad)
+        self.eff_mag = np.pad(self.eff_mag, pad)
+
+    def _tick(self, active, phase: str):
+        """Векторный tick_effects для всех живых сущностей активных боёв."""
+        living = active[:, None] & (self.hp > 0)
+        if phase == "end":
+            for j in range(self.eff_kind.shape[2]):
+                kind = self.eff_kind[:, :, j]
+                hit = living & (kind != EMPTY)
+                if not hit.any():
+                    continue
+                poison = hit & (kind == POISON) & (self.hp > 0) & (self.eff_mag[:, :, j] > 0)
+                if poison.any():
+                    rows, ents = np.nonzero(poison)
+                    self._receive_damage(rows, ents, self.eff_mag[rows, ents, j])
+                regen = hit & (kind == REGEN) & (self.hp > 0) & (self.eff_mag[:, :, j] > 0)
+                if regen.any():
+                    healed = self.hp + self.eff_mag[:, :, j]
+                    self.hp = np.where(regen, np.minimum(healed, self.max_hp), self.hp)
+                self.eff_dur[:, :, j] -= hit
+                broken = hit & (kind == SHIELD) & (self.eff_mag[:, :, j] <= 0) & (self.eff_dur[:, :, j] > 0)
+                self.eff_dur[:, :, j][broken] = 0
+
+        expired = living[:, :, None] & (self.eff_kind != EMPTY) & (self.eff_dur <= 0)
+        if not expired.any():
+            return
+        self.silenced &= ~(expired & (self.eff_kind == SILENCE)).any(axis=2)
+        self.eff_kind[expired] = EMPTY
+        # уплотняем слоты, сохраняя порядок наложения
+        order = np.argsort(self.eff_kind == EMPTY, axis=2, kind="stable")
+        self.eff_kind = np.take_along_axis(self.eff_kind, order, axis=2)
+        self.eff_dur = np.take_along_axis(self.eff_dur, order, axis=2)
+        self.eff_mag = np.take_along_axis(self.eff_mag, order, axis=2)
+
+    def _update_phase(self, active):
+        b = len(self.party)
+        t1, t2 = (self.boss.thresholds + (0.0,))[:2]
+        max_hp = self.max_hp[:, b]
+        ratio = np.where(max_hp == 0, 0.0, self.hp[:, b] / np.where(max_hp == 0, 1, max_hp))
+        new_phase = np.where(ratio >= t1, 0, np.where(ratio >= t2, 1, 2))
+        self.phase = np.where(active, new_phase, self.phase)
+
+    # --------- действия ---------
+    def _basic_hit(self, rows, e, dmg):
+        """Базовая атака героя по боссу (прямая запись в hp) + бросок крита."""
+        b = len(self.party)
+        self.hp[rows, b] = np.clip(self.hp[rows, b] - dmg, 0, self.max_hp[rows, b])
+        if e not in self.crit:
+            return
+        chance, mult = self.crit[e]
+        draws = np.fromiter((self.rngs[i].random() for i in rows), dtype=float, count=len(rows))
+        crit = draws < chance
+        if crit.any():
+            extra = np.rint(dmg * mult).astype(np.int64) - dmg
+            extra = np.broadcast_to(extra, rows.shape)[crit]
+            crows = rows[crit]
+            self._receive_damage(crows, np.full(len(crows), b), np.maximum(0, extra))
+
+    def _hero_turn(self, rows, e):
+        cls = self.kinds[e]
+        hp, mp = self.hp, self.mp
+        if cls is Warrior:
+            self._basic_hit(rows, e, 5 + self.str_[rows, e] * 2)
+            return
+
+        if cls is Mage:
+            k = _SKILL_IDX["fireball"]
+            cast = (self.cd[rows, e, k] == 0) & ~self.silenced[rows, e] & (mp[rows, e] >= 12)
+            c = rows[cast]
+            if len(c):
+                b = len(self.party)
+                mp[c, e] -= 12
+                hp[c, b] = np.clip(hp[c, b] - (12 + self.int_[c, e] * 4), 0, self.max_hp[c, b])
+                self.cd[c, e, k] = 2
+            o = rows[~cast]
+            if len(o):
+                self._basic_hit(o, e, 3 + self.int_[o, e] // 2)
+            return
+
+        # Healer
+        p = len(self.party)
+        k = _SKILL_IDX["heal"]
+        injured = (hp[rows, :p] > 0) & (hp[rows, :p] < self.max_hp[rows, :p] // 2)
+        cast = injured.any(axis=1) & (self.cd[rows, e, k] == 0) & ~self.silenced[rows, e] & (mp[rows, e] >= 10)
+        c = rows[cast]
+        if len(c):
+            masked = np.where(injured[cast], hp[c, :p], np.iinfo(np.int64).max)
+            target = masked.argmin(axis=1)
+            hp[c, target] = np.minimum(hp[c, target] + 10 + self.int_[c, e] * 3, self.max_hp[c, target])
+            mp[c, e] -= 10
+            self.cd[c, e, k] = 2
+        o = rows[~cast]
+        if len(o):
+            self._basic_hit(o, e, 2 + self.int_[o, e] // 3)
+
+    def _boss_turn(self, rows, b):
+        p = len(self.party)
+        live = self.hp[rows, :p] > 0
+        phase = self.phase[rows]
+        if ((phase > 0) & self.silenced[rows, b]).any():
+            raise RuntimeError("Silenced")
+
+        m = phase == 0
+        if m.any():
+            agi = np.where(live[m], self.agi[rows[m], :p], np.iinfo(np.int64).min)
+            self._receive_damage(rows[m], agi.argmax(axis=1), 6 + self.str_[rows[m], b] * 2)
+
+        m = phase == 1
+        if m.any():
+            hp = np.where(live[m], self.hp[rows[m], :p], np.iinfo(np.int64).max)
+            self._add_effect(rows[m], hp.argmin(axis=1), POISON, 2, 8 + self.int_[rows[m], b])
+            self.cd[rows[m], b, _SKILL_IDX["toxic_spit"]] = 2
+
+        m = phase == 2
+        if m.any():
+            st = np.where(live[m], self.str_[rows[m], :p], np.iinfo(np.int64).min)
+            self._receive_damage(rows[m], st.argmax(axis=1), 12 + self.str_[rows[m], b] * 3)
+            self.cd[rows[m], b, _SKILL_IDX["enraged_blow"]] = 2
+
+    def _check_end(self, rows, r):
+        p = len(self.party)
+        party_won = self.hp[rows, p] <= 0
+        boss_won = ~party_won & ~(self.hp[rows, :p] > 0).any(axis=1)
+        self.result[rows[party_won]] = PARTY
+        self.result[rows[boss_won]] = BOSS
+        self.rounds[rows[party_won | boss_won]] = r
+
+    # --------- основной цикл ---------
+    def run(self, max_rounds: int = 20) -> List[Dict[str, Any]]:
+        self._load()
+        b = len(self.party)
+
+        for r in range(1, max_rounds + 1):
+            active = self.result == RUNNING
+            if not active.any():
+                break
+            self._update_phase(active)
+            self._tick(active, "start")
+
+            acting = active[:, None] & (self.hp > 0)
+            for e in self.order:
+                rows = np.nonzero(acting[:, e] & (self.result == RUNNING))[0]
+                if not len(rows):
+                    continue
+                alive = rows[self.hp[rows, e] > 0]
+                if len(alive):
+                    if e == b:
+                        self._boss_turn(alive, b)
+                    else:
+                        self._hero_turn(alive, e)
+                self.cd[rows, e] = np.maximum(0, self.cd[rows, e] - 1)
+                self._check_end(rows, r)
+
+            active = self.result == RUNNING
+            self._tick(active, "end")
+            self._check_end(np.nonzero(active)[0], r)
+
+        running = self.result == RUNNING
+        self.result[running] = DRAW
+        self.rounds[running] = max_rounds
+        return [{"result": _RESULT_NAMES[int(code)]} for code in self.result]
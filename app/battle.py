@@ -1,9 +1,17 @@
+import copy
+import hashlib
 import random
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Sequence, Tuple
 from .mixins import LoggerMixin, CritMixin
+from .events import BattleEvent, EventSink, NullSink, StdoutSink
 from .turn import TurnOrder
-from .heroes import Warrior, Mage, Healer
+from .scheduler import EffectScheduler
 from .boss import Boss
+from .items import Inventory
+from .profiling import NULL_PROFILER, BattleProfiler, active_profiler
+from .targeting import Opponents, TargetIndex
+from .rules import RuleEngine, default_rules
 
 
 class Battle(LoggerMixin):
@@ -11,53 +19,305 @@ class Battle(LoggerMixin):
     Основной игровой цикл:
       - начало раунда: обновить фазу босса, тик эффектов (start)
       - порядок действий по ловкости (TurnOrder)
-      - каждое действие: базовая атака или скилл (у героев простая авто-логика, у босса — Strategy)
+      - каждое действие: базовая атака, скилл или предмет
+        (у героев простая авто-логика или подключённый планировщик, у босса — Strategy)
       - уменьшение кулдаунов актёра
       - конец раунда: тик эффектов (end)
       - проверка конца боя
+
+    boss — один противник или список противников (рейд): все они ходят в общей очереди,
+    self.boss — первый из них. Сторона сущности ищется по индексу id -> сторона, а не по спискам.
     """
 
-    def __init__(self, party: List, boss: Boss, rng: random.Random | None = None):
+    def __init__(self, party: List, boss: Boss | Sequence[Boss], rng: random.Random | None = None, *,
+                 seed: int | None = None, sink: EventSink | None = None, inventory: Inventory | None = None,
+                 profiler: BattleProfiler | None = None, rules: RuleEngine | None = None):
         self.party = party
-        self.boss = boss
-        self.rng = rng or random.Random()
+        self.enemies = list(boss) if isinstance(boss, (list, tuple)) else [boss]
+        if not self.enemies:
+            raise ValueError("Battle needs at least one enemy")
+        self.boss = self.enemies[0]
+        self.rng = rng or random.Random(seed)
+        # общий инвентарь пати (действие {"type": "item", "index": i, "target": t})
+        self.inventory = inventory
+        # планировщики героев: позиция в пати -> объект с choose(battle, hero) -> action
+        self._planners = {}
+        self._deciding = False
+        # True, пока resume() гонит бой в выключенный приёмник: события не создаются вовсе
+        self._quiet = False
+        # наблюдатели выбранных действий: callback(battle, actor, action), например запись журнала
+        self._action_observers = ()
+        # поведение как данные: таблицы правил по классам (rules.RuleEngine)
+        self.rules = rules if rules is not None else default_rules()
+        # замеры по стадиям (None — выключено); по умолчанию — активный profiling()
+        self.profiler = profiler if profiler is not None else active_profiler()
+        # приёмник событий; по умолчанию печатает в stdout, NullSink — без логов
+        self.sink = sink if sink is not None else StdoutSink()
+        self._entities = self.party + self.enemies
+        # постоянная очередь ходов: сортируется один раз, мёртвые удаляются по мере гибели
+        self.turn_order = TurnOrder(self._entities)
+        # часы боя: сквозной номер раунда через все вызовы run()
+        self.clock = 0
+        self.effects = EffectScheduler(self._entities)
+        self._attach()
+        self._start(20)
+
+    # --------- инкрементальные индексы ---------
+    def _attach(self):
+        """
+        Подписка на изменения статов: индекс сторон, счётчики и списки живых по сторонам,
+        индекс раненых ведутся по событиям.
+        Сущность ведёт не больше одного боя: если она подключена к другому, тот бой отключается
+        (detach) и при своём следующем шаге подключится заново (_reattach).
+        """
+        self._hero_pos = {id(h): i for i, h in enumerate(self.party)}
+        self._entity_pos = {id(e): i for i, e in enumerate(self._entities)}
+        self._side = {id(e): "party" if i < len(self.party) else "boss" for i, e in enumerate(self._entities)}
+        self._members = {"party": self.party, "boss": self.enemies}
+        self._alive = {side: sum(1 for e in members if e.is_alive) for side, members in self._members.items()}
+        # живые по сторонам в исходном порядке; пересобираются только после смерти/воскрешения
+        self._living_of = {"party": None, "boss": None}
+        # кучи целей для стратегий боссов (targeting.select)
+        self._targets = TargetIndex(self.party)
+        # доля порога из правил -> {id(hero): (позиция в пати, hero)} для героев с hp < int(max_hp * доля)
+        self._injured = {fraction: {} for fraction in self.rules.injured_fractions}
+        for h in self.party:
+            self._update_injured(h)
+        for e in self._entities:
+            for callback in e._observers:
+                other = getattr(callback, "__self__", None)
+                if isinstance(other, Battle) and other is not self:
+                    other.detach()
+            e.subscribe(self._on_stat_change)
+            e._scheduler = self.effects
+        self._attached = True
+
+    def _reattach(self):
+        """
+        Подключиться после detach(): пока бой был отключён, сущности могли меняться без уведомлений,
+        поэтому очередь ходов и колесо эффектов сверяются с их текущим состоянием.
+        """
+        for e in self._entities:
+            if e.is_alive:
+                self.turn_order.add(e)
+                self.turn_order.rekey(e)
+            else:
+                self.turn_order.discard(e)
+        self.effects = EffectScheduler(self._entities, self.effects.size,
+                                       next_start=self.effects.next_start, next_end=self.effects.next_end)
+        self._attach()
+
+    def _attach_clone(self, parent: "Battle", memo: dict):
+        """
+        Подключение форка: индексы родителя (позиции, стороны, счётчики живых, кучи целей, раненые)
+        переводятся на копии сущностей по memo (id старой -> новая), без пересчёта статов, как в _attach.
+        У копий нет чужих подписчиков, поэтому отключать другие бои не нужно.
+        """
+        def remap(index):
+            return {id(memo[k]): value for k, value in index.items()}
+
+        self._hero_pos = remap(parent._hero_pos)
+        self._entity_pos = remap(parent._entity_pos)
+        self._side = remap(parent._side)
+        self._members = {"party": self.party, "boss": self.enemies}
+        self._alive = dict(parent._alive)
+        self._living_of = {side: None if living is None else [memo[id(e)] for e in living]
+                           for side, living in parent._living_of.items()}
+        self._targets = parent._targets.clone(memo, self.party)
+        self._injured = {fraction: {id(memo[k]): (pos, memo[k]) for k, (pos, _) in injured.items()}
+                         for fraction, injured in parent._injured.items()}
+        callback = self._on_stat_change
+        for e in self._entities:
+            e._observers = e._observers + (callback,)
+            e._scheduler = self.effects
+        self._attached = True
+
+    # --------- сохранение ---------
+    def __getstate__(self):
+        """
+        Состояние для pickle/copy: без приёмника событий, планировщиков и индексов по id(),
+        они пересобираются (или подключаются заново) при загрузке. Снимать можно только между шагами.
+        """
+        if self._mid_step:
+            raise RuntimeError("Battle is paused in the middle of a step")
+        self.effects.sync()
+        state = dict(self.__dict__)
+        state["_quiet"] = False
+        for name in ("sink", "profiler", "_planners", "_action_observers", "_hero_pos", "_entity_pos", "_side",
+                     "_members", "_alive", "_living_of", "_targets", "_injured"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.sink = NullSink()
+        self.profiler = None
+        self._planners = {}
+        self._action_observers = ()
+        if self._attached:
+            self._attach()
+        else:
+            self._reattach()
+
+    def fork(self) -> "Battle":
+        """
+        Независимая копия боя для поиска вперёд (lookahead), дешевле deepcopy и snapshot/restore.
+        Копируется только изменяемое по ходу боя: статы, эффекты, кулдауны, ГСЧ, очередь и колесо эффектов.
+        Стратегии, пороги, имена и прочие неизменяемые данные — общие с родителем.
+        Форк пишет в NullSink; форкать можно между шагами или из планировщика во время выбора
+        действия — тогда ход этого героя у форка ещё впереди (см. step(action)).
+        """
+        if self._mid_step and not self._deciding:
+            raise RuntimeError("Battle is paused in the middle of a step")
+        memo = {}
+        new = type(self).__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new.party = [h._clone(memo) for h in self.party]
+        new.enemies = [e._clone(memo) for e in self.enemies]
+        new.boss = new.enemies[0]
+        new._entities = new.party + new.enemies
+        new.rng = _clone_rng(self.rng)
+        new.sink = NullSink()
+        new._quiet = False
+        new.profiler = None
+        new._action_observers = ()
+        if self.inventory is not None:
+            new.inventory = self.inventory.copy()
+        new.turn_order = self.turn_order.clone(memo)
+        new.effects = self.effects.clone(memo)
+        new._queue = [memo.get(id(e), e) for e in self._queue]
+        if self._deciding:
+            # форк из планировщика: откатываем курсор на ход выбирающего героя
+            new._qpos -= 1
+            new._mid_step = False
+            new._deciding = False
+        if self._attached:
+            new._attach_clone(self, memo)
+        else:
+            new._reattach()
+        return new
+
+    def set_planner(self, hero, planner) -> None:
+        """
+        Подключить герою планировщик (например, planner.MCTSPlanner) вместо авто-логики.
+        planner.choose(battle, hero) -> action; None — вернуть детерминированное поведение.
+        Планировщики не сохраняются в снимках и не переходят в форки-копии по pickle.
+        """
+        pos = self._hero_pos[id(hero)]
+        planners = dict(self._planners)
+        if planner is None:
+            planners.pop(pos, None)
+        else:
+            planners[pos] = planner
+        self._planners = planners
+
+    def subscribe_actions(self, callback) -> None:
+        """callback(battle, actor, action) вызывается на каждом ходу после выбора действия, до его выполнения."""
+        self._action_observers = self._action_observers + (callback,)
+
+    def unsubscribe_actions(self, callback) -> None:
+        self._action_observers = tuple(cb for cb in self._action_observers if cb != callback)
+
+    def state_key(self) -> tuple:
+        """
+        Канонический ключ состояния боя (без ГСЧ): равные ключи — одинаковое продолжение
+        при одинаковых бросках. Для таблиц транспозиций и слияния состояний.
+        """
+        self.effects.sync()
+        pos = {id(e): i for i, e in enumerate(self._entities)}
+        queue = tuple(pos[id(e)] for e in self._queue[self._qpos:]) if self._in_round else ()
+        inventory = tuple(item._state_key() for item in self.inventory.list()) if self.inventory else ()
+        return (
+            self.round_no, self.max_rounds, self._in_round, self.result, queue,
+            self.effects.next_start - self.clock, self.effects.next_end - self.clock,
+            tuple(e._state_key() for e in self._entities),
+            inventory,
+        )
+
+    def detach(self):
+        """
+        Отписаться от сущностей: бой вызывает это сам по окончании, а также когда сущности
+        подключает другой бой. Следующий шаг этого боя подключит их обратно.
+        """
+        if not self._attached:
+            return
+        self._attached = False
+        self.effects.sync()
+        for e in self._entities:
+            e.unsubscribe(self._on_stat_change)
+            if e._scheduler is self.effects:
+                e._scheduler = None
+
+    def _on_stat_change(self, entity, name: str, old: int, new: int):
+        side = self._side[id(entity)]
+        if name == "hp":
+            if old > 0 and new <= 0:
+                self.turn_order.discard(entity)
+                self.effects.freeze(entity)
+                self._alive[side] -= 1
+                self._living_of[side] = None
+            elif old <= 0 and new > 0:
+                self.turn_order.add(entity)
+                self.effects.thaw(entity)
+                self._alive[side] += 1
+                self._living_of[side] = None
+        elif name == "agi":
+            self.turn_order.rekey(entity)
+        if side == "party":
+            self._targets.changed(entity, name, old, new)
+        if side == "party" and name in ("hp", "str_", "level"):
+            self._update_injured(entity)
+
+    def _update_injured(self, hero):
+        key = id(hero)
+        for fraction, injured in self._injured.items():
+            if hero.is_alive and hero.hp < int(hero.max_hp * fraction):
+                injured[key] = (self._hero_pos[key], hero)
+            else:
+                injured.pop(key, None)
 
     # --------- утилиты ---------
     def _living(self, entities):
         return [e for e in entities if getattr(e, "is_alive", True)]
 
+    def _living_cached(self, side: str) -> List:
+        living = self._living_of[side]
+        if living is None:
+            living = self._living_of[side] = self._living(self._members[side])
+        return living
+
+    def _living_side(self, side: str) -> List:
+        """Живые стороны side ("party"/"boss") в исходном порядке (копия списка из кэша)."""
+        return list(self._living_cached(side))
+
     def _any_heroes_alive(self) -> bool:
-        return any(h.is_alive for h in self.party)
+        return self._alive["party"] > 0
 
-    def _log(self, msg: str):
-        # сейчас просто print; LoggerMixin уже помечает начало/конец раунда
-        print(msg)
+    def _event(self, kind: str, actor=None, target=None, amount: int = 0,
+               skill: str | None = None) -> BattleEvent | None:
+        if self._quiet:
+            return None
+        return BattleEvent(
+            self.round_no,
+            getattr(actor, "name", actor),
+            getattr(target, "name", target),
+            kind, amount, skill,
+        )
 
     # --------- выбор действий ---------
     def _choose_hero_action(self, hero, enemies) -> Dict[str, Any]:
         """
-        Простая авто-логика (детерминированная), чтобы соответствовать ТЗ:
+        Авто-логика героя по таблицам правил (self.rules, по умолчанию app/rules.json):
           - Warrior: basic_attack по боссу
           - Mage:   fireball при доступности (MP и КД), иначе basic_attack по боссу
-          - Healer: heal самого раненого союзника, если у кого-то HP<50% и навык доступен, иначе basic_attack по боссу
+          - Healer: heal самого раненого союзника, если у кого-то HP ниже порога из правил (50%) и навык доступен, иначе basic_attack по боссу
+        Босс — первый живой из enemies (в одиночном бою это self.boss).
+        Для героев без правил — basic_attack по боссу.
         """
-        if isinstance(hero, Warrior):
-            return {"type": "basic", "target": self.boss}
-
-        if isinstance(hero, Mage):
-            if hero.can_use("fireball") and hero.mp >= 12:
-                return {"type": "skill", "skill_id": "fireball", "target": self.boss}
-            return {"type": "basic", "target": self.boss}
-
-        if isinstance(hero, Healer):
-            injured = [a for a in self.party if a.is_alive and a.hp < (a.max_hp // 2)]
-            if injured and hero.can_use("heal") and hero.mp >= 10:
-                target = min(injured, key=lambda x: x.hp)
-                return {"type": "skill", "skill_id": "heal", "target": target}
-            return {"type": "basic", "target": self.boss}
-
-        # дефолт для неизвестных героев
-        return {"type": "basic", "target": self.boss}
+        action = self.rules.decide(self, "party", hero, enemies)
+        if action is None:
+            action = {"type": "basic", "target": enemies[0] if enemies else self.boss}
+        return action
 
     # --------- выполнение действий ---------
     def _apply_crit(self, actor, base_damage: int) -> int:
@@ -68,7 +328,12 @@ class Battle(LoggerMixin):
         if base_damage <= 0:
             return base_damage
         if isinstance(actor, CritMixin):
-            if actor.roll_crit(self.rng):
+            rng = self.rng
+            # ГСЧ с подпотоками (crn.CrnRng): свой поток бросков на каждый ход каждого актёра
+            stream_for = getattr(rng, "stream_for", None)
+            if stream_for is not None:
+                rng = stream_for(self, actor)
+            if actor.roll_crit(rng):
                 return int(round(base_damage * actor.crit_multiplier()))
         return base_damage
 
@@ -84,20 +349,26 @@ class Battle(LoggerMixin):
             if extra:
                 # докинем «поверх» через нормальную механику урона
                 dealt_extra = target.receive_damage(extra)
-                self._log(f"{actor.name} crits! extra damage {dealt_extra}")
-        self._log(f"{actor.name} hits {target.name} for {max(dmg,0)}")
+                yield self._event("crit", actor, target, dealt_extra)
+        yield self._event("hit", actor, target, max(dmg, 0))
 
     def _exec_skill(self, actor, skill_id: str, target):
         result = actor.use_skill(target, skill_id)
         if result > 0:
             # урон (можно критовать урон скилла, если захочешь; в ТЗ не обязательно)
-            self._log(f"{actor.name} uses {skill_id} on {target.name} for {result}")
+            yield self._event("skill", actor, target, result, skill_id)
         elif result < 0:
             # лечение отдаём как положительное число
-            self._log(f"{actor.name} heals {target.name} for {abs(result)}")
+            yield self._event("heal", actor, target, abs(result), skill_id)
         else:
             # 0 — возможно накладка эффекта (яд/щит), без мгновенного урона
-            self._log(f"{actor.name} uses {skill_id} on {target.name}")
+            yield self._event("effect", actor, target, 0, skill_id)
+
+    def _exec_item(self, actor, index: int, target):
+        item = self.inventory.list()[index]
+        before = target.hp
+        self.inventory.use(index, actor, target)
+        yield self._event("item", actor, target, target.hp - before, item.name)
 
     def _execute_action(self, actor, action: Dict[str, Any]):
         if not actor.is_alive:
@@ -106,66 +377,252 @@ class Battle(LoggerMixin):
         target = action.get("target")
 
         if kind == "basic":
-            self._exec_basic(actor, target)
+            yield from self._exec_basic(actor, target)
         elif kind == "skill":
             skill_id = action.get("skill_id")
-            self._exec_skill(actor, skill_id, target)
+            yield from self._exec_skill(actor, skill_id, target)
+        elif kind == "item":
+            yield from self._exec_item(actor, action.get("index", 0), target)
         elif kind == "wait":
-            self._log(f"{actor.name} waits...")
+            yield self._event("wait", actor)
         else:
-            self._log(f"{actor.name} does nothing (unknown action)")
+            yield self._event("idle", actor)
 
     # --------- основной цикл ---------
     def run(self, max_rounds: int = 20) -> Dict[str, Any]:
-        entities = self.party + [self.boss]
-
-        for r in range(1, max_rounds + 1):
-            with self.log_round(r):
-                # актуализируем фазу босса
-                if hasattr(self.boss, "update_phase"):
-                    self.boss.update_phase()
-
-                # эффекты старт-фазы
-                for e in self._living(entities):
-                    e.tick_effects("start")
-
-                # ходят по ловкости
-                for actor in TurnOrder(self._living(entities)):
-                    # выберем действие
-                    if actor in self.party:
-                        action = self._choose_hero_action(actor, [self.boss])
-                    else:
-                        # Если это настоящий босс со стратегией — используем её.
-                        # ИНАЧЕ (например, Warrior как временный "босс" в тестах) — ПРОПУСК ХОДА (wait),
-                        # чтобы тесты тиков не искажались входящим уроном.
-                        if hasattr(actor, "decide") and callable(getattr(actor, "decide")):
-                            action = actor.decide(self._living(self.party))
-                        else:
-                            action = {"type": "wait"}
-                    # выполнить
-                    self._execute_action(actor, action)
-                    # уменьшить кулдауны актёра
-                    actor.reduce_cooldowns()
-
-                    # проверка конца боя прямо по ходу
-                    if not self.boss.is_alive:
-                        self._log(">>> Party wins!")
-                        return {"result": "party"}
-                    if not self._any_heroes_alive():
-                        self._log(">>> Boss wins!")
-                        return {"result": "boss"}
-
-                # эффекты энд-фазы
-                for e in self._living(entities):
-                    e.tick_effects("end")
-
-                # проверка конца боя после тиков
-                if not self.boss.is_alive:
-                    self._log(">>> Party wins!")
-                    return {"result": "party"}
-                if not self._any_heroes_alive():
-                    self._log(">>> Boss wins!")
-                    return {"result": "boss"}
-
-        self._log(">>> Draw (round limit)")
-        return {"result": "draw"}
+        self._start(max_rounds)
+        return self.resume()
+
+    def resume(self) -> Dict[str, Any]:
+        """Доиграть бой с текущего шага (например, после restore) с выводом в sink."""
+        sink = self.sink
+        if sink.enabled:
+            for event in self.resume_events():
+                sink.emit(event)
+            sink.flush()
+        else:
+            self._quiet = True
+            try:
+                for _ in self.resume_events():
+                    pass
+            finally:
+                self._quiet = False
+        return {"result": self.result}
+
+    def iter_events(self, max_rounds: int = 20) -> Iterator[BattleEvent]:
+        """
+        Ленивый прогон боя: отдаёт события по мере их возникновения
+        (round_start/phase/tick/hit/crit/skill/heal/.../round_end/end).
+        Потребитель может остановиться в любой момент — бой просто замрёт на текущем шаге.
+        Состояние цикла (раунд, очередь ходов) хранится в самом бое, память O(1).
+        """
+        self._start(max_rounds)
+        yield from self.resume_events()
+
+    def resume_events(self) -> Iterator[BattleEvent]:
+        """Как iter_events, но без сброса: продолжает с текущего шага."""
+        while self.result is None:
+            yield from self._guarded_step()
+
+    def step(self, action: Dict[str, Any] | None = None) -> List[BattleEvent]:
+        """
+        Выполнить ровно один шаг цикла целиком и вернуть его события ([] — бой окончен).
+        action — действие вместо авто-логики/стратегии; допустимо, только если следующий шаг — ход (next_actor()).
+        """
+        if self.result is not None:
+            return []
+        if action is not None and self.next_actor() is None:
+            raise ValueError("Next step is not a turn")
+        return list(self._guarded_step(action))
+
+    def next_actor(self):
+        """Чей ход следующий (None — следующий шаг не ход, а начало/конец раунда)."""
+        if self.result is None and self._in_round and self._qpos < len(self._queue):
+            return self._queue[self._qpos]
+        return None
+
+    def _start(self, max_rounds: int):
+        self.max_rounds = max_rounds
+        self.round_no = 0
+        self.result = None
+        self._in_round = False
+        self._queue = []
+        self._qpos = 0
+        self._mid_step = False
+
+    def _guarded_step(self, action=None) -> Iterator[BattleEvent]:
+        # флаг держится, пока потребитель не дочитал шаг: состояние между событиями шага несогласовано
+        if not self._attached:
+            self._reattach()
+        self._mid_step = True
+        yield from self._step(action)
+        self._mid_step = False
+
+    def _step(self, action=None) -> Iterator[BattleEvent]:
+        """Один шаг цикла: начало раунда, ход одного актёра или конец раунда."""
+        if not self._in_round:
+            yield from self._begin_round()
+        elif self._qpos < len(self._queue):
+            actor = self._queue[self._qpos]
+            self._qpos += 1
+            yield from self._take_turn(actor, action)
+        else:
+            yield from self._end_round()
+
+    def _begin_round(self) -> Iterator[BattleEvent]:
+        if self.round_no >= self.max_rounds:
+            yield from self._finish("draw")
+            return
+        self.round_no += 1
+        self.clock += 1
+        self._in_round = True
+        yield self._event("round_start")
+        prof = self.profiler or NULL_PROFILER
+
+        # актуализируем фазы боссов
+        for boss in self.enemies:
+            if not hasattr(boss, "update_phase"):
+                continue
+            before = boss.current_phase
+            with prof.timer(("round", "phase")):
+                boss.update_phase()
+            if boss.current_phase != before:
+                yield self._event("phase", boss, amount=boss.current_phase)
+
+        # эффекты старт-фазы
+        yield from prof.measure(("round", "start_ticks"), self._tick_all("start"))
+
+        # ходят по ловкости
+        self._queue = self.turn_order.living()
+        self._qpos = 0
+
+    def _take_turn(self, actor, action=None) -> Iterator[BattleEvent]:
+        # стадии хода под таймерами профайлера; без профилирования таймеры пустые
+        prof = self.profiler or NULL_PROFILER
+        cls = type(actor).__name__
+        # выберем действие
+        if action is None:
+            with prof.timer(("turn", cls, "choose")):
+                action = self._decide(actor)
+        for callback in self._action_observers:
+            callback(self, actor, action)
+        # выполнить
+        yield from prof.measure(("turn", cls, "execute"), self._execute_action(actor, action))
+        # уменьшить кулдауны актёра
+        with prof.timer(("turn", cls, "cooldowns")):
+            actor.reduce_cooldowns()
+
+        # проверка конца боя прямо по ходу
+        yield from prof.measure(("turn", cls, "check_end"), self._check_end())
+
+    def _decide(self, actor) -> Dict[str, Any]:
+        if self._side[id(actor)] == "party":
+            planner = self._planners.get(self._hero_pos[id(actor)]) if actor.is_alive else None
+            if planner is None:
+                return self._choose_hero_action(actor, self._living_cached("boss"))
+            self._deciding = True
+            try:
+                return planner.choose(self, actor)
+            finally:
+                self._deciding = False
+        else:
+            opponents = Opponents(self._living_cached("party"), self._targets)
+            action = self.rules.decide(self, "boss", actor, opponents)
+            if action is not None:
+                return action
+            # Если это настоящий босс со стратегией — используем её.
+            # ИНАЧЕ (например, Warrior как временный "босс" в тестах) — ПРОПУСК ХОДА (wait),
+            # чтобы тесты тиков не искажались входящим уроном.
+            if hasattr(actor, "decide") and callable(getattr(actor, "decide")):
+                return actor.decide(opponents)
+            return {"type": "wait"}
+
+    def _end_round(self) -> Iterator[BattleEvent]:
+        prof = self.profiler or NULL_PROFILER
+        # эффекты энд-фазы
+        yield from prof.measure(("round", "end_ticks"), self._tick_all("end"))
+        # проверка конца боя после тиков
+        yield from prof.measure(("round", "check_end"), self._check_end())
+        if self.result is None:
+            self._in_round = False
+            yield self._event("round_end")
+
+    def _tick_all(self, phase: str) -> Iterator[BattleEvent]:
+        for e, before in self.effects.fire(phase, self.clock):
+            if e.hp != before:
+                yield self._event("tick", e, amount=e.hp - before, skill=phase)
+
+    def _check_end(self) -> Iterator[BattleEvent]:
+        if not self._alive["boss"]:
+            yield from self._finish("party")
+        elif not self._any_heroes_alive():
+            yield from self._finish("boss")
+
+    def _finish(self, result: str) -> Iterator[BattleEvent]:
+        self.result = result
+        # бой окончен — сущности свободны для других боёв; detach() заодно пишет остаток
+        # «чистых таймеров» (Silence и т.п.) в их duration, как до колеса эффектов
+        self.detach()
+        yield self._event("end", result)
+        if self._in_round:
+            self._in_round = False
+            yield self._event("round_end")
+
+
+def _clone_rng(rng: random.Random) -> random.Random:
+    # Random() при создании читает энтропию ОС — для копии она не нужна, состояние перезаписывается
+    new = type(rng).__new__(type(rng))
+    new.setstate(rng.getstate())
+    return new
+
+
+# --------- массовый прогон ---------
+def battle_rng(master_seed: int, battle_index: int) -> random.Random:
+    """
+    Независимый поток ГСЧ для боя №battle_index.
+    Зависит только от (master_seed, battle_index) — не от числа воркеров и порядка запуска.
+    """
+    digest = hashlib.sha256(f"{master_seed}:{battle_index}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _run_chunk(chunk: Sequence[Tuple[int, List, Boss]], master_seed: int, max_rounds: int,
+               rng_factory=battle_rng) -> List[Dict[str, Any]]:
+    results = []
+    for index, party, boss in chunk:
+        # шаблон не трогаем: каждый бой идёт на своей копии
+        party, boss = copy.deepcopy((party, boss))
+        battle = Battle(party, boss, rng=rng_factory(master_seed, index), sink=NullSink())
+        results.append(battle.run(max_rounds=max_rounds))
+    return results
+
+
+def run_many(
+    scenarios: Iterable[Tuple[List, Boss]],
+    workers: int | None = None,
+    *,
+    master_seed: int = 0,
+    max_rounds: int = 20,
+    chunksize: int = 64,
+    start_index: int = 0,
+    rng_factory=battle_rng,
+) -> List[Dict[str, Any]]:
+    """
+    Прогоняет бои по сценариям (party, boss) в пуле процессов.
+    Сценарии режутся на чанки по chunksize, результаты возвращаются в исходном порядке.
+    Каждый бой получает battle_rng(master_seed, index), поэтому итог побитово
+    одинаков при любом workers (workers=1 — без пула, в текущем процессе).
+    start_index — номер первого боя: продолжение серии пачками даёт те же бои, что один большой вызов.
+    rng_factory(master_seed, index) -> ГСЧ боя (функция уровня модуля, чтобы передаваться в процессы).
+    """
+    indexed = [(i, party, boss) for i, (party, boss) in enumerate(scenarios, start_index)]
+    chunks = [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
+
+    if workers == 1 or len(chunks) <= 1:
+        parts = [_run_chunk(chunk, master_seed, max_rounds, rng_factory) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_chunk, chunk, master_seed, max_rounds, rng_factory) for chunk in chunks]
+            parts = [f.result() for f in futures]
+
+    return [res for part in parts for res in part]
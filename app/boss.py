@@ -1,12 +1,18 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from bisect import bisect_left
 from typing import List, Dict, Any
 from .core import Character
 from .effects import Poison
+from .targeting import select
 
 
 class Strategy(ABC):
-    """Абстрактная стратегия поведения босса на фазу."""
+    """
+    Абстрактная стратегия поведения босса на фазу.
+    Цель удобно брать через targeting.select(opponents, "max_agi" | "min_hp" | "max_str" | свой селектор):
+    в бою opponents несёт индекс целей, и выбор идёт по куче, а не обходом всех героев.
+    """
 
     @abstractmethod
     def choose_action(self, boss: "Boss", opponents: list[Character]) -> Dict[str, Any]:
@@ -25,10 +31,9 @@ class Phase1Aggro(Strategy):
     """Фаза 1: агрессивные базовые атаки по самому быстрому противнику."""
 
     def choose_action(self, boss: "Boss", opponents: list[Character]) -> Dict[str, Any]:
-        live = [o for o in opponents if o.is_alive]
-        if not live:
+        target = select(opponents, "max_agi")
+        if target is None:
             return {"type": "wait", "skill_id": None, "target": None}
-        target = max(live, key=lambda x: x.agi)
         return {"type": "basic", "skill_id": None, "target": target}
 
 
@@ -36,10 +41,9 @@ class Phase2Poison(Strategy):
     """Фаза 2: использует ядовитую атаку против самого хилого (низкий HP)."""
 
     def choose_action(self, boss: "Boss", opponents: list[Character]) -> Dict[str, Any]:
-        live = [o for o in opponents if o.is_alive]
-        if not live:
+        target = select(opponents, "min_hp")
+        if target is None:
             return {"type": "wait", "skill_id": None, "target": None}
-        target = min(live, key=lambda x: x.hp)
         return {"type": "skill", "skill_id": "toxic_spit", "target": target}
 
 
@@ -47,10 +51,9 @@ class Phase3Enrage(Strategy):
     """Фаза 3: ярость — мощный удар по самому сильному (высокий STR)."""
 
     def choose_action(self, boss: "Boss", opponents: list[Character]) -> Dict[str, Any]:
-        live = [o for o in opponents if o.is_alive]
-        if not live:
+        target = select(opponents, "max_str")
+        if target is None:
             return {"type": "wait", "skill_id": None, "target": None}
-        target = max(live, key=lambda x: getattr(x, "str_", 0))
         return {"type": "skill", "skill_id": "enraged_blow", "target": target}
 
 
@@ -66,11 +69,26 @@ class Boss(Character):
 
     def __init__(self, *args, thresholds=(0.7, 0.3), strategies: List[Strategy] | None = None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.thresholds = tuple(sorted(thresholds, reverse=True))
+        self.thresholds = thresholds
         self.strategies: List[Strategy] = strategies or [Phase1Aggro(), Phase2Poison(), Phase3Enrage()]
         self.current_phase = 0
+        # фаза пересчитывается по изменениям hp, а не опросом hp_ratio каждый раунд
+        self.subscribe(self._on_stat_change)
         self.update_phase(initial=True)
 
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.subscribe(self._on_stat_change)
+
+    def _state_key(self) -> tuple:
+        return super()._state_key() + (self.current_phase,)
+
+    def _clone(self, memo: dict):
+        # пороги, границы фаз и стратегии — общие с оригиналом
+        new = super()._clone(memo)
+        new.subscribe(new._on_stat_change)
+        return new
+
     # === обязательные методы от Character ===
     def basic_attack(self, target: Character) -> int:
         """Обычная атака босса: физический урон от силы."""
@@ -98,8 +116,54 @@ class Boss(Character):
         raise ValueError(f"Unknown boss skill: {skill_id}")
 
     # === работа с фазами ===
+    @property
+    def thresholds(self) -> tuple:
+        return self._thresholds
+
+    @thresholds.setter
+    def thresholds(self, value):
+        self._thresholds = tuple(sorted(value, reverse=True))
+        self._refresh_phase_bounds()
+
+    def _refresh_phase_bounds(self):
+        """
+        Переводит пороги из долей в целые hp: фаза 0 при hp >= b1, фаза 1 при hp >= b2.
+        Границы ищутся двоичным поиском по самим _phase_from_ratio(_ratio_of_hp(hp)), поэтому
+        переопределения этих методов учитываются (фаза должна не убывать при падении hp).
+        Если переопределение зависит от другого состояния босса, при его смене нужно
+        вызвать _refresh_phase_bounds() — между вызовами фаза считается только по hp.
+        """
+        phase_at = lambda hp: self._phase_from_ratio(self._ratio_of_hp(hp))
+        self._phase_bounds = tuple(
+            bisect_left(range(self.max_hp + 2), True, key=lambda hp: phase_at(hp) <= phase)
+            for phase in (0, 1)
+        )
+        self._hp_phase = self._phase_of_hp(self.hp)
+        self._phase_dirty = True
+
+    def _phase_of_hp(self, hp: int) -> int:
+        b1, b2 = self._phase_bounds
+        if hp >= b1:
+            return 0
+        if hp >= b2:
+            return 1
+        return 2
+
+    def _on_stat_change(self, entity, name: str, old: int, new: int):
+        if name == "hp":
+            phase = self._phase_of_hp(new)
+            if phase != self._hp_phase:
+                # порог действительно пересечён
+                self._hp_phase = phase
+                self._phase_dirty = True
+        elif name in ("str_", "level"):
+            self._refresh_phase_bounds()
+
     def hp_ratio(self) -> float:
-        return 0.0 if self.max_hp == 0 else self.hp / self.max_hp
+        return self._ratio_of_hp(self.hp)
+
+    def _ratio_of_hp(self, hp: int) -> float:
+        return 0.0 if self.max_hp == 0 else hp / self.max_hp
 
     def _phase_from_ratio(self, ratio: float) -> int:
         t1, t2 = (self.thresholds + (0.0,))[:2]
@@ -110,10 +174,18 @@ class Boss(Character):
         return 2
 
     def update_phase(self, initial: bool = False):
-        new_phase = self._phase_from_ratio(self.hp_ratio())
+        if not (initial or self._phase_dirty):
+            return
+        self._phase_dirty = False
+        new_phase = self._hp_phase
         if new_phase != self.current_phase or initial:
             self.current_phase = new_phase
-            # точка расширения: можно добавить эффекты при входе в фазу
+            if not initial:
+                self.on_phase_enter(new_phase)
+
+    def on_phase_enter(self, phase: int):
+        """Точка расширения: вызывается при переходе в новую фазу (эффекты, смена статов и т.п.)."""
+        pass
 
     def decide(self, opponents: list[Character]) -> dict:
         """Выбор действия текущей стратегией."""
@@ -0,0 +1,179 @@
+from __future__ import annotations
+import copy
+import hashlib
+import json
+import random
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from .battle import Battle
+from .boss import Boss, Phase1Aggro, Phase2Poison, Phase3Enrage
+from .effects import Poison, Regen, Shield, Silence
+from .events import NullSink
+from .heroes import Warrior, Mage, Healer
+from .items import Inventory, Potion, Ether, Antidote
+from .rules import RuleEngine, default_rules
+
+# версия схемы ключа: меняется, когда меняются правила боя и старые результаты недействительны
+KEY_VERSION = 2
+
+# только то, что ключ умеет описать полностью; остальное — мимо кэша
+_HEROES = (Warrior, Mage, Healer)
+_EFFECTS = (Poison, Regen, Shield, Silence)
+_STRATEGIES = (Phase1Aggro, Phase2Poison, Phase3Enrage)
+_ITEMS = (Potion, Ether, Antidote)
+
+
+def _known(obj, classes) -> bool:
+    return type(obj) in classes
+
+
+def _hashable(party: List[Any], boss: Any, inventory: Inventory | None) -> bool:
+    if type(boss) is not Boss or not all(_known(h, _HEROES) for h in party):
+        return False
+    if not all(_known(s, _STRATEGIES) for s in boss.strategies):
+        return False
+    for e in list(party) + [boss]:
+        if not all(_known(eff, _EFFECTS) for eff in e._effects):
+            return False
+    if inventory is not None:
+        for item in inventory.list():
+            if not _known(item, _ITEMS):
+                return False
+            if isinstance(item, Antidote) and not all(cls in _EFFECTS for cls in item.removes):
+                return False
+    return True
+
+
+def scenario_key(party: List[Any], boss: Boss, *, seed: int, max_rounds: int = 20,
+                 inventory: Inventory | None = None, rules: RuleEngine | None = None) -> str | None:
+    """
+    Хэш сценария: классы, статы после клампов, эффекты с параметрами, кулдауны, пороги и стратегии босса,
+    инвентарь, правила поведения (по умолчанию app/rules.json), max_rounds и seed.
+    None — сценарий нельзя описать ключом (свои стратегии, эффекты, предметы).
+    """
+    if not _hashable(party, boss, inventory):
+        return None
+    items = () if inventory is None else tuple(item._state_key() for item in inventory.list())
+    canon = (
+        KEY_VERSION,
+        tuple(h._state_key() for h in party),
+        boss._state_key(),
+        boss.thresholds,
+        tuple(type(s).__name__ for s in boss.strategies),
+        items,
+        (rules if rules is not None else default_rules()).digest,
+        int(max_rounds),
+        int(seed),
+    )
+    return hashlib.sha256(repr(canon).encode()).hexdigest()
+
+
+class OutcomeCache:
+    """
+    Кэш итогов боя по хэшу сценария: LRU в памяти процесса перед sqlite на диске.
+    Диск ограничен max_bytes (размер сохранённых результатов); при переполнении
+    вытесняются записи, к которым дольше всего не обращались. Общий размер ведётся счётчиком
+    (вставка, замена, вытеснение), без SUM по таблице на каждую запись.
+    path=":memory:" — только временная база (удобно в тестах).
+    """
+
+    def __init__(self, path: str = "outcomes.sqlite", *, memory_items: int = 4096, max_bytes: int = 64 << 20):
+        self.memory_items = int(memory_items)
+        self.max_bytes = int(max_bytes)
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS outcomes_used ON outcomes(used)")
+        self._db.commit()
+        self._bytes = self._sum_sizes()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --------- уровни ---------
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return dict(value)
+        row = self._db.execute("SELECT value FROM outcomes WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE outcomes SET used = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+        value = json.loads(row[0])
+        self._remember(key, value)
+        self.stats["disk_hits"] += 1
+        return dict(value)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        text = json.dumps(value, sort_keys=True)
+        self._remember(key, dict(value))
+        row = self._db.execute("SELECT size FROM outcomes WHERE key = ?", (key,)).fetchone()
+        self._db.execute("INSERT OR REPLACE INTO outcomes (key, value, size, used) VALUES (?, ?, ?, ?)",
+                         (key, text, len(text), time.time()))
+        self._bytes += len(text) - (row[0] if row else 0)
+        if self._bytes > self.max_bytes:
+            self._evict()
+        self._db.commit()
+
+    def _sum_sizes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM outcomes").fetchone()[0]
+
+    def _evict(self) -> None:
+        # файл могли дописать другие процессы — перед вытеснением счётчик сверяется с таблицей
+        self._bytes = self._sum_sizes()
+        if self._bytes <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM outcomes ORDER BY used"):
+            if self._bytes <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM outcomes WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            self._bytes -= size
+
+    def disk_bytes(self) -> int:
+        return self._bytes
+
+    # --------- прогон ---------
+    def run(self, party: List[Any], boss: Boss, *, seed: int, max_rounds: int = 20,
+            inventory: Inventory | None = None, rules: RuleEngine | None = None) -> Dict[str, Any]:
+        """
+        Итог Battle(party, boss, rng=Random(seed), rules=rules).run(max_rounds) — из кэша или прогоном
+        на копии шаблона.
+        Сценарии, которые нельзя описать ключом, всегда прогоняются заново (stats["bypassed"]).
+        """
+        key = scenario_key(party, boss, seed=seed, max_rounds=max_rounds, inventory=inventory, rules=rules)
+        if key is not None:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+        party, boss, inventory = copy.deepcopy((party, boss, inventory))
+        result = Battle(party, boss, rng=random.Random(seed), sink=NullSink(),
+                        inventory=inventory, rules=rules).run(max_rounds=max_rounds)
+        if key is None:
+            self.stats["bypassed"] += 1
+        else:
+            self.stats["misses"] += 1
+            self.put(key, result)
+        return result
@@ -1,13 +1,62 @@
 from __future__ import annotations
+import copy
 from abc import ABC, abstractmethod
+from operator import attrgetter
 from typing import Any, Optional
+from .effects import NO_EFFECTS, EffectList, effect_list
+from .interceptors import compile_damage_chain
+
+class _NoCooldowns(dict):
+    """Общий пустой словарь кулдаунов: свой dict персонаж заводит при первом _start_cooldown."""
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("_NO_COOLDOWNS is shared and immutable")
+
+    __setitem__ = __delitem__ = update = setdefault = pop = popitem = clear = _readonly
+
+    def __reduce__(self):
+        return "_NO_COOLDOWNS"
+
+
+_NO_COOLDOWNS = _NoCooldowns()
+_UNSET = object()
+
+
+def _copy_effect(eff):
+    # эффекты — плоские записи (duration, dps, capacity...): копируем __dict__ без copy.copy
+    state = getattr(eff, "__dict__", None)
+    cls = type(eff)
+    if state is None or hasattr(cls, "__copy__") or cls.__reduce_ex__ is not object.__reduce_ex__:
+        return copy.copy(eff)
+    twin = object.__new__(cls)
+    twin.__dict__.update(state)
+    return twin
+
 
 class BoundedStat:
-    def __init__(self, name: str, *, min_value: int = 0, max_attr: Optional[str] = None):
+    def __init__(self, name: str, *, min_value: int = 0, max_attr: Optional[str] = None,
+                 on_change: Optional[str] = None):
         self.public_name = name
         self.storage_name = f"_{name}"
         self.min_value = min_value
         self.max_attr = max_attr  # имя метода/свойства, возвращающего максимум
+        # кэш максимума у владельца (например, _max_hp); читается вместо пересчёта свойства,
+        # если подкласс не переопределил само свойство (см. _reads_cache)
+        self.cache_name = f"_{max_attr}" if max_attr else None
+        self.on_change = on_change  # метод владельца, вызываемый после записи (пересчёт производных)
+        self.owner = None
+        self._cache_ok = {}  # класс -> можно ли читать кэш вместо max_attr
+
+    def __set_name__(self, owner: type, name: str):
+        self.owner = owner
+
+    def _reads_cache(self, cls: type) -> bool:
+        ok = self._cache_ok.get(cls)
+        if ok is None:
+            base = getattr(self.owner, self.max_attr, None) if self.owner is not None else None
+            ok = self._cache_ok[cls] = base is not None and getattr(cls, self.max_attr, None) is base
+        return ok
 
     def __get__(self, instance: Any, owner: type | None = None):
         if instance is None:
@@ -15,31 +64,51 @@ class BoundedStat:
         return getattr(instance, self.storage_name, 0)
 
     def __set__(self, instance: Any, value: int):
-        lo = self.min_value
-        hi = None
+        if type(value) is not int:
+            value = int(value)
         if self.max_attr:
-            max_val = getattr(instance, self.max_attr)
-            hi = max_val() if callable(max_val) else max_val
-        if hi is not None:
-            value = max(lo, min(int(value), int(hi)))
-        else:
-            value = max(lo, int(value))
-        instance.__dict__[self.storage_name] = value
+            hi = getattr(instance, self.cache_name, None) if self._reads_cache(type(instance)) else None
+            if hi is None:
+                max_val = getattr(instance, self.max_attr)
+                hi = int(max_val() if callable(max_val) else max_val)
+            if value > hi:
+                value = hi
+        if value < self.min_value:
+            value = self.min_value
+        observers = getattr(instance, "_observers", None)
+        if observers:
+            old = getattr(instance, self.storage_name, 0)
+            setattr(instance, self.storage_name, value)
+            if self.on_change:
+                getattr(instance, self.on_change)()
+            if old != value:
+                for callback in observers:
+                    callback(instance, self.public_name, old, value)
+            return
+        setattr(instance, self.storage_name, value)
+        if self.on_change:
+            getattr(instance, self.on_change)()
 
     def __delete__(self, instance: Any):
         raise AttributeError(f"Can't delete stat '{self.public_name}'")
 
 
 class Human:
+    # компактное хранение без __dict__: значения статов и кэш максимумов лежат в слотах
+    __slots__ = ("name", "_level", "_hp", "_mp", "_str_", "_agi", "_int_", "_max_hp", "_max_mp", "_observers")
+    # связи времени выполнения (слот -> значение по умолчанию): в копии и сохранения не попадают
+    _TRANSIENT = {"_observers": ()}
+
     hp = BoundedStat("hp", min_value=0, max_attr="max_hp")
     mp = BoundedStat("mp", min_value=0, max_attr="max_mp")
-    str_ = BoundedStat("str_", min_value=1)
+    str_ = BoundedStat("str_", min_value=1, on_change="_refresh_limits")
     agi = BoundedStat("agi", min_value=1)
-    int_ = BoundedStat("int_", min_value=1)
+    int_ = BoundedStat("int_", min_value=1, on_change="_refresh_limits")
 
     def __init__(self, name: str, level: int = 1, *, hp: int = 1, mp: int = 0, str_: int = 1, agi: int = 1, int_: int = 1):
+        self._observers = ()  # подписчики на изменения статов: callback(entity, name, old, new)
         self.name = name
-        self.level = max(1, int(level))
+        self.level = level
         self.str_ = str_
         self.agi = agi
         self.int_ = int_
@@ -62,13 +131,89 @@ class Human:
         yield ("agi", self.agi)
         yield ("int_", self.int_)
 
+    @property
+    def level(self) -> int:
+        return self._level
+
+    @level.setter
+    def level(self, value: int):
+        old = getattr(self, "_level", None)
+        self._level = max(1, int(value))
+        self._refresh_limits()
+        if old is not None and old != self._level:
+            for callback in self._observers:
+                callback(self, "level", old, self._level)
+
+    # --- подписка на изменения статов ---
+    def subscribe(self, callback):
+        """callback(entity, name, old, new) вызывается после каждого реального изменения hp/mp/str_/agi/int_/level."""
+        self._observers = self._observers + (callback,)
+
+    def unsubscribe(self, callback):
+        self._observers = tuple(cb for cb in self._observers if cb != callback)
+
+    def __getstate__(self):
+        transient = self._TRANSIENT
+        state = dict(getattr(self, "__dict__", {}))
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                if name not in transient and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in self._TRANSIENT.items():
+            object.__setattr__(self, name, value)
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def _state_slots(self) -> tuple:
+        # имена слотов с состоянием (без переходных), кэшируются на классе
+        cls = type(self)
+        names = cls.__dict__.get("_state_slot_names")
+        if names is None:
+            names = tuple(name for klass in cls.__mro__ for name in klass.__dict__.get("__slots__", ())
+                          if name not in self._TRANSIENT)
+            cls._state_slot_names = names
+            # все слоты состояния одним вызовом (C-уровень attrgetter) — для _clone
+            cls._state_slot_reader = attrgetter(*names)
+        return names
+
+    def _clone(self, memo: dict):
+        """
+        Дешёвая копия для Battle.fork(): скалярные статы копируются, неизменяемые данные
+        (имя, кортежи, стратегии) разделяются с оригиналом. memo: id(старый) -> новый объект.
+        """
+        cls = type(self)
+        new = cls.__new__(cls)
+        for name, value in self._TRANSIENT.items():
+            setattr(new, name, value)
+        names = self._state_slots()
+        try:
+            values = cls._state_slot_reader(self)
+        except AttributeError:
+            # у подкласса есть незаполненные слоты — копируем только заполненные
+            values = [getattr(self, name, _UNSET) for name in names]
+        for name, value in zip(names, values):
+            if value is not _UNSET:
+                setattr(new, name, value)
+        if hasattr(self, "__dict__"):
+            new.__dict__.update(self.__dict__)
+        memo[id(self)] = new
+        return new
+
+    def _refresh_limits(self):
+        # пересчёт кэша максимумов: только при смене level / str_ / int_
+        self._max_hp = 50 + self.level * 10 + self.str_ * 5
+        self._max_mp = 10 + self.level * 5 + self.int_ * 5
+
     @property
     def max_hp(self) -> int:
-        return 50 + self.level * 10 + self.str_ * 5
+        return self._max_hp
 
     @property
     def max_mp(self) -> int:
-        return 10 + self.level * 5 + self.int_ * 5
+        return self._max_mp
 
     @property
     def is_alive(self) -> bool:
@@ -82,14 +227,20 @@ class Human:
 
 
 class Character(Human, ABC):
-    # флаги статусов
-    _silenced: bool = False
-
+    __slots__ = ("_effects", "_ready_at", "_turn", "_silenced", "_scheduler", "_damage_chain")
+    _TRANSIENT = {**Human._TRANSIENT, "_scheduler": None, "_damage_chain": ()}
 
     def __init__(self, *args, **kwargs):
+        # флаги статусов
+        self._silenced = False
+        self._scheduler = None  # планировщик эффектов боя, к которому подключён персонаж
+        self._damage_chain = ()  # скомпилированные перехватчики урона (см. interceptors)
         super().__init__(*args, **kwargs)
-        self._effects = []     # type: list
-        self._cooldowns = {}   # type: dict[str, int]
+        # эффекты и кулдауны — общие пустые заглушки, пока у персонажа их нет (память рейдов на 10k сущностей)
+        self._effects = NO_EFFECTS
+        # кулдауны: skill_id -> номер собственного хода, с которого навык снова доступен
+        self._ready_at = _NO_COOLDOWNS    # type: dict[str, int]
+        self._turn = 0         # счётчик завершённых ходов персонажа
 
     @abstractmethod
     def basic_attack(self, target: "Character") -> int:
@@ -101,13 +252,59 @@ class Character(Human, ABC):
     
     # --- helpers for skills (если уже добавлял, пропусти) ---
     def _start_cooldown(self, skill_id: str, turns: int):
-        self._cooldowns[skill_id] = int(turns)
+        if self._ready_at is _NO_COOLDOWNS:
+            self._ready_at = {}
+        self._ready_at[skill_id] = self._turn + int(turns)
+
+    @property
+    def _cooldowns(self) -> dict:
+        """Совместимый вид: skill_id -> сколько ходов осталось (0 — готов)."""
+        turn = self._turn
+        return {k: max(0, ready - turn) for k, ready in self._ready_at.items()}
+
+    @_cooldowns.setter
+    def _cooldowns(self, value: dict):
+        self._ready_at = {k: self._turn + int(v) for k, v in value.items()} or _NO_COOLDOWNS
 
     def _spend_mp(self, amount: int):
         if self.mp < amount:
             raise ValueError(f"Not enough MP for {self.name}: need {amount}, have {self.mp}")
         self.mp = self.mp - amount
 
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if self._effects:
+            self._effects._owner = self
+        else:
+            self._effects = NO_EFFECTS
+        self._effects_changed()
+
+    def _clone(self, memo: dict):
+        new = super()._clone(memo)
+        # эффекты и кулдауны меняются по ходу боя — у копии свои
+        effects = []
+        for eff in self._effects:
+            twin = _copy_effect(eff)
+            memo[id(eff)] = twin
+            effects.append(twin)
+        new._effects = effect_list(effects, new)
+        new._ready_at = dict(self._ready_at) if self._ready_at else _NO_COOLDOWNS
+        if self._damage_chain:
+            new._effects_changed()
+        return new
+
+    def _state_key(self) -> tuple:
+        """Канонический ключ состояния персонажа (для Battle.state_key)."""
+        turn = self._turn
+        cooldowns = tuple(sorted((k, ready - turn) for k, ready in self._ready_at.items() if ready > turn))
+        effects = tuple((type(eff).__name__, tuple(sorted(vars(eff).items()))) for eff in self._effects)
+        return (type(self).__name__, self.name, self._level, self._hp, self._mp,
+                self._str_, self._agi, self._int_, self._silenced, cooldowns, effects)
+
+    def _effects_changed(self):
+        # список эффектов изменился (наложение, истечение, Antidote) — пересобрать цепочку урона
+        self._damage_chain = compile_damage_chain(self._effects)
+
     # --- combat helpers ---
     def receive_damage(self, amount: int) -> int:
         """Принять урон с учётом щитов/эффектов. Возвращает фактический урон по HP."""
@@ -115,13 +312,11 @@ class Character(Human, ABC):
             return 0
         # дать эффектам шанс поглотить/изменить урон (например, Shield)
         remaining = int(amount)
-        for eff in list(self._effects):
-            on_dmg = getattr(eff, "on_damage", None)
-            if callable(on_dmg):
-                remaining = int(on_dmg(self, remaining))
-                if remaining <= 0:
-                    remaining = 0
-                    break
+        for on_dmg in self._damage_chain:
+            remaining = int(on_dmg(self, remaining))
+            if remaining <= 0:
+                remaining = 0
+                break
         before = self.hp
         self.hp = self.hp - remaining
         return before - self.hp
@@ -139,13 +334,20 @@ class Character(Human, ABC):
 
     # эффекты
     def add_effect(self, effect: Any):
+        if self._effects is NO_EFFECTS:
+            self._effects = EffectList(owner=self)
         self._effects.append(effect)
         on_apply = getattr(effect, "on_apply", None)
         if callable(on_apply):
             on_apply(self)
+        if self._scheduler is not None:
+            self._scheduler.register(self, effect)
 
     def tick_effects(self, phase: str):
-        """phase: 'start' или 'end' — вызывает хуки эффектов и снимает истёкшие."""
+        """
+        phase: 'start' или 'end' — вызывает хуки эффектов и снимает истёкшие.
+        Автономный путь (без боя); в бою эффекты тикает EffectScheduler.
+        """
         to_remove = []
         for eff in list(self._effects):
             if phase == "start" and hasattr(eff, "on_turn_start"):
@@ -165,8 +367,8 @@ class Character(Human, ABC):
                 pass
 
     def can_use(self, skill_id: str) -> bool:
-        return self._cooldowns.get(skill_id, 0) == 0 and not self.is_silenced()
+        return self._ready_at.get(skill_id, 0) <= self._turn and not self.is_silenced()
 
     def reduce_cooldowns(self):
-        for k, v in list(self._cooldowns.items()):
-            self._cooldowns[k] = max(0, v - 1)
+        # конец хода: сдвигаем счётчик, записи кулдаунов не трогаем
+        self._turn += 1
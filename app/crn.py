@@ -0,0 +1,74 @@
+from __future__ import annotations
+import hashlib
+import math
+import random
+from statistics import NormalDist, fmean, stdev
+from typing import Any, Dict
+
+from .battle import run_many
+from .save_load import register_type
+
+
+class CrnRng(random.Random):
+    """
+    ГСЧ для общих случайных чисел (common random numbers).
+
+    Броски крита берутся не из общего потока, а из подпотока (ключ боя, позиция актёра, номер его хода):
+    если два варианта боя выбирают разные действия (например, Mage без MP не кидает fireball,
+    а бьёт базовой атакой и тратит бросок), броски остальных актёров и следующих ходов не сдвигаются.
+    Прочие обращения к ГСЧ идут в обычный поток Random(key).
+    """
+
+    def __init__(self, key: int = 0):
+        self.key = int(key)
+        super().__init__(self.key)
+
+    def stream_for(self, battle, actor) -> random.Random:
+        pos = battle._entity_pos[id(actor)]
+        digest = hashlib.blake2b(f"{self.key}:{pos}:{actor._turn}".encode(), digest_size=8).digest()
+        return random.Random(int.from_bytes(digest, "big"))
+
+    # ключ подпотоков — часть состояния (fork, pickle)
+    def getstate(self):
+        return (self.key, super().getstate())
+
+    def setstate(self, state):
+        self.key, inner = state
+        super().setstate(inner)
+
+
+register_type(CrnRng)
+
+
+def crn_rng(master_seed: int, battle_index: int) -> CrnRng:
+    """Фабрика для run_many(rng_factory=...): бой №i обоих вариантов получает один и тот же ключ."""
+    digest = hashlib.sha256(f"crn:{master_seed}:{battle_index}".encode()).digest()
+    return CrnRng(int.from_bytes(digest[:8], "big"))
+
+
+def paired_compare(variant_a, variant_b, battles: int = 1000, *, confidence: float = 0.95,
+                   master_seed: int = 0, workers: int | None = 1, max_rounds: int = 20) -> Dict[str, Any]:
+    """
+    Парное сравнение двух вариантов (party, boss): бой №i обоих вариантов идёт на одних и тех же
+    бросках крита (CrnRng), и доверительный интервал строится по попарным разностям побед,
+    а не по двум независимым выборкам — общий шум вычитается.
+    diff = доля побед A - доля побед B; low/high — нормальный интервал для средней разности.
+    """
+    kw = dict(workers=workers, master_seed=master_seed, max_rounds=max_rounds, rng_factory=crn_rng)
+    wins_a = [r["result"] == "party" for r in run_many([variant_a] * battles, **kw)]
+    wins_b = [r["result"] == "party" for r in run_many([variant_b] * battles, **kw)]
+    diffs = [int(a) - int(b) for a, b in zip(wins_a, wins_b)]
+    mean = fmean(diffs)
+    half = 0.0
+    if battles > 1:
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        half = z * stdev(diffs) / math.sqrt(battles)
+    return {
+        "a": sum(wins_a) / battles,
+        "b": sum(wins_b) / battles,
+        "diff": mean,
+        "low": mean - half,
+        "high": mean + half,
+        "battles": battles,
+        "agreement": sum(a == b for a, b in zip(wins_a, wins_b)) / battles,
+    }
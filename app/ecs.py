@@ -0,0 +1,406 @@
+from __future__ import annotations
+import random
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from .batch import (BatchBattle, EMPTY, POISON, REGEN, SHIELD, SILENCE, _EFFECT_CODES, SKILLS, _SKILL_IDX)
+from .boss import Boss
+from .effects import Poison, Regen, Shield
+from .heroes import Warrior, Mage, Healer
+
+# коды классов в столбце kind
+WARRIOR, MAGE, HEALER, BOSS = 0, 1, 2, 3
+_CLASS_CODES = {Warrior: WARRIOR, Mage: MAGE, Healer: HEALER, Boss: BOSS}
+_EFFECT_NAMES = {POISON: "Poison", REGEN: "Regen", SHIELD: "Shield", SILENCE: "Silence"}
+
+_FIREBALL, _HEAL = _SKILL_IDX["fireball"], _SKILL_IDX["heal"]
+_TOXIC_SPIT, _ENRAGED_BLOW = _SKILL_IDX["toxic_spit"], _SKILL_IDX["enraged_blow"]
+
+
+class EntityStore:
+    """
+    Хранилище сущностей столбцами (struct of arrays): строка — id сущности.
+      - статы: level/hp/mp/str_/agi/int_/max_hp/max_mp — int64, kind — код класса,
+        crit_chance/crit_mult — шанс и множитель крита (CritMixin)
+      - кулдауны — как в Character: счётчик ходов turn и матрица ready_at (E, len(SKILLS))
+      - эффекты — слоты (E, S): код, duration и «величина» (dps/hps/ёмкость щита),
+        упакованы слева в порядке наложения, как EffectList
+    Системы (damage, tick_effects, ready) работают сразу по столбцам; имена — обычный список.
+    """
+
+    def __init__(self, entities: List[Any]):
+        n = len(entities)
+        self.names = [e.name for e in entities]
+
+        def column(attr):
+            return np.array([getattr(e, attr) for e in entities], dtype=np.int64)
+
+        self.level = column("level")
+        self.hp = column("hp")
+        self.mp = column("mp")
+        self.str_ = column("str_")
+        self.agi = column("agi")
+        self.int_ = column("int_")
+        self.max_hp = column("max_hp")
+        self.max_mp = column("max_mp")
+        self.kind = np.array([_CLASS_CODES[type(e)] for e in entities], dtype=np.int8)
+        self.crit_chance = np.array([e.crit_chance() if isinstance(e, (Warrior, Mage)) else 0.0
+                                     for e in entities], dtype=np.float64)
+        self.crit_mult = np.array([e.crit_multiplier() if isinstance(e, (Warrior, Mage)) else 1.0
+                                   for e in entities], dtype=np.float64)
+        self.silenced = np.array([e.is_silenced() for e in entities], dtype=bool)
+
+        self.turn = np.zeros(n, dtype=np.int64)
+        self.ready_at = np.zeros((n, len(SKILLS)), dtype=np.int64)
+        for i, e in enumerate(entities):
+            for skill_id, left in e._cooldowns.items():
+                self.ready_at[i, _SKILL_IDX[skill_id]] = left
+
+        slots = max([len(e._effects) for e in entities] + [0]) + 2
+        self.eff_kind = np.zeros((n, slots), dtype=np.int8)
+        self.eff_dur = np.zeros((n, slots), dtype=np.int64)
+        self.eff_mag = np.zeros((n, slots), dtype=np.int64)
+        for i, e in enumerate(entities):
+            for j, eff in enumerate(e._effects):
+                self.eff_kind[i, j] = _EFFECT_CODES[type(eff)]
+                self.eff_dur[i, j] = eff.duration
+                if isinstance(eff, Poison):
+                    self.eff_mag[i, j] = eff.dps
+                elif isinstance(eff, Regen):
+                    self.eff_mag[i, j] = eff.hps
+                elif isinstance(eff, Shield):
+                    self.eff_mag[i, j] = eff.capacity
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def view(self, eid: int) -> "EntityView":
+        return _VIEWS[int(self.kind[eid])](self, eid)
+
+    # --------- системы ---------
+    def damage_one(self, eid: int, amount: int) -> int:
+        """Character.receive_damage для одной строки: щиты в порядке слотов, затем HP."""
+        hp = int(self.hp[eid])
+        if amount <= 0 or hp <= 0:
+            return 0
+        remaining = int(amount)
+        kinds, mags = self.eff_kind[eid], self.eff_mag[eid]
+        for j in np.flatnonzero(kinds == SHIELD):
+            cap = int(mags[j])
+            if cap > 0:
+                absorbed = min(cap, remaining)
+                mags[j] = cap - absorbed
+                remaining -= absorbed
+            if remaining <= 0:
+                return 0
+        self.hp[eid] = max(0, hp - remaining)
+        return hp - int(self.hp[eid])
+
+    def damage(self, ids: np.ndarray, amounts: np.ndarray) -> None:
+        """То же по столбцу: урон amounts[i] строкам ids[i] (ids без повторов)."""
+        ok = (amounts > 0) & (self.hp[ids] > 0)
+        ids, remaining = ids[ok], amounts[ok].copy()
+        for j in range(self.eff_kind.shape[1]):
+            sh = (self.eff_kind[ids, j] == SHIELD) & (remaining > 0)
+            if not sh.any():
+                continue
+            cap = self.eff_mag[ids[sh], j]
+            absorbed = np.where(cap > 0, np.minimum(cap, remaining[sh]), 0)
+            self.eff_mag[ids[sh], j] = cap - absorbed
+            remaining[sh] -= absorbed
+        self.hp[ids] = np.maximum(0, self.hp[ids] - remaining)
+
+    def add_effect(self, eid: int, code: int, duration: int, magnitude: int = 0) -> None:
+        free = np.flatnonzero(self.eff_kind[eid] == EMPTY)
+        if not len(free):
+            self._grow_slots()
+            free = np.flatnonzero(self.eff_kind[eid] == EMPTY)
+        j = free[0]
+        self.eff_kind[eid, j] = code
+        self.eff_dur[eid, j] = duration
+        self.eff_mag[eid, j] = magnitude
+        if code == SILENCE:
+            self.silenced[eid] = True
+
+    def _grow_slots(self):
+        pad = ((0, 0), (0, max(2, self.eff_kind.shape[1])))
+        self.eff_kind = np.pad(self.eff_kind, pad)
+        self.eff_dur = np.pad(self.eff_dur, pad)
+        self.eff_mag = np.pad(self.eff_mag, pad)
+
+    def tick_effects(self, phase: str) -> None:
+        """
+        Тик фазы ("start"/"end") для всех живых на начало тика — как EffectScheduler.fire:
+        хуки по слотам в порядке наложения, истечение после хуков, эффекты мёртвых заморожены.
+        """
+        living = self.hp > 0
+        if phase == "end":
+            for j in range(self.eff_kind.shape[1]):
+                kind = self.eff_kind[:, j]
+                hit = living & (kind != EMPTY)
+                if not hit.any():
+                    continue
+                mag = self.eff_mag[:, j]
+                poison = np.flatnonzero(hit & (kind == POISON) & (self.hp > 0) & (mag > 0))
+                if len(poison):
+                    self.damage(poison, mag[poison])
+                regen = hit & (kind == REGEN) & (self.hp > 0) & (mag > 0)
+                if regen.any():
+                    self.hp = np.where(regen, np.minimum(self.hp + mag, self.max_hp), self.hp)
+                dur = self.eff_dur[:, j]
+                dur -= hit
+                dur[hit & (kind == SHIELD) & (mag <= 0) & (dur > 0)] = 0
+
+        expired = living[:, None] & (self.eff_kind != EMPTY) & (self.eff_dur <= 0)
+        if not expired.any():
+            return
+        self.silenced &= ~(expired & (self.eff_kind == SILENCE)).any(axis=1)
+        rows = np.flatnonzero(expired.any(axis=1))
+        kind = self.eff_kind[rows]
+        kind[expired[rows]] = EMPTY
+        # уплотняем слоты затронутых строк, сохраняя порядок наложения
+        order = np.argsort(kind == EMPTY, axis=1, kind="stable")
+        self.eff_kind[rows] = np.take_along_axis(kind, order, axis=1)
+        self.eff_dur[rows] = np.take_along_axis(self.eff_dur[rows], order, axis=1)
+        self.eff_mag[rows] = np.take_along_axis(self.eff_mag[rows], order, axis=1)
+
+    def ready(self, eid: int, skill: int) -> bool:
+        """Character.can_use: кулдаун прошёл и нет немоты."""
+        return self.ready_at[eid, skill] <= self.turn[eid] and not self.silenced[eid]
+
+    def start_cooldown(self, eid: int, skill: int, turns: int) -> None:
+        self.ready_at[eid, skill] = self.turn[eid] + turns
+
+
+# --------- тонкие представления строки ---------
+def _column(name: str, max_column: str | None = None):
+    def get(self) -> int:
+        return int(getattr(self._store, name)[self.id])
+
+    def set(self, value: int):
+        hi = int(getattr(self._store, max_column)[self.id])
+        getattr(self._store, name)[self.id] = min(max(0, int(value)), hi)
+
+    return property(get, set if max_column else None)
+
+
+class EntityView:
+    """Персонаж как вид на строку EntityStore: читает и пишет столбцы, своего состояния не хранит."""
+    __slots__ = ("_store", "id")
+
+    def __init__(self, store: EntityStore, eid: int):
+        self._store = store
+        self.id = eid
+
+    level = _column("level")
+    hp = _column("hp", "max_hp")
+    mp = _column("mp", "max_mp")
+    str_ = _column("str_")
+    agi = _column("agi")
+    int_ = _column("int_")
+    max_hp = _column("max_hp")
+    max_mp = _column("max_mp")
+
+    @property
+    def name(self) -> str:
+        return self._store.names[self.id]
+
+    @property
+    def is_alive(self) -> bool:
+        return self._store.hp[self.id] > 0
+
+    def is_silenced(self) -> bool:
+        return bool(self._store.silenced[self.id])
+
+    @property
+    def cooldowns(self) -> Dict[str, int]:
+        """skill_id -> сколько ходов осталось (только ненулевые)."""
+        s = self._store
+        left = s.ready_at[self.id] - s.turn[self.id]
+        return {SKILLS[k]: int(v) for k, v in enumerate(left) if v > 0}
+
+    @property
+    def effects(self) -> List[tuple]:
+        """[(имя эффекта, duration, величина)] в порядке наложения."""
+        s = self._store
+        return [(_EFFECT_NAMES[int(code)], int(s.eff_dur[self.id, j]), int(s.eff_mag[self.id, j]))
+                for j, code in enumerate(s.eff_kind[self.id]) if code != EMPTY]
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} name={self.name!r} hp={self.hp}/{self.max_hp}>"
+
+
+class WarriorView(EntityView):
+    __slots__ = ()
+
+
+class MageView(EntityView):
+    __slots__ = ()
+
+
+class HealerView(EntityView):
+    __slots__ = ()
+
+
+class BossView(EntityView):
+    __slots__ = ()
+
+
+_VIEWS = {WARRIOR: WarriorView, MAGE: MageView, HEALER: HealerView, BOSS: BossView}
+
+
+class EcsBattle:
+    """
+    Бой на EntityStore для больших рейдов: вместо объектов с дескрипторами, списками эффектов
+    и словарями кулдаунов — столбцы, а ходы и тики работают с ними напрямую.
+
+    Для того же ГСЧ исход и итоговые статы совпадают с Battle(party, boss, rng).run(max_rounds)
+    при авто-логике героев и стратегиях босса по умолчанию. boss — один противник или список,
+    как у Battle: строки store — сначала пати, затем противники (boss_id — диапазон их строк),
+    герои бьют первого живого противника, каждый противник ходит по своей фазе.
+    Поддерживается то же подмножество, что у BatchBattle: Warrior/Mage/Healer, Boss со стандартными
+    стратегиями, эффекты Poison/Regen/Shield/Silence. Шаблон (party, boss) не меняется — состояние боя
+    живёт в store, смотреть его удобно через battle.party / battle.enemies / battle.boss (EntityView).
+    """
+
+    def __init__(self, party: List, boss: Boss | Sequence[Boss], rng: random.Random | None = None, *,
+                 seed: int | None = None):
+        enemies = list(boss) if isinstance(boss, (list, tuple)) else [boss]
+        if not enemies:
+            raise ValueError("Battle needs at least one enemy")
+        for enemy in enemies:
+            BatchBattle._validate(party, enemy)
+        self.store = EntityStore(list(party) + enemies)
+        self.rng = rng or random.Random(seed)
+        self.boss_id = range(len(party), len(party) + len(enemies))
+        self.party = [self.store.view(i) for i in range(len(party))]
+        self.enemies = [self.store.view(i) for i in self.boss_id]
+        self.boss = self.enemies[0]
+        self._phase_bounds = [e._phase_bounds for e in enemies]
+        self.phases = [e.current_phase for e in enemies]
+        # agi и имена в бою не меняются: порядок ходов считается один раз
+        s = self.store
+        self._order = sorted(range(len(s)), key=lambda i: (-int(s.agi[i]), s.names[i], i))
+        self.round_no = 0
+        self.result = None
+
+    @property
+    def current_phase(self) -> int:
+        """Фаза первого противника (как Battle.boss.current_phase)."""
+        return self.phases[0]
+
+    def _phase_of_hp(self, k: int, hp: int) -> int:
+        b1, b2 = self._phase_bounds[k]
+        return 0 if hp >= b1 else 1 if hp >= b2 else 2
+
+    def _first_enemy(self) -> int:
+        # цель героев — первый живой противник по порядку (Battle: self._living_cached("boss")[0])
+        hp = self.store.hp
+        for b in self.boss_id:
+            if hp[b] > 0:
+                return b
+        return self.boss_id.start
+
+    # --------- ходы ---------
+    def _hit(self, eid: int, target: int, dmg: int) -> None:
+        """Базовая атака героя: прямая запись в hp цели и бросок крита (как Battle._exec_basic)."""
+        s = self.store
+        s.hp[target] = min(max(0, int(s.hp[target]) - dmg), int(s.max_hp[target]))
+        chance = s.crit_chance[eid]
+        if chance and dmg > 0 and self.rng.random() < chance:
+            extra = int(round(dmg * s.crit_mult[eid])) - dmg
+            if extra > 0:
+                s.damage_one(target, extra)
+
+    def _hero_turn(self, eid: int) -> int:
+        """Ход героя; возвращает строку противника, по которому пришёлся удар (-1 — лечение)."""
+        s, p = self.store, self.boss_id.start
+        kind = s.kind[eid]
+        t = self._first_enemy()
+        if kind == WARRIOR:
+            self._hit(eid, t, 5 + int(s.str_[eid]) * 2)
+            return t
+        if kind == MAGE:
+            if s.ready(eid, _FIREBALL) and s.mp[eid] >= 12:
+                s.mp[eid] -= 12
+                s.hp[t] = max(0, int(s.hp[t]) - (12 + int(s.int_[eid]) * 4))
+                s.start_cooldown(eid, _FIREBALL, 2)
+            else:
+                self._hit(eid, t, 3 + int(s.int_[eid]) // 2)
+            return t
+        if s.ready(eid, _HEAL) and s.mp[eid] >= 10:
+            hp = s.hp[:p]
+            injured = (hp > 0) & (hp < s.max_hp[:p] // 2)
+            if injured.any():
+                # при равном hp — первый по порядку в пати
+                target = int(np.argmin(np.where(injured, hp, np.iinfo(np.int64).max)))
+                s.hp[target] = min(int(hp[target]) + 10 + int(s.int_[eid]) * 3, int(s.max_hp[target]))
+                s.mp[eid] -= 10
+                s.start_cooldown(eid, _HEAL, 2)
+                return -1
+        self._hit(eid, t, 2 + int(s.int_[eid]) // 3)
+        return t
+
+    def _boss_turn(self, b: int) -> None:
+        s, p = self.store, self.boss_id.start
+        live = s.hp[:p] > 0
+        phase = self.phases[b - p]
+        if phase == 0:
+            target = int(np.argmax(np.where(live, s.agi[:p], np.iinfo(np.int64).min)))
+            s.damage_one(target, 6 + int(s.str_[b]) * 2)
+            return
+        if s.silenced[b]:
+            raise RuntimeError("Silenced")
+        if phase == 1:
+            target = int(np.argmin(np.where(live, s.hp[:p], np.iinfo(np.int64).max)))
+            s.add_effect(target, POISON, 2, 8 + int(s.int_[b]))
+            s.start_cooldown(b, _TOXIC_SPIT, 2)
+        else:
+            target = int(np.argmax(np.where(live, s.str_[:p], np.iinfo(np.int64).min)))
+            s.damage_one(target, 12 + int(s.str_[b]) * 3)
+            s.start_cooldown(b, _ENRAGED_BLOW, 2)
+
+    def _check_end(self) -> bool:
+        s, p = self.store, self.boss_id.start
+        if not (s.hp[p:] > 0).any():
+            self.result = "party"
+        elif not (s.hp[:p] > 0).any():
+            self.result = "boss"
+        return self.result is not None
+
+    # --------- основной цикл ---------
+    def run(self, max_rounds: int = 20) -> Dict[str, Any]:
+        s, p = self.store, self.boss_id.start
+        self.round_no = 0
+        self.result = None
+        while self.result is None:
+            if self.round_no >= max_rounds:
+                self.result = "draw"
+                break
+            self.round_no += 1
+            for k, b in enumerate(self.boss_id):
+                self.phases[k] = self._phase_of_hp(k, int(s.hp[b]))
+            s.tick_effects("start")
+
+            queue = [i for i in self._order if s.hp[i] > 0]
+            for eid in queue:
+                if eid < p:
+                    # урон героям наносят только противники: после хода героя конец возможен,
+                    # только если его цель погибла
+                    t = self._hero_turn(eid) if s.hp[eid] > 0 else -1
+                    s.turn[eid] += 1
+                    if t >= 0 and s.hp[t] <= 0 and self._check_end():
+                        break
+                    continue
+                if s.hp[eid] > 0:
+                    self._boss_turn(eid)
+                s.turn[eid] += 1
+                if self._check_end():
+                    break
+            if self.result is not None:
+                break
+
+            s.tick_effects("end")
+            self._check_end()
+        return {"result": self.result}
@@ -1,5 +1,85 @@
 from __future__ import annotations
 
+
+class EffectList:
+    """
+    Упорядоченный список эффектов персонажа с удалением за O(1).
+    Порядок итерации — порядок наложения (как у обычного list.append).
+    Эффекты сравниваются по идентичности объекта.
+    Владелец (owner) получает _effects_changed() после каждого изменения списка.
+    У персонажа без эффектов вместо своего списка — общий пустой NO_EFFECTS (см. Character.add_effect).
+    """
+    __slots__ = ("_items", "_next", "_owner")
+
+    def __init__(self, effects=(), owner=None):
+        self._items = {}        # id(eff) -> (seq, eff)
+        self._next = 0          # порядковый номер следующего наложения
+        self._owner = None
+        for eff in effects:
+            self.append(eff)
+        self._owner = owner
+
+    def _changed(self):
+        if self._owner is not None:
+            self._owner._effects_changed()
+
+    def append(self, eff) -> None:
+        self._items[id(eff)] = (self._next, eff)
+        self._next += 1
+        self._changed()
+
+    def remove(self, eff) -> None:
+        try:
+            del self._items[id(eff)]
+        except KeyError:
+            raise ValueError("effect not in list") from None
+        self._changed()
+
+    def position(self, eff) -> int:
+        """Порядковый номер наложения (растёт монотонно)."""
+        return self._items[id(eff)][0]
+
+    def __contains__(self, eff) -> bool:
+        return id(eff) in self._items
+
+    def __iter__(self):
+        return (eff for _, eff in self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __reduce__(self):
+        # ключи — id объектов, поэтому при копировании/сохранении пересобираем заново;
+        # владельца заново привязывает сам персонаж
+        return (EffectList, (list(self),))
+
+    def __repr__(self) -> str:
+        return f"EffectList({list(self)!r})"
+
+
+class _NoEffects(EffectList):
+    """Общий неизменяемый пустой список: персонаж заводит свой EffectList при первом наложении."""
+    __slots__ = ()
+
+    def append(self, eff) -> None:
+        raise TypeError("NO_EFFECTS is shared and immutable")
+
+    def __reduce__(self):
+        return "NO_EFFECTS"
+
+
+NO_EFFECTS = _NoEffects()
+
+
+def effect_list(effects, owner) -> EffectList:
+    """Список эффектов персонажа: NO_EFFECTS, если эффектов нет."""
+    effects = list(effects)
+    return EffectList(effects, owner=owner) if effects else NO_EFFECTS
+
+
 class Effect:
     """Базовый эффект: хранит имя, длительность (в ходах) и стаки."""
     def __init__(self, name: str, duration: int, stacks: int = 1):
@@ -75,8 +155,7 @@ class Silence(Effect):
     def on_apply(self, target):
         target._silenced = True
 
-    def on_turn_end(self, target):
-        self.duration -= 1
+    # on_turn_end — базовый: только отсчёт длительности (чистый таймер)
 
     def on_expire(self, target):
         target._silenced = False
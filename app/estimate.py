@@ -0,0 +1,100 @@
+from __future__ import annotations
+import math
+from statistics import NormalDist
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .battle import run_many
+
+
+def wilson_interval(wins: int, n: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Доверительный интервал Уилсона для доли побед wins/n."""
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    p = wins / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _batches(party, boss, batch_size: int, max_battles: int, **run_kw) -> Iterator[List[bool]]:
+    """Пачки исходов (True — победа пати); бои нумеруются сквозь пачки, поэтому серия воспроизводима."""
+    done = 0
+    while done < max_battles:
+        size = min(batch_size, max_battles - done)
+        results = run_many([(party, boss)] * size, start_index=done, **run_kw)
+        done += size
+        yield [r["result"] == "party" for r in results]
+
+
+def estimate_win_rate(party, boss, *, precision: float = 0.02, confidence: float = 0.95,
+                      batch_size: int = 256, max_battles: int = 100_000, workers: int | None = 1,
+                      master_seed: int = 0, max_rounds: int = 20) -> Dict[str, Any]:
+    """
+    Доля побед пати с остановкой, как только полуширина интервала Уилсона <= precision.
+    Бои идут пачками по batch_size через run_many; проверка — после каждой пачки.
+    Ничья считается «не победой».
+    """
+    wins = n = 0
+    low, high = 0.0, 1.0
+    for batch in _batches(party, boss, batch_size, max_battles, workers=workers,
+                          master_seed=master_seed, max_rounds=max_rounds):
+        wins += sum(batch)
+        n += len(batch)
+        low, high = wilson_interval(wins, n, confidence)
+        if (high - low) / 2 <= precision:
+            break
+    return {
+        "win_rate": wins / n if n else 0.0,
+        "low": low,
+        "high": high,
+        "battles": n,
+        "wins": wins,
+        "stopped": "precision" if (high - low) / 2 <= precision else "max_battles",
+    }
+
+
+def sprt_win_rate(party, boss, threshold: float, *, delta: float = 0.02, alpha: float = 0.05,
+                  beta: float = 0.05, batch_size: int = 256, max_battles: int = 100_000,
+                  workers: int | None = 1, master_seed: int = 0, max_rounds: int = 20) -> Dict[str, Any]:
+    """
+    Последовательный тест отношения вероятностей (SPRT) для вопроса «доля побед выше threshold?»:
+    H0: p = threshold - delta против H1: p = threshold + delta, ошибки alpha / beta.
+    Исходы проверяются по одному, поэтому battles — точный номер боя, на котором принято решение
+    (simulated — сколько реально прогнано с учётом хвоста последней пачки).
+    decision: "above" | "below" | "undecided" (упёрлись в max_battles).
+    """
+    p0 = min(max(threshold - delta, 1e-9), 1 - 1e-9)
+    p1 = min(max(threshold + delta, 1e-9), 1 - 1e-9)
+    win_step = math.log(p1 / p0)
+    loss_step = math.log((1 - p1) / (1 - p0))
+    upper = math.log((1 - beta) / alpha)
+    lower = math.log(beta / (1 - alpha))
+
+    llr = 0.0
+    wins = n = simulated = 0
+    decision = "undecided"
+    for batch in _batches(party, boss, batch_size, max_battles, workers=workers,
+                          master_seed=master_seed, max_rounds=max_rounds):
+        simulated += len(batch)
+        for won in batch:
+            n += 1
+            wins += won
+            llr += win_step if won else loss_step
+            if llr >= upper:
+                decision = "above"
+                break
+            if llr <= lower:
+                decision = "below"
+                break
+        if decision != "undecided":
+            break
+    return {
+        "decision": decision,
+        "win_rate": wins / n if n else 0.0,
+        "battles": n,
+        "simulated": simulated,
+        "wins": wins,
+        "llr": llr,
+    }
@@ -0,0 +1,137 @@
+from __future__ import annotations
+import os
+import time
+from collections import deque
+from typing import List, NamedTuple, Optional
+
+
+class BattleEvent(NamedTuple):
+    """Типизированная запись лога боя. Текст строится только при выводе (str())."""
+    round: int
+    actor: Optional[str]
+    target: Optional[str]
+    kind: str
+    amount: int = 0
+    skill: Optional[str] = None
+
+    def __str__(self) -> str:
+        fmt = _FORMATS.get(self.kind)
+        if fmt is None:
+            return f"[{self.kind}] {self.actor} -> {self.target}: {self.amount}"
+        return fmt(self)
+
+
+_END_TEXT = {"party": ">>> Party wins!", "boss": ">>> Boss wins!", "draw": ">>> Draw (round limit)"}
+
+_FORMATS = {
+    "round_start": lambda e: f"[ROUND {e.round}] ---- start",
+    "round_end": lambda e: f"[ROUND {e.round}] ---- end",
+    "hit": lambda e: f"{e.actor} hits {e.target} for {e.amount}",
+    "crit": lambda e: f"{e.actor} crits! extra damage {e.amount}",
+    "skill": lambda e: f"{e.actor} uses {e.skill} on {e.target} for {e.amount}",
+    "heal": lambda e: f"{e.actor} heals {e.target} for {e.amount}",
+    "effect": lambda e: f"{e.actor} uses {e.skill} on {e.target}",
+    "item": lambda e: f"{e.actor} uses item {e.skill} on {e.target}",
+    "phase": lambda e: f"{e.actor} enters phase {e.amount}",
+    "tick": lambda e: f"{e.actor} effects ({e.skill}): {e.amount:+d} HP",
+    "wait": lambda e: f"{e.actor} waits...",
+    "idle": lambda e: f"{e.actor} does nothing (unknown action)",
+    "end": lambda e: _END_TEXT.get(e.actor, f">>> {e.actor}"),
+}
+
+
+class EventSink:
+    """
+    Базовый приёмник событий боя.
+    enabled=False означает, что бой не передаёт в приёмник ни одной записи.
+    """
+    enabled = True
+
+    def emit(self, event: BattleEvent) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class NullSink(EventSink):
+    """Логирование выключено."""
+    enabled = False
+
+    def emit(self, event: BattleEvent) -> None:
+        pass
+
+
+class StdoutSink(EventSink):
+    """
+    Построчный вывод в stdout (поведение по умолчанию, как раньше print).
+    Смена фазы и тики эффектов раньше не печатались — они выводятся только при verbose=True.
+    """
+    QUIET_KINDS = frozenset({"phase", "tick"})
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+
+    def emit(self, event: BattleEvent) -> None:
+        if self.verbose or event.kind not in self.QUIET_KINDS:
+            print(event)
+
+
+class RingBufferSink(EventSink):
+    """Кольцевой буфер в памяти: хранит последние capacity событий."""
+
+    def __init__(self, capacity: int = 1024):
+        self._buf: deque = deque(maxlen=int(capacity))
+
+    def emit(self, event: BattleEvent) -> None:
+        self._buf.append(event)
+
+    def events(self) -> List[BattleEvent]:
+        return list(self._buf)
+
+    def clear(self) -> None:
+        self._buf.clear()
+
+
+class BatchedFileSink(EventSink):
+    """
+    Пишет события в файл внутри log_dir пачками:
+    сброс на диск, когда накопилось max_events записей или прошло max_delay секунд.
+    """
+
+    def __init__(self, filename: str = "battle_log.txt", *, log_dir: str = "logs",
+                 max_events: int = 256, max_delay: float = 1.0, mode: str = "w"):
+        os.makedirs(log_dir, exist_ok=True)
+        self.path = os.path.join(log_dir, filename)
+        self.max_events = int(max_events)
+        self.max_delay = float(max_delay)
+        self._buf: List[BattleEvent] = []
+        self._file = open(self.path, mode, encoding="utf-8")
+        self._last_flush = time.monotonic()
+
+    def emit(self, event: BattleEvent) -> None:
+        self._buf.append(event)
+        if len(self._buf) >= self.max_events or time.monotonic() - self._last_flush >= self.max_delay:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buf:
+            self._file.write("".join(f"{e}\n" for e in self._buf))
+            self._buf.clear()
+            self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
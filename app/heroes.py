@@ -4,6 +4,8 @@ from .mixins import CritMixin
 
 class Warrior(CritMixin, Character):
     """Физический дамагер. Навык: power_strike (CD=2, MP=10)."""
+    __slots__ = ()
+
     def basic_attack(self, target: Character) -> int:
         dmg = 5 + self.str_ * 2
         target.hp = target.hp - dmg
@@ -26,6 +28,8 @@ class Warrior(CritMixin, Character):
 
 class Mage(CritMixin, Character):
     """Магический дамагер. Навык: fireball (CD=2, MP=12)."""
+    __slots__ = ()
+
     def basic_attack(self, target: Character) -> int:
         dmg = 3 + max(0, self.int_ // 2)
         target.hp = target.hp - dmg
@@ -48,6 +52,8 @@ class Mage(CritMixin, Character):
 
 class Healer(Character):
     """Поддержка. Навык: heal (CD=2, MP=10) — лечит союзника."""
+    __slots__ = ()
+
     def basic_attack(self, target: Character) -> int:
         dmg = 2 + max(0, self.int_ // 3)
         target.hp = target.hp - dmg
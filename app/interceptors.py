@@ -0,0 +1,25 @@
+from __future__ import annotations
+from typing import Any, Callable, Iterable, Tuple
+
+DamageHook = Callable[[Any, int], int]
+
+
+def compile_damage_chain(effects: Iterable[Any]) -> Tuple[DamageHook, ...]:
+    """
+    Собирает цепочку перехватчиков входящего урона из эффектов персонажа.
+
+    Перехватчик — любой эффект с методом on_damage(target, incoming) -> остаток урона.
+    Порядок: по атрибуту damage_priority (меньше — раньше, по умолчанию 0),
+    при равном приоритете — в порядке наложения эффектов.
+    Например, будущая броня/резисты с отрицательным приоритетом сработают раньше щитов.
+    Возвращает кортеж связанных методов; пустой кортеж — урон идёт сразу в HP.
+    """
+    entries = []
+    for i, eff in enumerate(effects):
+        on_damage = getattr(eff, "on_damage", None)
+        if callable(on_damage):
+            entries.append((getattr(eff, "damage_priority", 0), i, on_damage))
+    if not entries:
+        return ()
+    entries.sort(key=lambda x: (x[0], x[1]))
+    return tuple(fn for _, _, fn in entries)
@@ -14,6 +14,18 @@ class Item(ABC):
         """Возвращает человекочитаемое описание эффекта применения."""
         raise NotImplementedError
 
+    def _state_key(self) -> tuple:
+        """Канонический ключ предмета: класс и параметры (классы в параметрах — по имени)."""
+        return (type(self).__name__, tuple(sorted((k, _key_value(v)) for k, v in vars(self).items())))
+
+
+def _key_value(v):
+    if isinstance(v, type):
+        return v.__name__
+    if isinstance(v, (list, tuple)):
+        return tuple(_key_value(x) for x in v)
+    return v
+
 
 class Potion(Item):
     """Зелье лечения: восстанавливает фиксированное количество HP цели."""
@@ -86,6 +98,15 @@ class Inventory:
     def list(self) -> List[Item]:
         return list(self._items)
 
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def copy(self) -> "Inventory":
+        """Копия инвентаря (сами предметы неизменяемы и разделяются)."""
+        new = Inventory()
+        new._items = list(self._items)
+        return new
+
     def use(self, index: int, user: Character, target: Character) -> str:
         item = self.remove(index)
         return item.use(user, target)
@@ -1,7 +1,9 @@
 from contextlib import contextmanager
-import os
+from .events import BattleEvent
 
 class CritMixin:
+    __slots__ = ()
+
     def crit_chance(self) -> float:
         return 0.1
 
@@ -16,9 +18,13 @@ class LoggerMixin:
 
     @contextmanager
     def log_round(self, round_no: int):
-        os.makedirs(self.LOG_DIR, exist_ok=True)
-        print(f"[ROUND {round_no}] ---- start")
+        # пишем в приёмник событий (self.sink), если он есть и включён
+        sink = getattr(self, "sink", None)
+        enabled = sink is not None and sink.enabled
+        if enabled:
+            sink.emit(BattleEvent(round_no, None, None, "round_start"))
         try:
             yield
         finally:
-            print(f"[ROUND {round_no}] ---- end")
+            if enabled:
+                sink.emit(BattleEvent(round_no, None, None, "round_end"))
@@ -0,0 +1,183 @@
+from __future__ import annotations
+import math
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from .effects import Poison
+from .heroes import Warrior, Mage, Healer
+from .items import Potion, Ether, Antidote
+
+# навык героя: (skill_id, стоимость MP, по кому: "enemy" | "ally")
+HERO_SKILLS = {
+    Warrior: ("power_strike", 10, "enemy"),
+    Mage: ("fireball", 12, "enemy"),
+    Healer: ("heal", 10, "ally"),
+}
+
+
+def _item_targets(item, allies: List[Any]) -> List[Any]:
+    if isinstance(item, Potion):
+        return [a for a in allies if a.hp < a.max_hp]
+    if isinstance(item, Ether):
+        return [a for a in allies if a.mp < a.max_mp]
+    if isinstance(item, Antidote):
+        return [a for a in allies if any(isinstance(eff, tuple(item.removes)) for eff in a._effects)]
+    return allies
+
+
+def legal_actions(battle, hero) -> List[Tuple]:
+    """
+    Ключи допустимых действий героя в текущем состоянии:
+      ("basic",), ("skill", skill_id, позиция цели), ("item", индекс в инвентаре, позиция цели).
+    Позиция — индекс в battle._entities, поэтому ключ одинаково читается в любом форке боя.
+    Одинаковые предметы дают одно действие (первый по индексу).
+    """
+    pos = battle._entity_pos
+    allies = [h for h in battle.party if h.is_alive]
+    actions = [("basic",)]
+
+    skill = next((spec for cls, spec in HERO_SKILLS.items() if isinstance(hero, cls)), None)
+    if skill is not None:
+        skill_id, cost, side = skill
+        if hero.can_use(skill_id) and hero.mp >= cost:
+            targets = battle._living_side("boss") if side == "enemy" else allies
+            actions.extend(("skill", skill_id, pos[id(t)]) for t in targets)
+
+    if battle.inventory:
+        seen = set()
+        for index, item in enumerate(battle.inventory.list()):
+            sig = item._state_key()
+            if sig in seen:
+                continue
+            seen.add(sig)
+            actions.extend(("item", index, pos[id(t)]) for t in _item_targets(item, allies))
+    return actions
+
+
+def action_from_key(battle, key: Tuple) -> Dict[str, Any]:
+    """Действие в формате Battle по ключу из legal_actions()."""
+    if key[0] == "skill":
+        return {"type": "skill", "skill_id": key[1], "target": battle._entities[key[2]]}
+    if key[0] == "item":
+        return {"type": "item", "index": key[1], "target": battle._entities[key[2]]}
+    # базовая атака — по первому живому противнику, как у авто-логики
+    return {"type": "basic", "target": battle._living_side("boss")[0]}
+
+
+class _Node:
+    """Узел таблицы транспозиций: состояние, в котором ходит планируемый герой."""
+    __slots__ = ("actions", "visits", "edge_n", "edge_w", "terminal")
+
+    def __init__(self, actions: List[Tuple], terminal: float | None):
+        self.actions = actions
+        self.visits = 0
+        self.edge_n = [0] * len(actions)
+        self.edge_w = [0.0] * len(actions)
+        self.terminal = terminal
+
+    def select(self, c: float) -> int:
+        for i, n in enumerate(self.edge_n):
+            if n == 0:
+                return i
+        log_n = math.log(self.visits)
+        return max(range(len(self.actions)),
+                   key=lambda i: self.edge_w[i] / self.edge_n[i] + c * math.sqrt(log_n / self.edge_n[i]))
+
+
+_OUTCOME_VALUE = {"party": 1.0, "boss": 0.0, "draw": 0.5}
+
+
+class MCTSPlanner:
+    """
+    Планировщик героя на Monte Carlo Tree Search (UCT).
+
+    Узлы — состояния боя, в которых ходит этот герой; ключ — Battle.state_key(),
+    поэтому одинаковые состояния, достигнутые разными путями, делят статистику (таблица транспозиций),
+    а таблица живёт между ходами — поддерево текущего хода переиспользуется.
+    Остальные участники в симуляциях действуют как обычно (авто-логика, Strategy босса),
+    криты разыгрываются собственным ГСЧ планировщика, а не ГСЧ боя.
+    Бюджет на решение: iterations и/или time_budget (секунды), хотя бы одна итерация.
+    """
+
+    def __init__(self, *, iterations: int | None = 200, time_budget: float | None = None,
+                 exploration: float = 1.4, max_nodes: int = 100_000, seed: int | None = None):
+        if iterations is None and time_budget is None:
+            raise ValueError("Set iterations and/or time_budget")
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.rng = random.Random(seed)
+        self.table: Dict[tuple, _Node] = {}
+
+    def choose(self, battle, hero) -> Dict[str, Any]:
+        hero_pos = battle._hero_pos[id(hero)]
+        root = battle.fork()
+        root._planners = {}
+        root_key = root.state_key()
+        if len(self.table) > self.max_nodes:
+            self.table.clear()
+
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        done = 0
+        while True:
+            self._iterate(root, root_key, hero_pos)
+            done += 1
+            if self.iterations is not None and done >= self.iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        node = self.table[root_key]
+        best = max(range(len(node.actions)), key=lambda i: (node.edge_n[i], node.edge_w[i]))
+        return action_from_key(battle, node.actions[best])
+
+    # --------- одна итерация ---------
+    def _iterate(self, root, root_key: tuple, hero_pos: int):
+        sim = root.fork()
+        sim.rng = random.Random(self.rng.getrandbits(64))
+        key = root_key
+        path = []
+        while True:
+            node = self.table.get(key)
+            if node is None:
+                node = self._expand(sim, key, hero_pos)
+                value = node.terminal if node.terminal is not None else self._rollout(sim)
+                node.visits += 1
+                break
+            node.visits += 1
+            if node.terminal is not None:
+                value = node.terminal
+                break
+            i = node.select(self.exploration)
+            path.append((node, i))
+            sim.step(action_from_key(sim, node.actions[i]))
+            self._advance(sim, hero_pos)
+            key = sim.state_key()
+        for node, i in path:
+            node.edge_n[i] += 1
+            node.edge_w[i] += value
+
+    def _expand(self, sim, key: tuple, hero_pos: int) -> _Node:
+        if sim.result is not None:
+            node = _Node([], _OUTCOME_VALUE[sim.result])
+        else:
+            node = _Node(legal_actions(sim, sim.party[hero_pos]), None)
+        self.table[key] = node
+        return node
+
+    @staticmethod
+    def _advance(sim, hero_pos: int):
+        """Прокрутить бой до следующего хода героя (живого) или до конца."""
+        hero = sim.party[hero_pos]
+        while sim.result is None:
+            if sim.next_actor() is hero and hero.is_alive:
+                return
+            sim.step()
+
+    @staticmethod
+    def _rollout(sim) -> float:
+        for _ in sim.resume_events():
+            pass
+        return _OUTCOME_VALUE[sim.result]
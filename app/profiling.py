@@ -0,0 +1,111 @@
+from __future__ import annotations
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+_active: "BattleProfiler | None" = None
+
+
+def active_profiler() -> "BattleProfiler | None":
+    """Профайлер, включённый через profiling(); его получают бои, созданные внутри блока."""
+    return _active
+
+
+@contextmanager
+def profiling(profiler: "BattleProfiler | None" = None):
+    """
+    with profiling() as prof: ... — все бои, созданные внутри блока, пишут замеры в prof.
+    Блоки можно вкладывать: по выходе восстанавливается предыдущий профайлер.
+    """
+    global _active
+    prof = profiler if profiler is not None else BattleProfiler()
+    previous, _active = _active, prof
+    try:
+        yield prof
+    finally:
+        _active = previous
+
+
+class BattleProfiler:
+    """
+    Таймеры (perf_counter) и счётчики по стадиям боя. Стадия — путь, например
+    ("round", "phase"), ("round", "start_ticks"), ("turn", "Warrior", "execute"), ("round", "end_ticks").
+    У ходов второй элемент — класс актёра, отсюда разбивка по классам.
+    Время стадий-генераторов не включает время потребителя событий (sink и т.п.).
+    """
+
+    def __init__(self):
+        self._seconds: Dict[Tuple[str, ...], float] = {}
+        self._calls: Dict[Tuple[str, ...], int] = {}
+
+    def add(self, stack: Tuple[str, ...], seconds: float) -> None:
+        self._seconds[stack] = self._seconds.get(stack, 0.0) + seconds
+        self._calls[stack] = self._calls.get(stack, 0) + 1
+
+    def timer(self, stack: Tuple[str, ...]) -> "_Timer":
+        """with prof.timer(("round", "phase")): ... — замер обычной (не генераторной) стадии."""
+        return _Timer(self, stack)
+
+    def measure(self, stack: Tuple[str, ...], events: Iterable) -> Iterator:
+        """Обернуть генератор стадии: события собираются, замер закрывается до их выдачи."""
+        start = perf_counter()
+        collected = list(events)
+        self.add(stack, perf_counter() - start)
+        yield from collected
+
+    def clear(self) -> None:
+        self._seconds.clear()
+        self._calls.clear()
+
+    # --------- экспорт ---------
+    def as_dict(self) -> Dict[str, dict]:
+        """
+        {"stages": {"turn;Warrior;execute": {"seconds", "calls"}, ...},
+         "by_class": {"Warrior": {"execute": {"seconds", "calls"}, ...}},
+         "total_seconds": float}
+        """
+        stages = {}
+        by_class: Dict[str, dict] = {}
+        for stack in sorted(self._seconds):
+            entry = {"seconds": self._seconds[stack], "calls": self._calls[stack]}
+            stages[";".join(stack)] = entry
+            if stack[0] == "turn" and len(stack) == 3:
+                by_class.setdefault(stack[1], {})[stack[2]] = dict(entry)
+        return {"stages": stages, "by_class": by_class, "total_seconds": sum(self._seconds.values())}
+
+    def collapsed(self, root: str = "battle") -> str:
+        """Текст в формате collapsed stacks (flamegraph.pl, speedscope): "battle;turn;Mage;execute 1234" (мкс)."""
+        lines: List[str] = []
+        for stack in sorted(self._seconds):
+            micros = int(round(self._seconds[stack] * 1e6))
+            lines.append(f"{';'.join((root,) + stack)} {micros}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+class _Timer:
+    __slots__ = ("_prof", "_stack", "_start")
+
+    def __init__(self, prof: BattleProfiler, stack: Tuple[str, ...]):
+        self._prof = prof
+        self._stack = stack
+
+    def __enter__(self) -> None:
+        self._start = perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self._prof.add(self._stack, perf_counter() - self._start)
+
+
+class _NullProfiler:
+    """Профилирование выключено: timer() — пустой контекст, measure() отдаёт генератор как есть."""
+    __slots__ = ()
+    _nothing = nullcontext()
+
+    def timer(self, stack: Tuple[str, ...]):
+        return self._nothing
+
+    def measure(self, stack: Tuple[str, ...], events: Iterable) -> Iterable:
+        return events
+
+
+NULL_PROFILER = _NullProfiler()
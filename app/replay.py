@@ -0,0 +1,364 @@
+from __future__ import annotations
+import random
+import struct
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .battle import Battle
+from .events import BattleEvent, EventSink
+from .save_load import register_type, snapshot, restore
+
+# Журнал: MAGIC | версия (uint16) | записи, только дозапись. Запись — байт вида и поля по struct
+# (строки и снимки — с длиной впереди); снимки — save_load.snapshot, без pickle.
+MAGIC = b"PVBJ"
+VERSION = 2
+_HEADER = struct.Struct(">4sH")
+
+_START, _ACT, _DRAW, _BITS, _CKPT, _END = range(1, 7)
+_KINDS = {"start": _START, "act": _ACT, "draw": _DRAW, "bits": _BITS, "ckpt": _CKPT, "end": _END}
+_TAG = struct.Struct(">B")
+_DRAW_REC = struct.Struct(">Bd")                # вид, бросок random()
+_BITS_REC = struct.Struct(">BH")                # вид, k; дальше (k + 7) // 8 байт значения
+_ACT_REC = struct.Struct(">BIhhBB")             # вид, шаг, index, позиция цели, длины type и skill_id
+_START_REC = struct.Struct(">BI")               # вид, длина снимка
+_CKPT_REC = struct.Struct(">BIIQI")             # вид, раунд, шаг, бросков до него, длина снимка
+_END_REC = struct.Struct(">BIB")                # вид, шагов, длина результата
+_NONE = 255                                     # длина строки None
+
+
+def _text(value: str | None) -> bytes:
+    if value is None:
+        return b""
+    data = value.encode("utf-8")
+    if len(data) >= _NONE:
+        raise ValueError(f"String is too long for a journal record: {value!r}")
+    return data
+
+
+def _text_len(value: str | None, data: bytes) -> int:
+    return _NONE if value is None else len(data)
+
+
+def _take(view, pos: int, size: int) -> Tuple[bytes, int]:
+    if pos + size > len(view):
+        raise ValueError("Corrupt battle journal: truncated record")
+    return bytes(view[pos:pos + size]), pos + size
+
+
+def _read_text(view, pos: int, size: int) -> Tuple[str | None, int]:
+    if size == _NONE:
+        return None, pos
+    data, pos = _take(view, pos, size)
+    return data.decode("utf-8"), pos
+
+
+def _bits_size(k: int) -> int:
+    return max(1, (k + 7) // 8)
+
+
+def _encode_record(record: tuple) -> bytes:
+    kind = record[0]
+    if kind == "draw":
+        return _DRAW_REC.pack(_DRAW, record[1])
+    if kind == "bits":
+        k, value = record[1], record[2]
+        return _BITS_REC.pack(_BITS, k) + value.to_bytes(_bits_size(k), "big")
+    if kind == "act":
+        step, (action_type, skill_id, index, pos) = record[1], record[2]
+        type_data, skill_data = _text(action_type), _text(skill_id)
+        return _ACT_REC.pack(_ACT, step, -1 if index is None else index, pos, _text_len(action_type, type_data),
+                             _text_len(skill_id, skill_data)) + type_data + skill_data
+    if kind == "start":
+        return _START_REC.pack(_START, len(record[1])) + record[1]
+    if kind == "ckpt":
+        round_no, step, drawn, data = record[1:]
+        return _CKPT_REC.pack(_CKPT, round_no, step, drawn, len(data)) + data
+    if kind == "end":
+        result_data = _text(record[1])
+        return _END_REC.pack(_END, record[2], _text_len(record[1], result_data)) + result_data
+    raise ValueError(f"Unknown journal record: {kind!r}")
+
+
+def _decode_record(view, pos: int) -> Tuple[tuple, int]:
+    (tag,) = _TAG.unpack_from(view, pos)
+    if tag == _DRAW:
+        _, value = _DRAW_REC.unpack_from(view, pos)
+        return ("draw", value), pos + _DRAW_REC.size
+    if tag == _BITS:
+        _, k = _BITS_REC.unpack_from(view, pos)
+        data, pos = _take(view, pos + _BITS_REC.size, _bits_size(k))
+        return ("bits", k, int.from_bytes(data, "big")), pos
+    if tag == _ACT:
+        _, step, index, target, type_len, skill_len = _ACT_REC.unpack_from(view, pos)
+        action_type, pos = _read_text(view, pos + _ACT_REC.size, type_len)
+        skill_id, pos = _read_text(view, pos, skill_len)
+        return ("act", step, (action_type, skill_id, None if index < 0 else index, target)), pos
+    if tag == _START:
+        _, size = _START_REC.unpack_from(view, pos)
+        data, pos = _take(view, pos + _START_REC.size, size)
+        return ("start", data), pos
+    if tag == _CKPT:
+        _, round_no, step, drawn, size = _CKPT_REC.unpack_from(view, pos)
+        data, pos = _take(view, pos + _CKPT_REC.size, size)
+        return ("ckpt", round_no, step, drawn, data), pos
+    if tag == _END:
+        _, steps, result_len = _END_REC.unpack_from(view, pos)
+        result, pos = _read_text(view, pos + _END_REC.size, result_len)
+        return ("end", result, steps), pos
+    raise ValueError(f"Corrupt battle journal: unknown record kind {tag}")
+
+
+class Journal:
+    """
+    Журнал боя: стартовый снимок, выбранные действия, броски ГСЧ и периодические чекпоинты.
+    Записи:
+      ("start", снимок), ("act", шаг, действие), ("draw", float), ("bits", k, int),
+      ("ckpt", раунд, шаг, бросков до него, снимок), ("end", результат, шагов)
+    Бросок random() занимает 9 байт; чтение журнала не исполняет код (см. save_load.restore).
+    """
+
+    def __init__(self, data: bytes | None = None):
+        if data is None:
+            self._buf = bytearray(_HEADER.pack(MAGIC, VERSION))
+            return
+        if len(data) < _HEADER.size:
+            raise ValueError("Not a battle journal")
+        magic, version = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a battle journal")
+        if version != VERSION:
+            raise ValueError(f"Unsupported journal version: {version}")
+        self._buf = bytearray(data)
+
+    def append(self, record: tuple) -> None:
+        self._buf += _encode_record(record)
+
+    def records(self) -> Iterator[tuple]:
+        view = memoryview(self._buf)
+        pos = _HEADER.size
+        try:
+            while pos < len(view):
+                record, pos = _decode_record(view, pos)
+                yield record
+        except (struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Corrupt battle journal: {e}") from None
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._buf)
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self._buf)
+
+    @classmethod
+    def load(cls, path: str) -> "Journal":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+
+# --------- кодирование действий ---------
+def _position(battle: Battle, entity) -> int:
+    for i, e in enumerate(battle._entities):
+        if e is entity:
+            return i
+    return -1
+
+
+def encode_action(battle: Battle, action: Dict[str, Any]) -> tuple:
+    """Действие -> (type, skill_id, index, позиция цели в battle._entities или -1)."""
+    return (action.get("type", "basic"), action.get("skill_id"), action.get("index"),
+            _position(battle, action.get("target")))
+
+
+def decode_action(battle: Battle, code: tuple) -> Dict[str, Any]:
+    kind, skill_id, index, pos = code
+    action = {"type": kind, "skill_id": skill_id, "target": battle._entities[pos] if pos >= 0 else None}
+    if index is not None:
+        action["index"] = index
+    return action
+
+
+# --------- ГСЧ записи и воспроизведения ---------
+class _RecordingRng(random.Random):
+    """Обычный Random, который дописывает каждый бросок в журнал (копии в форках не пишут)."""
+    journal = None
+    count = 0
+
+    def random(self) -> float:
+        value = super().random()
+        if self.journal is not None:
+            self.journal.append(("draw", value))
+            self.count += 1
+        return value
+
+    def getrandbits(self, k: int) -> int:
+        value = super().getrandbits(k)
+        if self.journal is not None:
+            self.journal.append(("bits", k, value))
+            self.count += 1
+        return value
+
+    def __reduce__(self):
+        # в копиях — как обычный Random
+        return (random.Random, (), self.getstate())
+
+
+# в снимках (чекпоинты журнала) — тоже как обычный Random
+register_type(_RecordingRng, "Random")
+
+
+class _ReplayRng:
+    """Отдаёт броски из журнала по порядку."""
+
+    def __init__(self, draws: List[tuple], pos: int = 0):
+        self.draws = draws
+        self.pos = pos
+
+    def _next(self, kind: str) -> tuple:
+        if self.pos >= len(self.draws):
+            raise RuntimeError("Journal has no more RNG draws")
+        draw = self.draws[self.pos]
+        if draw[0] != kind:
+            raise RuntimeError(f"Journal expected {draw[0]!r} draw, got {kind!r}")
+        self.pos += 1
+        return draw
+
+    def random(self) -> float:
+        return self._next("draw")[1]
+
+    def getrandbits(self, k: int) -> int:
+        return self._next("bits")[2]
+
+    # для Battle.fork()
+    def getstate(self):
+        return (self.draws, self.pos)
+
+    def setstate(self, state):
+        self.draws, self.pos = state
+
+
+# --------- запись ---------
+class Recorder:
+    """
+    Прогон боя с записью журнала: пишутся только выбранные действия и броски ГСЧ
+    (плюс стартовый снимок и чекпоинт каждые checkpoint_every раундов для быстрой перемотки).
+    """
+
+    def __init__(self, battle: Battle, journal: Journal | None = None, *, checkpoint_every: int = 5):
+        self.battle = battle
+        self.journal = journal if journal is not None else Journal()
+        self.checkpoint_every = max(1, int(checkpoint_every))
+        self._step_no = 0
+
+    def _on_action(self, battle, actor, action):
+        self.journal.append(("act", self._step_no, encode_action(battle, action)))
+
+    def run(self, max_rounds: int = 20) -> Dict[str, Any]:
+        battle, journal = self.battle, self.journal
+        battle._start(max_rounds)
+        journal.append(("start", snapshot(battle)))
+        plain = battle.rng
+        rng = _RecordingRng()
+        rng.setstate(plain.getstate())
+        rng.journal = journal
+        battle.rng = rng
+        battle.subscribe_actions(self._on_action)
+        sink = battle.sink
+        self._step_no = 0
+        try:
+            while battle.result is None:
+                if self._step_no and not battle._in_round and battle.round_no % self.checkpoint_every == 0:
+                    journal.append(("ckpt", battle.round_no, self._step_no, rng.count, snapshot(battle)))
+                events = battle.step()
+                if sink.enabled:
+                    for event in events:
+                        sink.emit(event)
+                self._step_no += 1
+        finally:
+            battle.unsubscribe_actions(self._on_action)
+            plain.setstate(rng.getstate())
+            battle.rng = plain
+        journal.append(("end", battle.result, self._step_no))
+        sink.flush()
+        return {"result": battle.result}
+
+
+# --------- воспроизведение ---------
+class Playback:
+    """Бой, ведомый журналом: действия и броски берутся из записи, decide/стратегии не вызываются."""
+
+    def __init__(self, battle: Battle, actions: Dict[int, tuple], step_no: int, expected: str | None):
+        self.battle = battle
+        self.step_no = step_no
+        self._actions = actions
+        self._expected = expected
+
+    def step(self) -> List[BattleEvent]:
+        battle = self.battle
+        code = self._actions.get(self.step_no)
+        events = battle.step(decode_action(battle, code) if code is not None else None)
+        self.step_no += 1
+        if battle.result is not None and self._expected is not None and battle.result != self._expected:
+            raise RuntimeError(f"Replay diverged: journal says {self._expected!r}, got {battle.result!r}")
+        return events
+
+    def run(self) -> Dict[str, Any]:
+        sink = self.battle.sink
+        while self.battle.result is None:
+            events = self.step()
+            if sink.enabled:
+                for event in events:
+                    sink.emit(event)
+        sink.flush()
+        return {"result": self.battle.result}
+
+
+class Replayer:
+    """Разбор журнала и воспроизведение с любого раунда."""
+
+    def __init__(self, journal: Journal):
+        self._actions: Dict[int, tuple] = {}
+        self._draws: List[tuple] = []
+        self._checkpoints: List[Tuple[int, int, int, bytes]] = []
+        self._start: bytes | None = None
+        self.result = None
+        self.steps = None
+        for record in journal.records():
+            kind = record[0]
+            if kind == "act":
+                self._actions[record[1]] = record[2]
+            elif kind in ("draw", "bits"):
+                self._draws.append(record)
+            elif kind == "ckpt":
+                self._checkpoints.append(record[1:])
+            elif kind == "start":
+                self._start = record[1]
+            elif kind == "end":
+                self.result, self.steps = record[1], record[2]
+        if self._start is None:
+            raise ValueError("Journal has no start record")
+
+    def playback(self, round_no: int = 1, *, sink: EventSink | None = None) -> Playback:
+        """
+        Воспроизведение, остановленное перед началом раунда round_no:
+        восстанавливается ближайший чекпоинт не позже него, остаток доигрывается по журналу.
+        """
+        done = max(0, round_no - 1)
+        data, step_no, drawn = self._start, 0, 0
+        for ck_round, ck_step, ck_drawn, ck_data in self._checkpoints:
+            if ck_round <= done:
+                data, step_no, drawn = ck_data, ck_step, ck_drawn
+        battle = restore(data)
+        battle.rng = _ReplayRng(self._draws, drawn)
+        playback = Playback(battle, self._actions, step_no, self.result)
+        while battle.result is None and (battle._in_round or battle.round_no < done):
+            playback.step()
+        if sink is not None:
+            battle.sink = sink
+        return playback
+
+    def replay(self, *, sink: EventSink | None = None) -> Dict[str, Any]:
+        """Воспроизвести бой целиком (события — в sink)."""
+        return self.playback(1, sink=sink).run()
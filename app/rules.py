@@ -0,0 +1,242 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+from .targeting import SELECTORS, select
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "rules.json")
+
+SIDES = ("party", "boss")
+
+# сравнение атрибута с константой — отдельное замыкание на оператор (без вызова operator.*)
+_COMPARATORS = {
+    ">=": lambda attr, v: lambda battle, actor: getattr(actor, attr) >= v,
+    "<=": lambda attr, v: lambda battle, actor: getattr(actor, attr) <= v,
+    ">": lambda attr, v: lambda battle, actor: getattr(actor, attr) > v,
+    "<": lambda attr, v: lambda battle, actor: getattr(actor, attr) < v,
+    "==": lambda attr, v: lambda battle, actor: getattr(actor, attr) == v,
+    "!=": lambda attr, v: lambda battle, actor: getattr(actor, attr) != v,
+}
+_COMPARE = re.compile(r"^([A-Za-z_]\w*)\s*(>=|<=|==|!=|>|<)\s*(-?\d+(?:\.\d+)?)$")
+# короткие имена атрибутов в условиях
+_ALIASES = {"phase": "current_phase"}
+
+Predicate = Callable[[Any, Any], bool]
+Action = Callable[[Any, Any, Any], Dict[str, Any]]
+
+_WAIT = {"type": "wait", "skill_id": None, "target": None}
+
+
+# --------- факты боя (считаются боем инкрементально, правила только читают) ---------
+_FACTS: Dict[str, Predicate] = {
+    "silenced": lambda battle, actor: actor.is_silenced(),
+}
+# «ранен» — hp < int(max_hp * доля); доля задаётся в правилах: "injured_ally 0.5", "most_injured_ally 0.5"
+_INJURED = re.compile(r"^(injured_ally|most_injured_ally)\s+(0?\.\d+|1(?:\.0*)?)$")
+
+
+def _injured_fraction(text: str, name: str) -> float | None:
+    m = _INJURED.match(text)
+    return float(m[2]) if m and m[1] == name else None
+
+
+def _compile_condition(text: str, injured: set) -> Predicate:
+    """
+    Условие правила:
+      "can_use <skill>", "<атрибут> <оп> <число>" (оп: >= <= > < == !=; phase — фаза босса),
+      "injured_ally <доля>" (есть живой союзник с hp < доли max_hp), факт "silenced", "not <условие>".
+    injured собирает доли порогов ранения — бой ведёт по индексу раненых на каждую.
+    """
+    text = text.strip()
+    if text.startswith("not "):
+        inner = _compile_condition(text[4:], injured)
+        return lambda battle, actor: not inner(battle, actor)
+    if text.startswith("can_use "):
+        skill_id = text[len("can_use "):].strip()
+        return lambda battle, actor: actor.can_use(skill_id)
+    fraction = _injured_fraction(text, "injured_ally")
+    if fraction is not None:
+        injured.add(fraction)
+        return lambda battle, actor: bool(battle._injured[fraction])
+    fact = _FACTS.get(text)
+    if fact is not None:
+        return fact
+    m = _COMPARE.match(text)
+    if m:
+        value = float(m[3]) if "." in m[3] else int(m[3])
+        return _COMPARATORS[m[2]](_ALIASES.get(m[1], m[1]), value)
+    raise ValueError(f"Unknown rule condition: {text!r}")
+
+
+# --------- цели ---------
+def _target_enemy(battle, actor, opponents):
+    return opponents[0] if opponents else None
+
+
+def _target_self(battle, actor, opponents):
+    return actor
+
+
+def _target_most_injured_ally(fraction: float):
+    def pick(battle, actor, opponents):
+        injured = battle._injured[fraction]
+        if not injured:
+            return None
+        # при равном hp — первый по порядку в пати, как у min() по списку
+        return min(injured.values(), key=lambda x: (x[1].hp, x[0]))[1]
+    return pick
+
+
+_TARGETS = {"enemy": _target_enemy, "self": _target_self}
+
+
+def _compile_target(text: str, injured: set):
+    """
+    Цель: "enemy" (первый живой противник), "self",
+    "most_injured_ally <доля>" (для героев: меньше всех hp среди раненых), "opponent <селектор>".
+    """
+    text = text.strip()
+    fraction = _injured_fraction(text, "most_injured_ally")
+    if fraction is not None:
+        injured.add(fraction)
+        return _target_most_injured_ally(fraction)
+    if text.startswith("opponent "):
+        name = text[len("opponent "):].strip()
+        if name not in SELECTORS:
+            raise ValueError(f"Unknown target selector: {name!r}")
+        return lambda battle, actor, opponents: select(opponents, name)
+    try:
+        return _TARGETS[text]
+    except KeyError:
+        raise ValueError(f"Unknown rule target: {text!r}") from None
+
+
+def _compile_action(text: str, target: str | None, injured: set):
+    """Действие: "basic", "skill <id>" или "wait"; без живой цели — wait."""
+    parts = text.split()
+    if parts == ["wait"]:
+        return lambda battle, actor, opponents: dict(_WAIT)
+    target = (target or "enemy").strip()
+    if parts == ["basic"] and target == "enemy":
+        # самое частое действие — без промежуточного вызова селектора
+        return lambda battle, actor, opponents: {"type": "basic", "target": opponents[0]} if opponents \
+            else dict(_WAIT)
+    pick = _compile_target(target, injured)
+    if parts == ["basic"]:
+        def basic(battle, actor, opponents):
+            t = pick(battle, actor, opponents)
+            return {"type": "basic", "target": t} if t is not None else dict(_WAIT)
+        return basic
+    if len(parts) == 2 and parts[0] == "skill":
+        skill_id = parts[1]
+
+        def skill(battle, actor, opponents):
+            t = pick(battle, actor, opponents)
+            return {"type": "skill", "skill_id": skill_id, "target": t} if t is not None else dict(_WAIT)
+        return skill
+    raise ValueError(f"Unknown rule action: {text!r}")
+
+
+def _conjunction(predicates: List[Predicate]) -> Predicate:
+    first, *rest = predicates
+    if not rest:
+        return first
+    tail = _conjunction(rest)
+    return lambda battle, actor: first(battle, actor) and tail(battle, actor)
+
+
+def _chain(rules: List[Tuple[Predicate | None, Action]]) -> Action:
+    """Правила по порядку -> одна функция: первое сработавшее, иначе wait."""
+    if not rules:
+        return lambda battle, actor, opponents: dict(_WAIT)
+    (condition, action), rest = rules[0], rules[1:]
+    if condition is None:
+        return action
+    tail = _chain(rest)
+    return lambda battle, actor, opponents: action(battle, actor, opponents) if condition(battle, actor) \
+        else tail(battle, actor, opponents)
+
+
+def _compile_table(name: str, rules: List[Dict[str, Any]], injured: set) -> Action:
+    compiled = []
+    for i, rule in enumerate(rules):
+        try:
+            conditions = rule.get("if", [])
+            if isinstance(conditions, str):
+                conditions = [conditions]
+            predicates = [_compile_condition(c, injured) for c in conditions]
+            compiled.append((_conjunction(predicates) if predicates else None,
+                             _compile_action(rule["then"], rule.get("target"), injured)))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Bad rule #{i} for {name}: {e}") from None
+    return _chain(compiled)
+
+
+class RuleEngine:
+    """
+    Поведение как данные: {"party": {Класс: [правило, ...]}, "boss": {Класс: [...]}}.
+    Правило — {"if": [условия], "then": действие, "target": цель}; срабатывает первое,
+    у которого выполнены все условия (без подходящего — wait).
+    Правила класса компилируются один раз в цепочку замыканий (предикаты, селектор цели); таблица ищется
+    по MRO (по именам классов) и кэшируется по типу, поэтому новый класс героя или босса
+    добавляется строками в файле правил, без правок battle.py.
+    Для сторон/классов без таблицы бой ведёт себя как раньше (планировщик, Strategy босса).
+    """
+
+    def __init__(self, spec: Dict[str, Dict[str, List[Dict[str, Any]]]]):
+        unknown = set(spec) - set(SIDES)
+        if unknown:
+            raise ValueError(f"Unknown rule sections: {sorted(unknown)}")
+        self.spec = spec
+        # отпечаток правил для ключей кэша итогов (cache.scenario_key)
+        self.digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+        injured = set()
+        self._tables = {side: {name: _compile_table(name, rules, injured) for name, rules in spec.get(side, {}).items()}
+                        for side in SIDES}
+        # доли порогов «ранен» из условий и целей правил: бой ведёт индекс раненых на каждую
+        self.injured_fractions = tuple(sorted(injured))
+        self._dispatch: Dict[str, Dict[type, Action | None]] = {side: {} for side in SIDES}
+
+    def __reduce__(self):
+        # в снимках — исходные правила (замыкания не сериализуются); правила по умолчанию — общий объект
+        if self is _default:
+            return (default_rules, ())
+        return (RuleEngine, (self.spec,))
+
+    def table_for(self, side: str, actor) -> Action | None:
+        cache = self._dispatch[side]
+        cls = type(actor)
+        try:
+            return cache[cls]
+        except KeyError:
+            tables = self._tables[side]
+            table = next((tables[c.__name__] for c in cls.__mro__ if c.__name__ in tables), None)
+            cache[cls] = table
+            return table
+
+    def decide(self, battle, side: str, actor, opponents) -> Dict[str, Any] | None:
+        """Действие по таблице класса actor; None — для класса нет правил."""
+        try:
+            table = self._dispatch[side][type(actor)]
+        except KeyError:
+            table = self.table_for(side, actor)
+        return None if table is None else table(battle, actor, opponents)
+
+
+def load_rules(path: str) -> RuleEngine:
+    with open(path, encoding="utf-8") as f:
+        return RuleEngine(json.load(f))
+
+
+_default: RuleEngine | None = None
+
+
+def default_rules() -> RuleEngine:
+    """Правила из app/rules.json (загружаются и компилируются один раз на процесс)."""
+    global _default
+    if _default is None:
+        _default = load_rules(DEFAULT_RULES_PATH)
+    return _default
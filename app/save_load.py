@@ -0,0 +1,457 @@
+from __future__ import annotations
+import json
+import random
+import struct
+from typing import Any, Dict, List, Tuple
+
+from .battle import Battle
+from .boss import Boss, Strategy, Phase1Aggro, Phase2Poison, Phase3Enrage
+from .core import Character, _NO_COOLDOWNS
+from .effects import NO_EFFECTS, Effect, effect_list, Poison, Regen, Shield, Silence
+from .events import EventSink
+from .heroes import Warrior, Mage, Healer
+from .items import Inventory, Item, Potion, Ether, Antidote
+from .rules import RuleEngine, default_rules
+from .profiling import active_profiler
+from .scheduler import EffectScheduler
+from .turn import TurnOrder
+
+# Формат снимка: MAGIC | версия (uint16, big-endian) | таблица строк | поля боя в порядке _encode_battle,
+# упакованные struct (big-endian; строки — номерами в таблице, списки — с длиной впереди).
+# JSON — только экспорт для чтения человеком (to_dict). Версия 3 — двоичная упаковка полей;
+# снимки версий 1 (pickle) и 2 (JSON) не читаются.
+MAGIC = b"PVBS"
+VERSION = 3
+_HEADER = struct.Struct(">4sH")
+
+# --------- реестр типов ---------
+# Снимок называет классы по имени, а при загрузке берёт их только из реестра:
+# чтение снимка не импортирует модули и не исполняет код из данных.
+_TYPES: Dict[str, type] = {}
+_NAMES: Dict[type, str] = {}
+
+
+def register_type(cls: type, name: str | None = None) -> type:
+    """
+    Разрешить класс в снимках (свой герой, босс, эффект, стратегия, предмет или ГСЧ).
+    name — имя в снимке (по умолчанию имя класса); имя, уже занятое другим классом, работает
+    только на запись — так подкласс пишется как базовый (например, журнальный ГСЧ как Random).
+    """
+    name = name or cls.__name__
+    _NAMES[cls] = name
+    _TYPES.setdefault(name, cls)
+    return cls
+
+
+for _cls in (Warrior, Mage, Healer, Boss, Poison, Regen, Shield, Silence,
+             Phase1Aggro, Phase2Poison, Phase3Enrage, Potion, Ether, Antidote, random.Random):
+    register_type(_cls)
+
+
+def _name_of(obj_or_cls) -> str:
+    cls = obj_or_cls if isinstance(obj_or_cls, type) else type(obj_or_cls)
+    try:
+        return _NAMES[cls]
+    except KeyError:
+        raise ValueError(f"{cls.__name__} is not registered for snapshots (save_load.register_type)") from None
+
+
+def _lookup(name: str, base: type) -> type:
+    cls = _TYPES.get(name)
+    if cls is None or not issubclass(cls, base):
+        raise ValueError(f"Unknown {base.__name__} in snapshot: {name!r}")
+    return cls
+
+
+# --------- упаковка ---------
+_TABLE = struct.Struct(">HI")                    # число строк, длина блока строк (utf-8, через NUL)
+_U16 = struct.Struct(">H")
+_I64 = struct.Struct(">q")
+_F64 = struct.Struct(">d")
+_ENTITY = struct.Struct(">HHiiiiiii?HH")         # класс, имя, level..int_, turn, silenced, число кулдаунов, эффектов
+_COOLDOWN = struct.Struct(">Hi")                 # skill_id, ход готовности
+_BOSS = struct.Struct(">BB?B")                   # число порогов, фаза, phase_dirty, число стратегий
+_RECORD = struct.Struct(">HH")                   # класс, число полей
+_FIELD = struct.Struct(">HBq")                   # имя поля, вид значения, значение (int / bool / номер строки)
+_CURSOR = struct.Struct(">iiiiiiI?HH")           # max_rounds, round_no, qpos, clock, next_start, next_end,
+                                                 # turn_seq, in_round, длина очереди раунда, длина очереди ходов
+
+# виды значений (поля записей, состояние ГСЧ, правила): байт вида + данные
+_V_NONE, _V_FALSE, _V_TRUE, _V_INT, _V_STR, _V_BIG, _V_FLOAT, _V_TUPLE, _V_LIST, _V_DICT, _V_CLASS, _V_U32 = range(12)
+_INLINE = _V_STR       # виды до _V_STR включительно помещаются в поле записи целиком (_FIELD)
+_INT64 = range(-(1 << 63), 1 << 63)
+
+
+class _Writer:
+    __slots__ = ("parts", "strings")
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.strings: Dict[str, int] = {}
+
+    def pack(self, fmt: struct.Struct, *values) -> None:
+        self.parts.append(fmt.pack(*values))
+
+    def ref(self, text: str) -> int:
+        """Номер строки в таблице снимка (каждая строка хранится один раз)."""
+        index = self.strings.get(text)
+        if index is None:
+            if "\0" in text:
+                raise ValueError(f"Can't store a string with NUL in a snapshot: {text!r}")
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def _inline(self, v: Any) -> Tuple[int, int] | None:
+        # (вид, значение) для скаляров, которые помещаются в 8 байт поля
+        if v is None or v is False or v is True:
+            return (_V_NONE if v is None else _V_TRUE if v else _V_FALSE), 0
+        if type(v) is int and v in _INT64:
+            return _V_INT, v
+        if type(v) is str:
+            return _V_STR, self.ref(v)
+        return None
+
+    def value(self, v: Any) -> None:
+        """Значение: скаляры, кортежи, списки, словари со строковыми ключами и классы из реестра."""
+        parts = self.parts
+        inline = self._inline(v)
+        if inline is not None:
+            parts.append(bytes((inline[0],)) + _I64.pack(inline[1]))
+        elif type(v) is int:
+            data = v.to_bytes((v.bit_length() + 8) // 8, "big", signed=True)
+            parts.append(bytes((_V_BIG,)) + _U16.pack(len(data)) + data)
+        elif type(v) is float:
+            parts.append(bytes((_V_FLOAT,)) + _F64.pack(v))
+        elif type(v) is tuple and len(v) >= 16 and set(map(type, v)) == {int} and 0 <= min(v) and max(v) < 1 << 32:
+            # длинные кортежи uint32 (состояние Mersenne Twister) — одним блоком
+            parts.append(bytes((_V_U32,)) + _U16.pack(len(v)) + struct.pack(f">{len(v)}I", *v))
+        elif type(v) in (tuple, list):
+            parts.append(bytes((_V_TUPLE if type(v) is tuple else _V_LIST,)) + _U16.pack(len(v)))
+            for x in v:
+                self.value(x)
+        elif type(v) is dict and all(type(k) is str for k in v):
+            parts.append(bytes((_V_DICT,)) + _U16.pack(len(v)))
+            self.fields(v)
+        elif isinstance(v, type):
+            parts.append(bytes((_V_CLASS,)) + _U16.pack(self.ref(_name_of(v))))
+        else:
+            raise ValueError(f"Can't store {type(v).__name__} in a snapshot")
+
+    def fields(self, fields: Dict[str, Any]) -> None:
+        """Поля словаря (число полей пишет вызывающий): по _FIELD на поле, значения сложнее скаляров — следом."""
+        for name, v in fields.items():
+            inline = self._inline(v)
+            if inline is None:
+                self.parts.append(_FIELD.pack(self.ref(name), _V_BIG, 0))
+                self.value(v)
+            else:
+                self.parts.append(_FIELD.pack(self.ref(name), *inline))
+
+    def getvalue(self, header: bytes) -> bytes:
+        blob = "\0".join(self.strings).encode("utf-8")
+        return b"".join([header, _TABLE.pack(len(self.strings), len(blob)), blob, *self.parts])
+
+
+class _Reader:
+    __slots__ = ("data", "pos", "strings")
+
+    def __init__(self, data: bytes, pos: int):
+        self.data = data
+        count, size = _TABLE.unpack_from(data, pos)
+        pos += _TABLE.size
+        self.strings = str(data[pos:pos + size], "utf-8").split("\0") if count else []
+        if len(self.strings) != count:
+            raise ValueError("Corrupt battle snapshot: bad string table")
+        self.pos = pos + size
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def array(self, code: str, n: int) -> tuple:
+        fmt = f">{n}{code}"
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values
+
+    def _scalar(self, kind: int, payload: int) -> Any:
+        if kind == _V_INT:
+            return payload
+        if kind == _V_STR:
+            return self.strings[payload]
+        return (None, False, True)[kind]
+
+    def value(self) -> Any:
+        kind = self.data[self.pos]
+        self.pos += 1
+        if kind <= _INLINE:
+            return self._scalar(kind, self.unpack(_I64)[0])
+        if kind == _V_BIG:
+            (size,) = self.unpack(_U16)
+            data = self.data[self.pos:self.pos + size]
+            self.pos += size
+            return int.from_bytes(data, "big", signed=True)
+        if kind == _V_FLOAT:
+            return self.unpack(_F64)[0]
+        if kind == _V_U32:
+            return self.array("I", self.unpack(_U16)[0])
+        if kind == _V_TUPLE:
+            return tuple(self.value() for _ in range(self.unpack(_U16)[0]))
+        if kind == _V_LIST:
+            return [self.value() for _ in range(self.unpack(_U16)[0])]
+        if kind == _V_DICT:
+            return self.fields(self.unpack(_U16)[0])
+        if kind == _V_CLASS:
+            return _lookup(self.strings[self.unpack(_U16)[0]], object)
+        raise ValueError(f"Corrupt battle snapshot: unknown value kind {kind}")
+
+    def fields(self, count: int) -> Dict[str, Any]:
+        fields = {}
+        strings = self.strings
+        for _ in range(count):
+            name, kind, payload = self.unpack(_FIELD)
+            fields[strings[name]] = self.value() if kind > _INLINE else self._scalar(kind, payload)
+        return fields
+
+
+def _encode_record(w: _Writer, obj) -> None:
+    # эффекты, предметы и стратегии — плоские записи: класс + его поля
+    fields = vars(obj)
+    w.pack(_RECORD, w.ref(_name_of(obj)), len(fields))
+    w.fields(fields)
+
+
+def _decode_record(r: _Reader, base: type):
+    name, count = r.unpack(_RECORD)
+    cls = _lookup(r.strings[name], base)
+    obj = cls.__new__(cls)
+    obj.__dict__.update(r.fields(count))
+    return obj
+
+
+# --------- персонажи ---------
+def _encode_entity(w: _Writer, e) -> None:
+    w.pack(_ENTITY, w.ref(_name_of(e)), w.ref(e.name), e._level, e._hp, e._mp, e._str_, e._agi, e._int_,
+           e._turn, e._silenced, len(e._ready_at), len(e._effects))
+    for skill_id, ready in e._ready_at.items():
+        w.pack(_COOLDOWN, w.ref(skill_id), ready)
+    for eff in e._effects:
+        _encode_record(w, eff)
+    if isinstance(e, Boss):
+        w.pack(_BOSS, len(e.thresholds), e.current_phase, e._phase_dirty, len(e.strategies))
+        w.parts.append(struct.pack(f">{len(e.thresholds)}d", *e.thresholds))
+        for strategy in e.strategies:
+            _encode_record(w, strategy)
+
+
+def _decode_entity(r: _Reader):
+    strings = r.strings
+    cls_name, name, level, hp, mp, str_, agi, int_, turn, silenced, n_ready, n_effects = r.unpack(_ENTITY)
+    cls = _lookup(strings[cls_name], Character)
+    e = cls.__new__(cls)
+    for slot, value in cls._TRANSIENT.items():
+        object.__setattr__(e, slot, value)
+    # сырые значения в слоты (без клампов дескрипторов), максимумы — пересчётом
+    e.name = strings[name]
+    e._level, e._hp, e._mp, e._str_, e._agi, e._int_ = level, hp, mp, str_, agi, int_
+    e._refresh_limits()
+    e._turn = turn
+    e._silenced = silenced
+    ready_at = {}
+    for _ in range(n_ready):
+        skill_id, ready = r.unpack(_COOLDOWN)
+        ready_at[strings[skill_id]] = ready
+    e._ready_at = ready_at or _NO_COOLDOWNS
+    if n_effects:
+        e._effects = effect_list([_decode_record(r, Effect) for _ in range(n_effects)], e)
+        e._effects_changed()
+    else:
+        e._effects = NO_EFFECTS
+    if isinstance(e, Boss):
+        n_thresholds, phase, phase_dirty, n_strategies = r.unpack(_BOSS)
+        thresholds = r.array("d", n_thresholds)
+        e.strategies = [_decode_record(r, Strategy) for _ in range(n_strategies)]
+        e.thresholds = thresholds
+        e.current_phase = phase
+        e._phase_dirty = phase_dirty
+        e.subscribe(e._on_stat_change)
+    return e
+
+
+# --------- бой ---------
+def _encode_battle(w: _Writer, battle: Battle) -> None:
+    pos = {id(e): i for i, e in enumerate(battle._entities)}
+    order = battle.turn_order
+    w.pack(_CURSOR, battle.max_rounds, battle.round_no, battle._qpos, battle.clock, battle.effects.next_start,
+           battle.effects.next_end, order._seq, battle._in_round, len(battle._queue), len(order._items))
+    w.value(battle.result)
+    w.value(len(battle.party))
+    w.value(len(battle.enemies))
+    for e in battle._entities:
+        _encode_entity(w, e)
+    w.value(_name_of(battle.rng))
+    w.value(battle.rng.getstate())
+    items = None if battle.inventory is None else battle.inventory.list()
+    w.value(None if items is None else len(items))
+    for item in items or ():
+        _encode_record(w, item)
+    w.value(None if battle.rules is default_rules() else battle.rules.spec)
+    queue = [pos[id(e)] for e in battle._queue]
+    turn_order = [pos[id(e)] for e in order._items] + [key[2] for key in order._keys]
+    w.parts.append(struct.pack(f">{len(queue)}H{len(order._items)}H{len(order._items)}I", *queue, *turn_order))
+
+
+def _decode_battle(r: _Reader) -> Battle:
+    max_rounds, round_no, qpos, clock, next_start, next_end, turn_seq, in_round, n_queue, n_order = \
+        r.unpack(_CURSOR)
+    result = r.value()
+    n_party, n_enemies = r.value(), r.value()
+    party = [_decode_entity(r) for _ in range(n_party)]
+    enemies = [_decode_entity(r) for _ in range(n_enemies)]
+    rng_cls = _lookup(r.value(), random.Random)
+    rng = rng_cls.__new__(rng_cls)
+    rng.setstate(r.value())
+    inventory = None
+    n_items = r.value()
+    if n_items is not None:
+        inventory = Inventory()
+        for _ in range(n_items):
+            inventory.add(_decode_record(r, Item))
+    spec = r.value()
+    rules = default_rules() if spec is None else RuleEngine(spec)
+    positions = r.array("H", n_queue + n_order)
+    seqs = r.array("I", n_order)
+    if r.pos != len(r.data):
+        raise ValueError("Corrupt battle snapshot: trailing data")
+
+    # состояние — как у Battle.__getstate__ (тот же протокол, что у pickle/copy): очередь ходов
+    # и колесо эффектов строятся один раз прямо из снимка, индексы сторон и раненых — в _attach
+    entities = party + enemies
+    order = [entities[i] for i in positions[n_queue:]]
+    turn_order = TurnOrder.__new__(TurnOrder)
+    turn_order.__setstate__({"keys": [TurnOrder._sort_key(e, seq) for e, seq in zip(order, seqs)],
+                             "items": order, "seq": turn_seq})
+    battle = Battle.__new__(Battle)
+    battle.__setstate__({
+        "party": party, "enemies": enemies, "boss": enemies[0], "rng": rng, "inventory": inventory,
+        "rules": rules, "_entities": entities, "turn_order": turn_order, "clock": clock,
+        "effects": EffectScheduler(entities, next_start=next_start, next_end=next_end),
+        "max_rounds": max_rounds, "round_no": round_no, "result": result, "_in_round": in_round,
+        "_queue": [entities[i] for i in positions[:n_queue]], "_qpos": qpos,
+        "_mid_step": False, "_deciding": False, "_quiet": False, "_attached": True,
+    })
+    battle.profiler = active_profiler()
+    return battle
+
+
+def snapshot(battle: Battle) -> bytes:
+    """
+    Бинарный снимок полного состояния боя: герои и противники (статы, фаза, пороги, стратегии),
+    эффекты с длительностями и ёмкостью щитов, кулдауны, состояние ГСЧ, инвентарь, правила и позиция цикла.
+    Снимать можно между шагами (step()/run()), не посреди прочитанного наполовину шага.
+    Классы персонажей, эффектов, стратегий, предметов и ГСЧ должны быть в реестре (register_type);
+    собственное состояние подклассов сверх перечисленных полей не сохраняется.
+    """
+    if battle._mid_step:
+        raise RuntimeError("Battle is paused in the middle of a step")
+    battle.effects.sync()
+    w = _Writer()
+    _encode_battle(w, battle)
+    return w.getvalue(_HEADER.pack(MAGIC, VERSION))
+
+
+def restore(data: bytes, *, sink: EventSink | None = None) -> Battle:
+    """
+    Восстановить бой из snapshot(). Каждый вызов даёт независимую копию —
+    из одного снимка можно развести сколько угодно веток.
+    Приёмник событий не сохраняется: по умолчанию NullSink.
+    Снимок — данные, а не код: классы берутся только из реестра, испорченный или чужой снимок
+    даёт ValueError. Проверки правдоподобия статов нет — загружайте снимки из доверенных источников.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Not a battle snapshot")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a battle snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+    try:
+        battle = _decode_battle(_Reader(data, _HEADER.size))
+    except (KeyError, TypeError, IndexError, UnicodeDecodeError, struct.error) as e:
+        raise ValueError(f"Corrupt battle snapshot: {e!r}") from None
+    if sink is not None:
+        battle.sink = sink
+    return battle
+
+
+def save(battle: Battle, path: str) -> None:
+    """Записать снимок боя в файл (например, чекпоинт долгого прогона)."""
+    with open(path, "wb") as f:
+        f.write(snapshot(battle))
+
+
+def load(path: str, *, sink: EventSink | None = None) -> Battle:
+    """Прочитать бой из файла, записанного save()."""
+    with open(path, "rb") as f:
+        return restore(f.read(), sink=sink)
+
+
+# --------- JSON (только экспорт, для чтения человеком) ---------
+def _json_value(v: Any) -> Any:
+    if isinstance(v, type):
+        return v.__name__
+    if isinstance(v, (list, tuple)):
+        return [_json_value(x) for x in v]
+    return v
+
+
+def _record_to_dict(obj) -> Dict[str, Any]:
+    # эффект или предмет: тип + скалярные поля (классы — по имени, например Antidote.removes)
+    data = {"type": type(obj).__name__}
+    data.update({k: _json_value(v) for k, v in vars(obj).items()
+                 if isinstance(v, (int, float, str, bool, type, list, tuple))})
+    return data
+
+
+def _entity_to_dict(e) -> Dict[str, Any]:
+    data = {
+        "class": type(e).__name__,
+        "name": e.name,
+        "level": e.level,
+        "hp": e.hp,
+        "mp": e.mp,
+        "str_": e.str_,
+        "agi": e.agi,
+        "int_": e.int_,
+        "cooldowns": e._cooldowns,
+        "effects": [_record_to_dict(eff) for eff in e._effects],
+    }
+    if hasattr(e, "current_phase"):
+        data["phase"] = e.current_phase
+        data["thresholds"] = list(e.thresholds)
+    return data
+
+
+def to_dict(battle: Battle) -> Dict[str, Any]:
+    """Состояние боя в виде JSON-совместимого словаря."""
+    battle.effects.sync()
+    data = {
+        "version": VERSION,
+        "round": battle.round_no,
+        "max_rounds": battle.max_rounds,
+        "result": battle.result,
+        "party": [_entity_to_dict(h) for h in battle.party],
+        "boss": _entity_to_dict(battle.boss),
+    }
+    if len(battle.enemies) > 1:
+        data["enemies"] = [_entity_to_dict(e) for e in battle.enemies]
+    if battle.inventory is not None:
+        # общий инвентарь пати — на уровне боя
+        data["inventory"] = [_record_to_dict(item) for item in battle.inventory.list()]
+    return data
+
+
+def export_json(battle: Battle, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_dict(battle), f, ensure_ascii=False, indent=2)
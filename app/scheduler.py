@@ -0,0 +1,213 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+from .effects import Effect
+
+START, END = "start", "end"
+
+
+def _has_work(eff: Any, hook: str) -> bool:
+    """Есть ли у эффекта настоящая работа в хуке (а не базовый no-op / отсчёт длительности)."""
+    fn = getattr(type(eff), hook, None)
+    if fn is None:
+        return hasattr(eff, hook)
+    return fn is not getattr(Effect, hook)
+
+
+class EffectScheduler:
+    """
+    Планировщик эффектов уровня боя — колесо времени по (раунд, фаза).
+
+    Вместо обхода всех эффектов всех персонажей дважды за раунд срабатывают только те, у кого есть работа:
+      - эффекты с собственным on_turn_start / on_turn_end — каждый раунд в своей фазе;
+      - «чистые таймеры» (базовый Effect.on_turn_end, например Silence) — один раз, в конце раунда истечения;
+        их duration между срабатываниями не трогается (актуализирует sync(); бой вызывает его и по окончании).
+    Смерть владельца замораживает эффекты (freeze), воскрешение — размораживает (thaw), как и раньше:
+    эффекты мёртвых не тикают.
+    Порядок внутри фазы — как у Character.tick_effects: по персонажам в порядке боя,
+    у персонажа — в порядке наложения; истечение — после хуков. Снятие эффекта — O(1) в EffectList,
+    а записи уже снятых эффектов (Antidote) просто пропускаются при срабатывании.
+    """
+
+    def __init__(self, entities: List[Any], size: int = 64, *, next_start: int = 1, next_end: int = 1):
+        self.size = size
+        # ячейка колеса (раунд % size) -> записи; храним только непустые ячейки
+        self._wheel = {START: {}, END: {}}
+        self._owner_pos = {id(e): i for i, e in enumerate(entities)}
+        # id(owner) -> {id(eff): (раунд истечения, eff)} для «чистых таймеров»
+        self._countdowns: Dict[int, Dict[int, Tuple[int, Any]]] = {}
+        self._owners = {id(e): e for e in entities}
+        self.next_start = next_start   # раунд, чей старт-тик будет следующим
+        self.next_end = next_end       # раунд, чей энд-тик будет следующим
+        for e in entities:
+            for eff in e._effects:
+                self.register(e, eff)
+
+    # --------- регистрация ---------
+    def _push(self, phase: str, rnd: int, owner, eff, recurring: bool):
+        slots = self._wheel[phase]
+        slot = rnd % self.size
+        bucket = slots.get(slot)
+        if bucket is None:
+            slots[slot] = [(rnd, owner, eff, recurring)]
+        else:
+            bucket.append((rnd, owner, eff, recurring))
+
+    def register(self, owner, eff):
+        self._owners.setdefault(id(owner), owner)
+        if self._expire_soon(owner, eff):
+            return
+        if _has_work(eff, "on_turn_start"):
+            self._push(START, self.next_start, owner, eff, True)
+        if _has_work(eff, "on_turn_end"):
+            self._push(END, self.next_end, owner, eff, True)
+        elif owner.is_alive:
+            # таймеры мёртвых заморожены до воскрешения (thaw)
+            self._register_countdown(owner, eff)
+
+    def _expire_soon(self, owner, eff) -> bool:
+        duration = getattr(eff, "duration", None)
+        if duration is None or duration > 0:
+            return False
+        # уже истёк — снимется на ближайшем тике (с вызовом хука этой фазы)
+        if self.next_end < self.next_start:
+            self._push(END, self.next_end, owner, eff, False)
+        else:
+            self._push(START, self.next_start, owner, eff, False)
+        return True
+
+    def _register_countdown(self, owner, eff):
+        duration = getattr(eff, "duration", None)
+        if duration is None or not hasattr(eff, "on_turn_end"):
+            return
+        due = self.next_end + duration - 1
+        self._countdowns.setdefault(id(owner), {})[id(eff)] = (due, eff)
+        self._push(END, due, owner, eff, False)
+
+    def _countdown_due(self, owner, eff):
+        rec = self._countdowns.get(id(owner), {}).get(id(eff))
+        return None if rec is None else rec[0]
+
+    def freeze(self, owner):
+        """Владелец умер: таймеры останавливаются с текущим остатком."""
+        for due, eff in self._countdowns.pop(id(owner), {}).values():
+            if eff in owner._effects:
+                eff.duration = due - self.next_end + 1
+
+    def thaw(self, owner):
+        """Владелец ожил: таймеры продолжают отсчёт с замороженного остатка."""
+        for eff in owner._effects:
+            if _has_work(eff, "on_turn_end") or self._countdown_due(owner, eff) is not None:
+                continue
+            if not self._expire_soon(owner, eff):
+                self._register_countdown(owner, eff)
+
+    # --------- сохранение ---------
+    def __getstate__(self):
+        # словари по id() при загрузке недействительны — сохраняем сами объекты
+        state = dict(self.__dict__)
+        state["_owner_pos"] = [(self._owners[k], pos) for k, pos in self._owner_pos.items()]
+        state["_owners"] = list(self._owners.values())
+        state["_countdowns"] = [(self._owners[k], list(recs.values())) for k, recs in self._countdowns.items()]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._owner_pos = {id(owner): pos for owner, pos in state["_owner_pos"]}
+        self._owners = {id(owner): owner for owner in state["_owners"]}
+        self._countdowns = {id(owner): {id(eff): (due, eff) for due, eff in recs}
+                            for owner, recs in state["_countdowns"]}
+
+    def clone(self, memo: dict) -> "EffectScheduler":
+        """Копия для форка боя: записи колеса переводятся на новых владельцев и эффекты по memo."""
+        new = EffectScheduler.__new__(EffectScheduler)
+        new.size = self.size
+        new.next_start = self.next_start
+        new.next_end = self.next_end
+        remap = memo.get
+        new._wheel = {
+            phase: {slot: [(rnd, remap(id(o), o), remap(id(eff), eff), rec) for rnd, o, eff, rec in bucket]
+                    for slot, bucket in slots.items()}
+            for phase, slots in self._wheel.items()
+        }
+        owners = {k: remap(k, o) for k, o in self._owners.items()}
+        new._owners = {id(o): o for o in owners.values()}
+        new._owner_pos = {id(owners[k]): pos for k, pos in self._owner_pos.items()}
+        new._countdowns = {
+            id(owners[k]): {id(remap(ek, eff)): (due, remap(ek, eff)) for ek, (due, eff) in recs.items()}
+            for k, recs in self._countdowns.items()
+        }
+        return new
+
+    # --------- срабатывание ---------
+    def fire(self, phase: str, rnd: int) -> List[Tuple[Any, int]]:
+        """
+        Тик фазы phase раунда rnd. Возвращает [(owner, hp до тика)] для затронутых персонажей
+        в порядке боя.
+        """
+        bucket = self._wheel[phase].pop(rnd % self.size, ())
+        due, later = [], []
+        for entry in bucket:
+            (due if entry[0] == rnd else later).append(entry)
+        if later:
+            self._wheel[phase][rnd % self.size] = later
+        if phase == START:
+            self.next_start = rnd + 1
+        else:
+            self.next_end = rnd + 1
+        if not due:
+            return []
+
+        live = []
+        for entry in due:
+            _, owner, eff, recurring = entry
+            if eff not in owner._effects:
+                continue
+            countdown = not recurring and phase == END and not _has_work(eff, "on_turn_end") \
+                and getattr(eff, "duration", 0) > 0
+            if countdown and self._countdown_due(owner, eff) != rnd:
+                continue  # запись устарела (заморозка или перерегистрация)
+            if not owner.is_alive:
+                # мёртвые не тикают
+                if countdown:
+                    self.freeze(owner)
+                else:
+                    self._push(phase, rnd + 1, owner, eff, recurring)
+                continue
+            live.append((self._owner_pos[id(owner)], owner._effects.position(eff), owner, eff, recurring))
+        live.sort(key=lambda x: (x[0], x[1]))
+
+        touched = []
+        expired = []
+        hook = "on_turn_start" if phase == START else "on_turn_end"
+        for _, _, owner, eff, recurring in live:
+            if not touched or touched[-1][0] is not owner:
+                touched.append((owner, owner.hp))
+            if recurring or _has_work(eff, hook):
+                getattr(eff, hook)(owner)
+            else:
+                # чистый таймер: все пропущенные тики уже «прошли»
+                eff.duration = 0
+            if getattr(eff, "duration", None) is not None and eff.duration <= 0:
+                expired.append((owner, eff))
+            elif recurring:
+                self._push(phase, rnd + 1, owner, eff, True)
+
+        for owner, eff in expired:
+            self._countdowns.get(id(owner), {}).pop(id(eff), None)
+            if eff not in owner._effects:
+                continue  # уже снят (второй записью того же эффекта)
+            on_expire = getattr(eff, "on_expire", None)
+            if callable(on_expire):
+                on_expire(owner)
+            owner._effects.remove(eff)
+        return touched
+
+    def sync(self):
+        """Записать в duration «чистых таймеров» фактический остаток."""
+        for owner_id, records in self._countdowns.items():
+            owner = self._owners[owner_id]
+            for key, (due, eff) in list(records.items()):
+                if eff not in owner._effects:
+                    del records[key]
+                    continue
+                eff.duration = due - self.next_end + 1
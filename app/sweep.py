@@ -0,0 +1,124 @@
+from __future__ import annotations
+import copy
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .battle import Battle, battle_rng
+from .boss import Boss
+from .events import NullSink
+from .heroes import Warrior, Mage, Healer
+
+HERO_CLASSES = {"Warrior": Warrior, "Mage": Mage, "Healer": Healer}
+
+
+def _is_axis(arg: str, value: Any) -> bool:
+    # thresholds — сам по себе кортеж, поэтому осью считается только список кортежей
+    if arg == "thresholds":
+        return isinstance(value, list)
+    return isinstance(value, (list, tuple, range))
+
+
+def expand_grid(spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Развернуть спецификацию сетки в точки.
+
+    spec = {
+        "party": [{"class": "Warrior", "name": "Warrior", "level": 1, "hp": [0, 80, 200], "str_": range(5, 8), ...}, ...],
+        "boss": {"name": "Dragon", "level": [3, 4], "str_": 8, "thresholds": [(0.7, 0.3), (0.6, 0.3)]},
+    }
+    Значение-список/range — ось сетки, скаляр — фиксированный аргумент конструктора.
+    Каждая точка: {"point": {"party.0.hp": 80, "boss.level": 3, ...}, "party": [kwargs...], "boss": kwargs}.
+    """
+    members = [("party", i, dict(h)) for i, h in enumerate(spec["party"])] + [("boss", None, dict(spec["boss"]))]
+    axes = []
+    for side, i, args in members:
+        for arg, value in args.items():
+            if arg not in ("class", "name") and _is_axis(arg, value):
+                axes.append((side, i, arg, list(value)))
+    for combo in itertools.product(*(values for *_, values in axes)):
+        point = {}
+        party = [dict(args) for side, _, args in members if side == "party"]
+        boss = dict(members[-1][2])
+        for (side, i, arg, _), value in zip(axes, combo):
+            if side == "party":
+                party[i][arg] = value
+                point[f"party.{i}.{arg}"] = value
+            else:
+                boss[arg] = value
+                point[f"boss.{arg}"] = value
+        yield {"point": point, "party": party, "boss": boss}
+
+
+def build(config: Dict[str, Any]) -> Tuple[List[Any], Boss]:
+    """Создать (party, boss) по точке сетки."""
+    party = []
+    for i, args in enumerate(config["party"]):
+        args = dict(args)
+        cls = args.pop("class")
+        cls = HERO_CLASSES[cls] if isinstance(cls, str) else cls
+        name = args.pop("name", f"{cls.__name__}{i}")
+        party.append(cls(name, **args))
+    args = dict(config["boss"])
+    name = args.pop("name", "Boss")
+    return party, Boss(name, **args)
+
+
+def canonical_key(party: List[Any], boss: Boss) -> tuple:
+    """
+    Ключ фактического стартового состояния: после клампов BoundedStat (hp=0 -> max_hp, hp > max_hp -> max_hp,
+    level/статы не ниже минимума) и с порогами фаз в виде целочисленных границ hp.
+    Точки с равным ключом ведут себя одинаково — их достаточно прогнать один раз.
+    """
+    return (tuple(h._state_key() for h in party), boss._state_key(), boss._phase_bounds)
+
+
+def _run_shard(shard: List[Tuple[int, List[Any], Boss]], battles: int, master_seed: int,
+               max_rounds: int) -> List[Tuple[int, Dict[str, int]]]:
+    out = []
+    for uid, party, boss in shard:
+        counts = {"party": 0, "boss": 0, "draw": 0}
+        for i in range(battles):
+            p, b = copy.deepcopy((party, boss))
+            res = Battle(p, b, rng=battle_rng(master_seed, i), sink=NullSink()).run(max_rounds=max_rounds)
+            counts[res["result"]] += 1
+        out.append((uid, counts))
+    return out
+
+
+def sweep(spec: Dict[str, Any], *, battles: int = 100, workers: int | None = 1, master_seed: int = 0,
+          max_rounds: int = 20, shard_size: int = 8) -> Dict[str, Any]:
+    """
+    Прогон сетки: каждая уникальная (по canonical_key) конфигурация — ровно один раз,
+    battles боёв с battle_rng(master_seed, 0..battles-1); уникальные конфигурации режутся
+    на шарды по shard_size и раздаются воркерам (workers=1 — в текущем процессе).
+    Возвращает {"rows": [...по точке сетки...], "points": N, "unique": M}; строка:
+    {"point", "config" (номер уникальной конфигурации), "party"/"boss"/"draw" (счётчики), "win_rate"}.
+    """
+    points = list(expand_grid(spec))
+    unique: Dict[tuple, int] = {}
+    templates: List[Tuple[int, List[Any], Boss]] = []
+    config_of = []
+    for pt in points:
+        party, boss = build(pt)
+        key = canonical_key(party, boss)
+        uid = unique.get(key)
+        if uid is None:
+            uid = unique[key] = len(templates)
+            templates.append((uid, party, boss))
+        config_of.append(uid)
+
+    shards = [templates[i:i + shard_size] for i in range(0, len(templates), shard_size)]
+    if workers == 1 or len(shards) <= 1:
+        parts = [_run_shard(shard, battles, master_seed, max_rounds) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_shard, shard, battles, master_seed, max_rounds) for shard in shards]
+            parts = [f.result() for f in futures]
+    counts = dict(item for part in parts for item in part)
+
+    rows = []
+    for pt, uid in zip(points, config_of):
+        c = counts[uid]
+        rows.append({"point": pt["point"], "config": uid, **c, "win_rate": c["party"] / battles if battles else 0.0})
+    return {"rows": rows, "points": len(points), "unique": len(templates)}
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import heapq
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+class Selector:
+    """
+    Порядок выбора цели: key(entity) -> число, largest — брать наибольшее (иначе наименьшее).
+    stats — статы, от которых зависит key: при их изменении индекс добавляет свежую запись.
+    При равных значениях выбирается первый по порядку стороны, как у max()/min() по списку.
+    """
+    __slots__ = ("name", "key", "largest", "stats")
+
+    def __init__(self, name: str, key: Callable[[Any], float], *, largest: bool = False,
+                 stats: Iterable[str] = ()):
+        self.name = name
+        self.key = key
+        self.largest = largest
+        self.stats = frozenset(stats)
+
+    def rank(self, entity) -> float:
+        value = self.key(entity)
+        return -value if self.largest else value
+
+
+SELECTORS: Dict[str, Selector] = {}
+
+
+def register_selector(name: str, key: Callable[[Any], float], *, largest: bool = False,
+                      stats: Iterable[str] = ()) -> Selector:
+    """
+    Зарегистрировать порядок для select() и TargetIndex, например для своей Strategy:
+        register_selector("min_mp", lambda e: e.mp, stats=("mp",))
+    """
+    selector = SELECTORS[name] = Selector(name, key, largest=largest, stats=stats)
+    return selector
+
+
+register_selector("max_agi", lambda e: e.agi, largest=True, stats=("agi",))
+register_selector("min_hp", lambda e: e.hp, stats=("hp",))
+register_selector("max_str", lambda e: getattr(e, "str_", 0), largest=True, stats=("str_",))
+
+
+class TargetIndex:
+    """
+    Кучи кандидатов по селекторам для одной стороны боя (например, героев — целей босса).
+    Запись кучи — (ранг, позиция, сущность); при изменении стата добавляется свежая запись,
+    а устаревшие (мёртвые или с другим рангом) выбрасываются лениво при запросе.
+    Куча селектора строится при первом запросе, дальше best() — O(log n) амортизированно.
+    """
+
+    def __init__(self, entities: List[Any]):
+        self._entities = entities
+        self._pos = {id(e): i for i, e in enumerate(entities)}
+        self._heaps: Dict[str, List[Tuple[float, int, Any]]] = {}
+
+    def clone(self, memo: dict, entities: List[Any]) -> "TargetIndex":
+        """Копия для форка боя: записи куч переводятся на новые сущности по memo (id старой -> новая)."""
+        new = TargetIndex.__new__(TargetIndex)
+        new._entities = entities
+        new._pos = {id(memo[k]): pos for k, pos in self._pos.items()}
+        new._heaps = {name: [(rank, pos, memo[id(e)]) for rank, pos, e in heap]
+                      for name, heap in self._heaps.items()}
+        return new
+
+    def _build(self, selector: Selector) -> list:
+        heap = [(selector.rank(e), i, e) for i, e in enumerate(self._entities) if e.is_alive]
+        heapq.heapify(heap)
+        self._heaps[selector.name] = heap
+        return heap
+
+    def changed(self, entity, name: str, old: int, new: int) -> None:
+        """Стат entity изменился (подписчик Character.subscribe)."""
+        if not self._heaps or not entity.is_alive:
+            return
+        revived = name == "hp" and old <= 0
+        pos = self._pos[id(entity)]
+        for sel_name, heap in self._heaps.items():
+            selector = SELECTORS[sel_name]
+            if revived or name in selector.stats:
+                heapq.heappush(heap, (selector.rank(entity), pos, entity))
+                if len(heap) > 4 * len(self._entities) + 32:
+                    self._build(selector)
+
+    def best(self, name: str):
+        """Лучшая живая цель по селектору name (None — живых нет)."""
+        selector = SELECTORS[name]
+        heap = self._heaps.get(name)
+        if heap is None:
+            heap = self._build(selector)
+        while heap:
+            rank, pos, entity = heap[0]
+            if entity.is_alive and selector.rank(entity) == rank:
+                return entity
+            heapq.heappop(heap)
+        return None
+
+
+class Opponents(list):
+    """
+    Живые противники для Strategy.choose_action: обычный список (копия — стратегия может
+    сортировать его и удалять из него) плюс индекс целей (targets) — select() берёт цель
+    из него без обхода списка. Индекс описывает всю сторону, поэтому любое изменение
+    состава списка его отключает, и select() дальше обходит сам список.
+    """
+    __slots__ = ("targets",)
+
+    def __init__(self, items: Iterable[Any] = (), targets: TargetIndex | None = None):
+        super().__init__(items)
+        self.targets = targets
+
+
+def _detaching(method):
+    def wrapper(self, *args):
+        self.targets = None
+        return method(self, *args)
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(Opponents, _name, _detaching(getattr(list, _name)))
+del _name
+
+
+def select(opponents: Iterable[Any], name: str):
+    """
+    Цель по селектору name среди живых opponents: через индекс, если он есть (Opponents из боя),
+    иначе обходом списка с тем же правилом (первый при равенстве). None — живых нет.
+    """
+    targets = getattr(opponents, "targets", None)
+    if targets is not None:
+        return targets.best(name)
+    selector = SELECTORS[name]
+    live = [o for o in opponents if o.is_alive]
+    if not live:
+        return None
+    return min(live, key=selector.rank)
@@ -1,17 +1,85 @@
-from typing import Iterable
+from bisect import bisect_left
+from typing import Iterable, List
 
 class TurnOrder:
     """
-    Итератор на один раунд: отдаёт живых сущностей, отсортированных по убыванию agi.
-    При равной agi — по имени (стабильность).
+    Очередь ходов: живые сущности, отсортированные по убыванию agi.
+    При равной agi — по имени (стабильность), при полном совпадении — по порядку добавления.
+
+    Структура постоянная: бой создаёт её один раз, сортировка поддерживается между раундами.
+    Удаление (смерть) и перестановка при смене agi — бинарный поиск по ключу, без пересортировки.
+    Итерация отдаёт снимок живых на момент начала обхода.
     """
     def __init__(self, entities: Iterable):
-        self.entities = list(entities)
+        self._keys: List[tuple] = []   # отсортированные ключи (-agi, name, seq)
+        self._items: List = []         # сущности в том же порядке
+        self._key_of = {}              # id(entity) -> ключ
+        self._seq = 0
+        for e in entities:
+            self.add(e)
+
+    @staticmethod
+    def _sort_key(e, seq: int) -> tuple:
+        return (-getattr(e, "agi", 0), getattr(e, "name", ""), seq)
+
+    def add(self, entity):
+        if id(entity) in self._key_of:
+            return
+        key = self._sort_key(entity, self._seq)
+        self._seq += 1
+        self._insert(entity, key)
+
+    def _insert(self, entity, key: tuple):
+        idx = bisect_left(self._keys, key)
+        self._keys.insert(idx, key)
+        self._items.insert(idx, entity)
+        self._key_of[id(entity)] = key
+
+    def discard(self, entity):
+        """Убрать сущность из очереди (например, при смерти)."""
+        key = self._key_of.pop(id(entity), None)
+        if key is None:
+            return
+        idx = bisect_left(self._keys, key)
+        del self._keys[idx]
+        del self._items[idx]
+
+    def rekey(self, entity):
+        """Переставить сущность после изменения agi (или имени)."""
+        key = self._key_of.get(id(entity))
+        if key is None:
+            return
+        new_key = self._sort_key(entity, key[2])
+        if new_key != key:
+            self.discard(entity)
+            self._insert(entity, new_key)
+
+    def __getstate__(self):
+        return {"keys": self._keys, "items": self._items, "seq": self._seq}
+
+    def __setstate__(self, state):
+        self._keys = state["keys"]
+        self._items = state["items"]
+        self._seq = state["seq"]
+        self._key_of = {id(e): key for key, e in zip(self._keys, self._items)}
+
+    def clone(self, memo: dict) -> "TurnOrder":
+        """Копия очереди для форка боя: memo сопоставляет старые сущности новым."""
+        new = TurnOrder.__new__(TurnOrder)
+        new._keys = list(self._keys)
+        new._items = [memo.get(id(e), e) for e in self._items]
+        new._seq = self._seq
+        new._key_of = {id(e): key for key, e in zip(new._keys, new._items)}
+        return new
+
+    def __contains__(self, entity) -> bool:
+        return id(entity) in self._key_of
+
+    def __len__(self) -> int:
+        return len(self._items)
 
-    def _living_sorted(self):
-        live = [e for e in self.entities if getattr(e, "is_alive", True)]
-        return sorted(live, key=lambda x: (-getattr(x, "agi", 0), getattr(x, "name", "")))
+    def living(self) -> list:
+        return [e for e in self._items if getattr(e, "is_alive", True)]
 
     def __iter__(self):
-        for e in self._living_sorted():
-            yield e
+        return iter(self.living())
@@ -0,0 +1,5 @@
+"""Бенчмарки движка боя: замеры, JSON-базлайны и сравнение с порогом регрессии."""
+from .suite import METRICS, run_suite
+from .compare import compare, load_baseline, save_baseline
+
+__all__ = ["METRICS", "run_suite", "compare", "load_baseline", "save_baseline"]
@@ -0,0 +1,48 @@
+"""
+Запуск:
+  python -m benchmarks run [--out benchmarks/baseline.json] [--quick] [--only имя ...]
+  python -m benchmarks compare [--baseline benchmarks/baseline.json] [--threshold 10]
+compare завершается с кодом 1, если хоть одна метрика просела больше порога.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+
+from .compare import compare, load_baseline, save_baseline
+from .suite import METRICS, run_suite
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="замерить и (опционально) записать базлайн")
+    run_p.add_argument("--out")
+    cmp_p = sub.add_parser("compare", help="замерить и сравнить с базлайном")
+    cmp_p.add_argument("--baseline", default=DEFAULT_BASELINE)
+    cmp_p.add_argument("--threshold", type=float, default=10.0, help="допустимое ухудшение, %%")
+    for p in (run_p, cmp_p):
+        p.add_argument("--quick", action="store_true")
+        p.add_argument("--only", nargs="+", choices=sorted(METRICS))
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.only, quick=args.quick)
+    if args.command == "run":
+        for name, m in results["metrics"].items():
+            print(f"{name:28} {m['value']:>14,.3f} {m['unit']}")
+        if args.out:
+            save_baseline(results, args.out)
+        return 0
+
+    rows = compare(results, load_baseline(args.baseline), args.threshold)
+    for row in rows:
+        mark = "REGRESSION" if row["regressed"] else "ok"
+        print(f"{row['name']:28} {row['baseline']:>14,.3f} -> {row['current']:>14,.3f} "
+              f"({row['change_pct']:+.1f}%) {mark}")
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
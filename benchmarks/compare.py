@@ -0,0 +1,38 @@
+from __future__ import annotations
+import json
+from typing import Dict, List
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict[str, dict], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float = 10.0) -> List[dict]:
+    """
+    Сравнить результаты с базлайном. Регрессия — ухудшение больше threshold процентов
+    в сторону, противоположную "better". Метрики, которых нет в одном из наборов, пропускаются.
+    Возвращает список строк отчёта {"name", "baseline", "current", "change_pct", "regressed"}.
+    """
+    rows = []
+    base_metrics = baseline.get("metrics", {})
+    for name, cur in current.get("metrics", {}).items():
+        base = base_metrics.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"] * 100.0
+        worse = -change if cur.get("better", base.get("better")) == "higher" else change
+        rows.append({
+            "name": name,
+            "baseline": base["value"],
+            "current": cur["value"],
+            "change_pct": round(change, 1),
+            "regressed": worse > threshold,
+        })
+    return rows
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import platform
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from app.battle import Battle
+from app.boss import Boss
+from app.effects import Poison, Regen, Shield
+from app.events import NullSink
+from app.heroes import Warrior, Mage, Healer
+from app.turn import TurnOrder
+
+
+def cli_scenario():
+    """Тот же состав, что в app/cli.py."""
+    party = [
+        Warrior("Warrior", level=1, hp=80, mp=20, str_=6, agi=3, int_=1),
+        Mage("Mage", level=1, hp=60, mp=30, str_=1, agi=5, int_=7),
+        Healer("Healer", level=1, hp=70, mp=30, str_=1, agi=2, int_=6),
+    ]
+    boss = Boss("Dragon", level=3, hp=120, mp=0, str_=8, agi=4, int_=5)
+    return party, boss
+
+
+def raid_scenario(heroes: int = 500):
+    classes = (Warrior, Mage, Healer)
+    party = [classes[i % 3](f"H{i}", level=1, hp=0, mp=0, str_=1 + i % 7, agi=1 + i % 11, int_=1 + i % 5)
+             for i in range(heroes)]
+    # босс, которого рейд не убивает за время замера
+    boss = Boss("Titan", level=100_000, hp=0, mp=0, str_=20, agi=6, int_=8)
+    return party, boss
+
+
+def _best_of(fn: Callable[[], float], repeat: int) -> float:
+    return min(fn() for _ in range(repeat))
+
+
+# --------- замеры ---------
+def battles_per_second(quick: bool = False) -> float:
+    n = 50 if quick else 1000
+
+    def once():
+        start = time.perf_counter()
+        for i in range(n):
+            party, boss = cli_scenario()
+            Battle(party, boss, rng=random.Random(i), sink=NullSink()).run(max_rounds=6)
+        return time.perf_counter() - start
+
+    return n / _best_of(once, 1 if quick else 3)
+
+
+def raid_rounds_per_second(quick: bool = False) -> float:
+    rounds = 2 if quick else 10
+
+    def once():
+        party, boss = raid_scenario()
+        battle = Battle(party, boss, rng=random.Random(0), sink=NullSink())
+        start = time.perf_counter()
+        battle.run(max_rounds=rounds)
+        return time.perf_counter() - start
+
+    return rounds / _best_of(once, 1 if quick else 3)
+
+
+def receive_damage_ns(quick: bool = False) -> float:
+    n = 2_000 if quick else 200_000
+    w = Warrior("W", level=1, hp=0, mp=0, str_=5, agi=3, int_=1)
+    w.add_effect(Shield(amount=10 ** 9, duration=10 ** 9))
+
+    def once():
+        start = time.perf_counter()
+        for _ in range(n):
+            w.receive_damage(1)
+        return time.perf_counter() - start
+
+    return _best_of(once, 1 if quick else 3) / n * 1e9
+
+
+def tick_effects_ns(quick: bool = False) -> float:
+    n = 2_000 if quick else 100_000
+    w = Warrior("W", level=1, hp=0, mp=0, str_=5, agi=3, int_=1)
+    for eff in (Poison(dps=0, duration=10 ** 9), Regen(hps=0, duration=10 ** 9), Shield(amount=1, duration=10 ** 9)):
+        w.add_effect(eff)
+
+    def once():
+        start = time.perf_counter()
+        for _ in range(n):
+            w.tick_effects("end")
+        return time.perf_counter() - start
+
+    return _best_of(once, 1 if quick else 3) / n * 1e9
+
+
+def turn_order_iter_ns(quick: bool = False) -> float:
+    """Одна итерация по очереди из 8 сущностей (как в раунде с пати и боссом)."""
+    n = 2_000 if quick else 100_000
+    party, boss = raid_scenario(7)
+    order = TurnOrder(party + [boss])
+
+    def once():
+        start = time.perf_counter()
+        for _ in range(n):
+            for _ in order:
+                pass
+        return time.perf_counter() - start
+
+    return _best_of(once, 1 if quick else 3) / n * 1e9
+
+
+def fork_ns(quick: bool = False) -> float:
+    """Battle.fork() посреди боя cli-состава с эффектами (шаг поиска вперёд, как в MCTS)."""
+    n = 200 if quick else 20_000
+    party, boss = cli_scenario()
+    party[0].add_effect(Shield(amount=15, duration=4))
+    boss.add_effect(Poison(dps=2, duration=6))
+    battle = Battle(party, boss, rng=random.Random(0), sink=NullSink())
+    for _ in range(5):
+        battle.step()
+
+    def once():
+        start = time.perf_counter()
+        for _ in range(n):
+            battle.fork()
+        return time.perf_counter() - start
+
+    return _best_of(once, 1 if quick else 3) / n * 1e9
+
+
+def memory_per_entity_bytes(quick: bool = False) -> float:
+    n = 200 if quick else 5_000
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        entities = [Warrior(f"W{i}", level=1, hp=0, mp=0, str_=5, agi=3, int_=1) for i in range(n)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del entities
+    return (after - before) / n
+
+
+# имя -> (функция, единица, что лучше)
+METRICS: Dict[str, tuple] = {
+    "cli_battles_per_s": (battles_per_second, "battles/s", "higher"),
+    "raid500_rounds_per_s": (raid_rounds_per_second, "rounds/s", "higher"),
+    "receive_damage_ns": (receive_damage_ns, "ns/call", "lower"),
+    "tick_effects_ns": (tick_effects_ns, "ns/call", "lower"),
+    "turn_order_iter_ns": (turn_order_iter_ns, "ns/iter", "lower"),
+    "fork_ns": (fork_ns, "ns/call", "lower"),
+    "memory_per_entity_bytes": (memory_per_entity_bytes, "bytes", "lower"),
+}
+
+
+def run_suite(names: List[str] | None = None, *, quick: bool = False) -> Dict[str, dict]:
+    """
+    Прогнать замеры (все или names). quick=True — короткие прогоны для проверки, не для базлайна.
+    Возвращает {"metrics": {имя: {"value", "unit", "better"}}, "python": ..., "quick": ...}.
+    """
+    metrics = {}
+    for name in names or list(METRICS):
+        fn, unit, better = METRICS[name]
+        metrics[name] = {"value": round(fn(quick), 3), "unit": unit, "better": better}
+    return {"metrics": metrics, "python": platform.python_version(), "quick": quick}
@@ -1,4 +1,5 @@
 from app.battle import Battle
+from app.events import BatchedFileSink
 from app.heroes import Warrior, Mage, Healer
 from app.boss import Boss
 
@@ -9,6 +10,7 @@ party = [
 ]
 boss = Boss("Dragon", level=3, hp=120, mp=0, str_=8, agi=4, int_=5)
 
-battle = Battle(party, boss)
-res = battle.run(max_rounds=6)
+with BatchedFileSink("battle_log.txt") as sink:
+    battle = Battle(party, boss, sink=sink)
+    res = battle.run(max_rounds=6)
 print("Result:", res)
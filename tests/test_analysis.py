@@ -0,0 +1,42 @@
+from fractions import Fraction
+from app.analysis import exact_outcomes, _branch_step, _ScriptedRng
+from app.battle import Battle
+from app.events import NullSink
+from tests.test_battle import mk_scenario
+
+def mk_battle():
+    party, boss = mk_scenario()
+    return Battle(party, boss, sink=NullSink())
+
+def brute_force(battle, prob=Fraction(1)):
+    # полный перебор ветвей без слияния состояний
+    if battle.result is not None:
+        return {(battle.result, battle.round_no): prob}
+    out = {}
+    for p, nxt in _branch_step(battle):
+        for k, v in brute_force(nxt, prob * p).items():
+            out[k] = out.get(k, 0) + v
+    return out
+
+def test_exact_outcomes_match_unmerged_enumeration():
+    battle = mk_battle()
+    res = exact_outcomes(battle, max_rounds=4)
+    root = battle.fork()
+    root.max_rounds = 4
+    root.rng = _ScriptedRng()
+    leaves = brute_force(root)
+    for outcome in ("party", "boss", "draw"):
+        assert res[outcome] == sum(v for (r, _), v in leaves.items() if r == outcome)
+    rounds = {}
+    for (_, rn), v in leaves.items():
+        rounds[rn] = rounds.get(rn, 0) + v
+    assert res["rounds"] == rounds
+
+def test_exact_outcomes_full_battle_is_a_distribution():
+    battle = mk_battle()
+    res = exact_outcomes(battle)
+    assert res["party"] + res["boss"] + res["draw"] == 1
+    assert sum(res["rounds"].values()) == 1
+    assert all(isinstance(v, Fraction) for v in res["rounds"].values())
+    # исходный бой не тронут
+    assert battle.round_no == 0 and battle.boss.hp == battle.boss.max_hp
@@ -0,0 +1,49 @@
+import random
+import pytest
+from app.battle import Battle
+from app.batch import BatchBattle
+from app.heroes import Warrior, Mage, Healer
+from app.boss import Boss
+from app.effects import Poison, Regen, Shield, Silence
+
+def mk_scenario(level=3, str_=8, effects=False):
+    party = [
+        Warrior("Warrior", level=1, hp=80, mp=20, str_=6, agi=3, int_=1),
+        Mage("Mage", level=1, hp=60, mp=30, str_=1, agi=5, int_=7),
+        Healer("Healer", level=1, hp=70, mp=30, str_=1, agi=2, int_=6),
+    ]
+    boss = Boss("Dragon", level=level, hp=0, mp=0, str_=str_, agi=6, int_=8, thresholds=(0.9, 0.5))
+    if effects:
+        party[0].add_effect(Shield(amount=30, duration=3))
+        party[1].add_effect(Silence(duration=1))
+        party[2].add_effect(Regen(hps=5, duration=4))
+        boss.add_effect(Poison(dps=3, duration=5))
+    return party, boss
+
+@pytest.mark.parametrize("effects", [False, True])
+def test_batch_matches_battle_run_per_seed(effects):
+    seeds = list(range(60))
+    party, boss = mk_scenario(level=9, str_=12, effects=effects)
+    got = BatchBattle(party, boss, seeds).run(max_rounds=20)
+
+    expected = []
+    for s in seeds:
+        party, boss = mk_scenario(level=9, str_=12, effects=effects)
+        expected.append(Battle(party, boss, rng=random.Random(s)).run(max_rounds=20))
+    assert got == expected
+    # сценарий подобран так, что исход зависит от критов
+    assert len({r["result"] for r in got}) > 1
+
+def test_batch_does_not_mutate_template():
+    party, boss = mk_scenario()
+    before = [dict(iter(e)) for e in party + [boss]]
+    BatchBattle(party, boss, range(10)).run(max_rounds=6)
+    assert [dict(iter(e)) for e in party + [boss]] == before
+
+def test_batch_rejects_unknown_classes():
+    class Bard(Warrior):
+        pass
+    party, boss = mk_scenario()
+    party.append(Bard("Bard", level=1, hp=50, mp=0, str_=2, agi=1, int_=1))
+    with pytest.raises(TypeError):
+        BatchBattle(party, boss, [0])
@@ -0,0 +1,160 @@
+import pytest
+from app.battle import Battle, battle_rng, run_many
+from app.heroes import Warrior, Mage, Healer
+from app.boss import Boss
+from app.events import NullSink
+
+def mk_scenario():
+    party = [
+        Warrior("Warrior", level=1, hp=80, mp=20, str_=6, agi=3, int_=1),
+        Mage("Mage", level=1, hp=60, mp=30, str_=1, agi=5, int_=7),
+        Healer("Healer", level=1, hp=70, mp=30, str_=1, agi=2, int_=6),
+    ]
+    boss = Boss("Dragon", level=9, hp=0, mp=0, str_=12, agi=6, int_=8, thresholds=(0.9, 0.5))
+    return party, boss
+
+def test_battle_rng_depends_only_on_seed_and_index():
+    assert battle_rng(7, 3).random() == battle_rng(7, 3).random()
+    assert battle_rng(7, 3).random() != battle_rng(7, 4).random()
+    assert battle_rng(7, 3).random() != battle_rng(8, 3).random()
+
+def test_run_many_is_identical_for_any_worker_count():
+    scenarios = [mk_scenario() for _ in range(40)]
+    single = run_many(scenarios, workers=1, master_seed=42, chunksize=8)
+    pooled = run_many(scenarios, workers=3, master_seed=42, chunksize=8)
+    assert single == pooled
+    assert len(single) == 40
+    assert len({r["result"] for r in single}) > 1
+
+def test_run_many_matches_single_battle_and_keeps_template():
+    party, boss = mk_scenario()
+    res = run_many([(party, boss)], workers=1, master_seed=5, max_rounds=20)
+    # шаблон не изменился — можно прогнать тот же бой вручную
+    assert boss.hp == boss.max_hp
+    expected = Battle(party, boss, rng=battle_rng(5, 0)).run(max_rounds=20)
+    assert res == [expected]
+
+def test_iter_events_streams_and_can_stop_early():
+    party, boss = mk_scenario()
+    battle = Battle(party, boss, rng=battle_rng(1, 0))
+    kinds = []
+    for ev in battle.iter_events(max_rounds=20):
+        kinds.append(ev.kind)
+        if boss.hp_ratio() < 0.3:
+            break
+    # остановились посреди боя — итог ещё не известен
+    assert battle.result is None
+    assert kinds[0] == "round_start" and "end" not in kinds
+
+def test_run_is_consumer_of_iter_events():
+    party, boss = mk_scenario()
+    events = list(Battle(party, boss, rng=battle_rng(3, 0)).iter_events(max_rounds=20))
+    party, boss = mk_scenario()
+    res = Battle(party, boss, rng=battle_rng(3, 0)).run(max_rounds=20)
+    end = [e for e in events if e.kind == "end"]
+    assert len(end) == 1 and end[0].actor == res["result"]
+    assert any(e.kind == "phase" for e in events)
+    assert any(e.kind == "tick" for e in events)
+
+def test_battle_tracks_alive_and_injured_incrementally():
+    party, boss = mk_scenario()
+    battle = Battle(party, boss, rng=battle_rng(0, 0))
+    war, mage, healer = party
+    assert battle._any_heroes_alive() and not battle._injured[0.5]
+
+    mage.hp = 5
+    assert [h for _, h in battle._injured[0.5].values()] == [mage]
+    assert battle._choose_hero_action(healer, [boss])["target"] is mage
+
+    for h in party:
+        h.hp = 0
+    assert not battle._any_heroes_alive()
+    assert not battle._injured[0.5] and healer not in battle.turn_order
+
+def test_fork_is_independent_and_continues_identically():
+    from app.effects import Shield
+    party, boss = mk_scenario()
+    party[0].add_effect(Shield(amount=10, duration=3))
+    battle = Battle(party, boss, rng=battle_rng(4, 0))
+    for _ in range(6):
+        battle.step()
+    child = battle.fork()
+    assert child.boss.strategies is boss.strategies      # неизменяемое — общее
+    assert child.party[0] is not party[0]
+    assert next(iter(child.party[0]._effects)) is not next(iter(party[0]._effects))
+    expected = list(battle.resume_events())
+    # мутации родителя не видны в форке
+    assert list(child.resume_events()) == expected
+    assert child.result == battle.result
+    assert [dict(iter(e)) for e in child._entities] == [dict(iter(e)) for e in battle._entities]
+
+def test_fork_carries_indices_over_instead_of_rebuilding():
+    party, boss = mk_scenario()
+    battle = Battle(party, boss, rng=battle_rng(5, 0), sink=NullSink())
+    for _ in range(7):
+        battle.step()
+    party[1].hp = 5
+    battle._targets.best("min_hp")
+    child = battle.fork()
+    ref = battle.fork()
+    ref.detach()
+    ref._reattach()   # те же индексы, собранные с нуля
+    assert child._alive == ref._alive and child._hero_pos == {id(h): i for i, h in enumerate(child.party)}
+    assert {f: sorted(pos for pos, _ in inj.values()) for f, inj in child._injured.items()} == \
+           {f: sorted(pos for pos, _ in inj.values()) for f, inj in ref._injured.items()}
+    assert child._targets.best("min_hp") is child.party[1]
+    assert all(child._on_stat_change in e._observers and e._scheduler is child.effects for e in child._entities)
+    child.party[1].hp = 0
+    assert child._alive["party"] == ref._alive["party"] - 1 and battle._alive == ref._alive
+
+def test_second_battle_over_same_party_does_not_steal_effects():
+    expected_party, expected_boss = mk_scenario()
+    expected = Battle(expected_party, expected_boss, rng=battle_rng(3, 0), sink=NullSink()).run(max_rounds=5)
+    party, boss = mk_scenario()
+    first = Battle(party, boss, rng=battle_rng(3, 0), sink=NullSink())
+    second = Battle(party, boss, rng=battle_rng(3, 0), sink=NullSink())
+    # первый бой забирает сущности обратно на своём шаге и ведёт их эффекты (яд босса) сам
+    assert first.run(max_rounds=5) == expected
+    assert [h.hp for h in party] == [h.hp for h in expected_party]
+    assert second.effects is not first.effects and all(e._scheduler is None for e in party + [boss])
+
+def mk_raid():
+    party, boss = mk_scenario()
+    party += [Warrior(f"W{i}", level=1, hp=80, mp=20, str_=6, agi=1 + i % 4, int_=1) for i in range(6)]
+    adds = [Boss(f"Imp{i}", level=1, hp=0, mp=0, str_=3, agi=2 + i, int_=2) for i in range(2)]
+    return party, [boss] + adds
+
+def test_battle_with_several_enemies_ends_when_all_are_dead():
+    party, enemies = mk_raid()
+    battle = Battle(party, enemies, rng=battle_rng(2, 0))
+    assert battle.boss is enemies[0] and battle.enemies == enemies
+    imp = enemies[1]
+    imp.hp = 0
+    assert battle._living_side("boss") == [enemies[0], enemies[2]]
+    # герои бьют первого живого противника, боссы выбирают из всех живых героев
+    assert battle._choose_hero_action(party[0], battle._living_side("boss"))["target"] is enemies[0]
+    enemies[0].hp = 0
+    assert list(battle._check_end()) == []
+    assert battle._choose_hero_action(party[0], battle._living_side("boss"))["target"] is enemies[2]
+    enemies[2].hp = 0
+    assert [e.kind for e in battle._check_end()] == ["end"] and battle.result == "party"
+
+def test_side_lookup_does_not_compare_entities(monkeypatch):
+    from app.core import Human
+    party, enemies = mk_raid()
+    battle = Battle(party, enemies, rng=battle_rng(5, 0))
+    monkeypatch.setattr(Human, "__eq__", lambda *a: pytest.fail("entity comparison"))
+    res = battle.run(max_rounds=20)
+    assert res["result"] in ("party", "boss", "draw")
+
+def test_fork_and_snapshot_keep_all_enemies():
+    from app.save_load import snapshot, restore
+    party, enemies = mk_raid()
+    battle = Battle(party, enemies, rng=battle_rng(6, 0))
+    for _ in range(5):
+        battle.step()
+    for copy_ in (battle.fork(), restore(snapshot(battle))):
+        assert [e.name for e in copy_.enemies] == [e.name for e in enemies]
+        assert copy_.boss is copy_.enemies[0]
+        assert copy_.state_key() == battle.state_key()
+        assert copy_.run(max_rounds=20) == battle.fork().run(max_rounds=20)
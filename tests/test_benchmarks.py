@@ -0,0 +1,29 @@
+from benchmarks import METRICS, compare, run_suite, save_baseline
+from benchmarks.__main__ import main
+
+def test_compare_respects_metric_direction():
+    base = {"metrics": {"speed": {"value": 100.0, "better": "higher"}, "cost": {"value": 100.0, "better": "lower"}}}
+    cur = {"metrics": {"speed": {"value": 85.0, "better": "higher"}, "cost": {"value": 85.0, "better": "lower"}}}
+    rows = {r["name"]: r for r in compare(cur, base, threshold=10)}
+    assert rows["speed"]["regressed"] and rows["speed"]["change_pct"] == -15.0
+    assert not rows["cost"]["regressed"]
+    assert not compare(cur, base, threshold=20)[0]["regressed"]
+
+def test_quick_suite_and_compare_exit_code(tmp_path):
+    results = run_suite(["receive_damage_ns", "memory_per_entity_bytes"], quick=True)
+    assert set(results["metrics"]) == {"receive_damage_ns", "memory_per_entity_bytes"}
+    assert all(m["value"] > 0 for m in results["metrics"].values())
+    assert set(METRICS) >= {"cli_battles_per_s", "raid500_rounds_per_s", "turn_order_iter_ns", "tick_effects_ns", "fork_ns"}
+
+    # базлайн с заведомо недостижимой памятью — compare должен упасть
+    results["metrics"]["memory_per_entity_bytes"]["value"] = 1.0
+    save_baseline(results, str(tmp_path / "base.json"))
+    argv = ["compare", "--baseline", str(tmp_path / "base.json"), "--quick", "--only", "memory_per_entity_bytes"]
+    assert main(argv) == 1
+    assert main(argv + ["--threshold", "1e9"]) == 0
+
+def test_entity_memory_stays_below_pre_optimization_size():
+    # до оптимизаций (слоты, общие пустые эффекты и кулдауны) Warrior занимал ~381 байт в quick-замере;
+    # базлайн сравнивается с допуском, а этот порог не даёт памяти вернуться к старому размеру
+    results = run_suite(["memory_per_entity_bytes"], quick=True)
+    assert results["metrics"]["memory_per_entity_bytes"]["value"] < 381
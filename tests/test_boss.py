@@ -70,3 +70,42 @@ def test_phase3_targets_strongest():
     act = boss.decide(party)
     # самый сильный по STR — Warrior
     assert act["target"].name == "War"
+
+def test_on_phase_enter_fires_only_on_threshold_crossing():
+    entered = []
+
+    class Tracked(Boss):
+        def on_phase_enter(self, phase):
+            entered.append(phase)
+
+    boss = Tracked("Dragon", level=5, hp=300, mp=0, str_=8, agi=4, int_=4)
+    boss.hp = boss.max_hp - 1   # порог не пересечён
+    boss.update_phase()
+    boss.hp = int(boss.max_hp * 0.5)
+    boss.update_phase()
+    boss.update_phase()         # повторный вызов без изменений — без события
+    boss.hp = int(boss.max_hp * 0.1)
+    boss.update_phase()
+    assert entered == [1, 2]
+
+def test_phase_bounds_match_ratio_rule():
+    boss = Boss("Dragon", level=3, hp=0, mp=0, str_=8, agi=4, int_=5, thresholds=(0.7, 0.3))
+    for hp in range(boss.max_hp + 1):
+        boss.hp = hp
+        boss.update_phase()
+        assert boss.current_phase == boss._phase_from_ratio(boss.hp_ratio())
+
+def test_overridden_phase_rule_drives_phase_bounds():
+    class HalfBoss(Boss):
+        # своё правило: ниже половины hp — сразу последняя фаза
+        def _phase_from_ratio(self, ratio: float) -> int:
+            return 0 if ratio >= 0.5 else 2
+
+    boss = HalfBoss("Dragon", level=3, hp=0, mp=0, str_=8, agi=4, int_=5)
+    for hp in range(boss.max_hp + 1):
+        boss.hp = hp
+        boss.update_phase()
+        assert boss.current_phase == boss._phase_from_ratio(boss.hp_ratio())
+    boss.hp = int(boss.max_hp * 0.4)
+    boss.update_phase()
+    assert boss.current_phase == 2
@@ -0,0 +1,113 @@
+import copy
+import random
+
+from app.battle import Battle
+from app.boss import Boss, Phase1Aggro
+from app.cache import OutcomeCache, scenario_key
+from app.effects import Poison
+from app.events import NullSink
+from app.heroes import Warrior, Mage, Healer
+from app.items import Inventory, Potion
+from app.rules import RuleEngine, default_rules
+
+def mk_scenario():
+    party = [Warrior("Warrior", level=1, hp=120, mp=20, str_=6, agi=3, int_=1),
+             Mage("Mage", level=1, hp=60, mp=30, str_=1, agi=5, int_=8),
+             Healer("Healer", level=1, hp=70, mp=30, str_=1, agi=2, int_=6)]
+    boss = Boss("Dragon", level=3, hp=0, str_=8, agi=6, int_=8)
+    return party, boss
+
+class Aggro(Phase1Aggro):
+    pass
+
+def test_key_covers_seed_rounds_stats_effects_and_inventory():
+    party, boss = mk_scenario()
+    base = scenario_key(party, boss, seed=1)
+    assert base == scenario_key(*mk_scenario(), seed=1)
+    assert base != scenario_key(party, boss, seed=2)
+    assert base != scenario_key(party, boss, seed=1, max_rounds=10)
+    inv = Inventory()
+    inv.add(Potion(30))
+    assert base != scenario_key(party, boss, seed=1, inventory=inv)
+    boss.thresholds = (0.6, 0.3)
+    assert base != scenario_key(party, boss, seed=1)
+    party, boss = mk_scenario()
+    party[0].add_effect(Poison(3, 2))
+    assert base != scenario_key(party, boss, seed=1)
+
+def eager_healer_rules():
+    spec = copy.deepcopy(default_rules().spec)
+    spec["party"]["Healer"][0]["if"][0] = "injured_ally 0.9"
+    spec["party"]["Healer"][0]["target"] = "most_injured_ally 0.9"
+    return RuleEngine(spec)
+
+def test_key_covers_rules(tmp_path):
+    party, boss = mk_scenario()
+    rules = eager_healer_rules()
+    assert scenario_key(party, boss, seed=1) == scenario_key(party, boss, seed=1, rules=default_rules())
+    assert scenario_key(party, boss, seed=1) != scenario_key(party, boss, seed=1, rules=rules)
+    with OutcomeCache(str(tmp_path / "outcomes.sqlite")) as cache:
+        for seed in range(10):
+            expected = Battle(*mk_scenario(), rng=random.Random(seed), sink=NullSink(), rules=rules).run()
+            cache.run(party, boss, seed=seed)
+            assert cache.run(party, boss, seed=seed, rules=rules) == expected
+
+def test_key_is_none_for_custom_strategies_and_effects():
+    party, boss = mk_scenario()
+    boss.strategies[0] = Aggro()
+    assert scenario_key(party, boss, seed=1) is None
+
+    class Burn(Poison):
+        pass
+
+    party, boss = mk_scenario()
+    party[1].add_effect(Burn(1, 2))
+    assert scenario_key(party, boss, seed=1) is None
+
+def test_run_matches_battle_and_hits_memory_then_disk(tmp_path):
+    path = str(tmp_path / "outcomes.sqlite")
+    party, boss = mk_scenario()
+    expected = [Battle(*copy.deepcopy((party, boss)), rng=random.Random(s), sink=NullSink()).run(max_rounds=20)
+                for s in range(5)]
+    with OutcomeCache(path) as cache:
+        assert [cache.run(party, boss, seed=s) for s in range(5)] == expected
+        assert [cache.run(party, boss, seed=s) for s in range(5)] == expected
+        assert cache.stats == {"memory_hits": 5, "disk_hits": 0, "misses": 5, "bypassed": 0}
+        # шаблон не тронут
+        assert party[0].hp == party[0].max_hp
+    with OutcomeCache(path) as cache:
+        assert [cache.run(party, boss, seed=s) for s in range(5)] == expected
+        assert cache.stats["disk_hits"] == 5 and cache.stats["misses"] == 0
+
+def test_custom_scenario_bypasses_cache():
+    party, boss = mk_scenario()
+    boss.strategies[0] = Aggro()
+    with OutcomeCache(":memory:") as cache:
+        first = cache.run(party, boss, seed=3)
+        assert cache.run(party, boss, seed=3) == first
+        assert cache.stats["bypassed"] == 2 and cache.disk_bytes() == 0
+
+def test_disk_tier_evicts_least_recently_used_by_size():
+    party, boss = mk_scenario()
+    with OutcomeCache(":memory:", memory_items=1, max_bytes=60) as cache:
+        for s in range(10):
+            cache.run(party, boss, seed=s)
+        assert 0 < cache.disk_bytes() <= 60
+        # самые старые вытеснены с диска и из памяти — считаются заново
+        cache.run(party, boss, seed=0)
+        assert cache.stats["misses"] == 11
+
+def test_byte_total_is_kept_without_scanning_the_table(tmp_path):
+    path = str(tmp_path / "outcomes.sqlite")
+    with OutcomeCache(path) as cache:
+        statements = []
+        cache._db.set_trace_callback(statements.append)
+        cache.put("a", {"result": "party"})
+        cache.put("b", {"result": "boss"})
+        cache.put("a", {"result": "draw"})      # замена — учитывается разница размеров
+        assert not any("SUM(" in sql for sql in statements)
+        assert cache.disk_bytes() == cache._sum_sizes() == len('{"result": "draw"}') + len('{"result": "boss"}')
+    with OutcomeCache(path, max_bytes=20) as cache:
+        assert cache.disk_bytes() == 36
+        cache.put("c", {"result": "boss"})
+        assert cache.disk_bytes() == cache._sum_sizes() <= 20
@@ -14,4 +14,66 @@ def test_is_alive_flag():
     h = Human("Test", level=1, hp=1, mp=0, str_=1, agi=1, int_=1)
     assert h.is_alive
     h.hp = 0
-    assert not h.is_alive
\ No newline at end of file
+    assert not h.is_alive
+
+def test_heroes_are_slotted():
+    from app.heroes import Warrior, Mage, Healer
+    for cls in (Warrior, Mage, Healer):
+        e = cls("X", level=1, hp=10, mp=0, str_=1, agi=1, int_=1)
+        assert not hasattr(e, "__dict__")
+
+def test_cached_max_follows_level_str_and_int():
+    h = Human("Test", level=1, hp=5, mp=0, str_=2, agi=1, int_=1)
+    assert h.max_hp == 50 + 10 + 10
+    h.str_ = 4
+    assert h.max_hp == 50 + 10 + 20
+    h.level = 2
+    assert h.max_hp == 50 + 20 + 20
+    h.int_ = 3
+    assert h.max_mp == 10 + 10 + 15
+    # клампинг использует обновлённый максимум
+    h.hp = 10_000
+    assert h.hp == h.max_hp
+
+def test_overridden_max_property_is_respected():
+    from app.boss import Boss
+
+    class Titan(Boss):
+        __slots__ = ()
+
+        @property
+        def max_hp(self) -> int:
+            return 1000
+
+    titan = Titan("Titan", level=1, hp=0, mp=0, str_=1, agi=1, int_=1)
+    assert titan.hp == 1000
+    titan.hp = 5000
+    assert titan.hp == 1000
+    # без переопределения — прежний кэш
+    assert Boss("B", level=1, hp=0, mp=0, str_=1, agi=1, int_=1).hp == 65
+
+def test_subscribers_get_real_changes_only():
+    h = Human("Test", level=1, hp=10, mp=0, str_=1, agi=1, int_=1)
+    seen = []
+    cb = lambda e, name, old, new: seen.append((name, old, new))
+    h.subscribe(cb)
+    h.hp = 5
+    h.hp = 5          # без изменения — без уведомления
+    h.hp = -3         # кламп до 0
+    h.agi = 4
+    h.unsubscribe(cb)
+    h.hp = 7
+    assert seen == [("hp", 10, 5), ("hp", 5, 0), ("agi", 1, 4)]
+
+def test_empty_effects_and_cooldowns_are_shared_until_first_use():
+    import pickle
+    from app.heroes import Warrior
+    from app.effects import NO_EFFECTS, Shield
+    a = Warrior("A", level=1, hp=0, mp=0, str_=1, agi=1, int_=1)
+    b = Warrior("B", level=1, hp=0, mp=0, str_=1, agi=1, int_=1)
+    assert a._effects is b._effects is NO_EFFECTS and a._ready_at is b._ready_at
+    a.add_effect(Shield(amount=5, duration=2))
+    a._start_cooldown("power_strike", 2)
+    assert list(a._effects) and not b._effects and b._ready_at == {}
+    copy = pickle.loads(pickle.dumps(b))
+    assert copy._effects is NO_EFFECTS and copy._ready_at is b._ready_at
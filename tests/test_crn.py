@@ -0,0 +1,41 @@
+import math
+import pickle
+from app.battle import Battle
+from app.crn import CrnRng, crn_rng, paired_compare
+from tests.test_battle import mk_scenario
+
+def variant(mage_int=7, mage_mp=30):
+    party, boss = mk_scenario()
+    party[1].int_ = mage_int
+    party[1].mp = mage_mp
+    return party, boss
+
+def crit_turns(battle, name):
+    # номера ходов актёра, на которых он критовал
+    turns, crits = 0, []
+    for e in battle.iter_events(20):
+        if e.actor == name and e.kind in ("hit", "skill", "heal", "effect"):
+            turns += 1
+        if e.actor == name and e.kind == "crit":
+            crits.append(turns)
+    return crits
+
+def test_substreams_stay_aligned_when_actions_differ():
+    # Mage без MP бьёт базовой атакой и тратит броски — у Warrior броски те же
+    a = Battle(*variant(), rng=crn_rng(0, 7))
+    b = Battle(*variant(mage_mp=0), rng=crn_rng(0, 7))
+    assert crit_turns(a, "Warrior") == crit_turns(b, "Warrior") == [0, 1]
+    rng = CrnRng(7)
+    assert pickle.loads(pickle.dumps(rng)).key == 7
+    assert a.fork().rng.key == a.rng.key
+
+def test_paired_compare_identical_variants_have_zero_difference():
+    res = paired_compare(variant(), variant(), battles=50)
+    assert res["diff"] == 0 and res["low"] == res["high"] == 0 and res["agreement"] == 1
+
+def test_paired_interval_is_narrower_than_independent():
+    res = paired_compare(variant(7), variant(8), battles=400)
+    a, b = res["a"], res["b"]
+    independent = 1.96 * math.sqrt(a * (1 - a) / 400 + b * (1 - b) / 400)
+    assert res["low"] <= res["diff"] <= res["high"] < 0
+    assert (res["high"] - res["low"]) / 2 < independent
@@ -0,0 +1,106 @@
+import random
+import pytest
+from app.battle import Battle
+from app.ecs import EcsBattle, EntityStore, WarriorView, BossView
+from app.heroes import Warrior, Mage, Healer
+from app.boss import Boss
+from app.effects import Poison, Regen, Shield, Silence
+from app.events import NullSink
+
+def mk_scenario(level=9, str_=12, effects=False):
+    party = [
+        Warrior("Warrior", level=1, hp=80, mp=20, str_=6, agi=3, int_=1),
+        Mage("Mage", level=1, hp=60, mp=30, str_=1, agi=5, int_=7),
+        Healer("Healer", level=1, hp=70, mp=30, str_=1, agi=2, int_=6),
+    ]
+    boss = Boss("Dragon", level=level, hp=0, mp=0, str_=str_, agi=6, int_=8, thresholds=(0.9, 0.5))
+    if effects:
+        party[0].add_effect(Shield(amount=30, duration=3))
+        party[1].add_effect(Silence(duration=1))
+        party[2].add_effect(Regen(hps=5, duration=4))
+        boss.add_effect(Poison(dps=3, duration=5))
+    return party, boss
+
+def mk_raid(heroes=60):
+    classes = (Warrior, Mage, Healer)
+    party = [classes[i % 3](f"H{i}", level=1, hp=0, mp=0, str_=1 + i % 7, agi=1 + i % 11, int_=1 + i % 5)
+             for i in range(heroes)]
+    for i, h in enumerate(party[::7]):
+        h.add_effect(Shield(amount=5 + i, duration=2 + i % 3))
+    boss = Boss("Titan", level=40, hp=0, mp=0, str_=20, agi=6, int_=8, thresholds=(0.8, 0.4))
+    return party, boss
+
+def final_state(entities):
+    return [(e.name, e.hp, e.mp) for e in entities]
+
+@pytest.mark.parametrize("build", [mk_scenario, lambda: mk_scenario(effects=True), mk_raid])
+def test_ecs_reproduces_battle_run(build):
+    results = set()
+    for seed in range(25):
+        party, boss = build()
+        ecs = EcsBattle(party, boss, rng=random.Random(seed))
+        got = ecs.run(max_rounds=20)
+        ref = Battle(party, boss, rng=random.Random(seed), sink=NullSink())
+        assert got == ref.run(max_rounds=20)
+        assert ecs.round_no == ref.round_no
+        assert final_state(ecs.party + [ecs.boss]) == final_state(party + [boss])
+        results.add(got["result"])
+    if build is mk_scenario:
+        assert len(results) > 1
+
+def test_ecs_uses_each_heros_crit_multiplier(monkeypatch):
+    monkeypatch.setattr(Warrior, "crit_multiplier", lambda self: 2.25)
+    party, boss = mk_scenario()
+    store = EntityStore(party + [boss])
+    assert list(store.crit_mult) == [2.25, 1.5, 1.0, 1.0]
+    for seed in range(25):
+        party, boss = mk_scenario()
+        got = EcsBattle(party, boss, rng=random.Random(seed)).run(max_rounds=20)
+        assert got == Battle(party, boss, rng=random.Random(seed), sink=NullSink()).run(max_rounds=20)
+
+def mk_multi(seed):
+    r = random.Random(seed)
+    party, boss = mk_raid(heroes=r.randint(3, 24))
+    adds = [Boss(f"Imp{i}", level=r.randint(1, 8), hp=0, mp=0, str_=r.randint(2, 9), agi=r.randint(1, 12),
+                 int_=r.randint(1, 6), thresholds=(0.9, 0.4)) for i in range(r.randint(1, 3))]
+    adds[0].add_effect(Poison(dps=4, duration=3))
+    return party, adds + [Boss("Ogre", level=r.randint(2, 12), hp=0, mp=0, str_=r.randint(4, 14), agi=4, int_=5)]
+
+def test_ecs_reproduces_battle_with_several_enemies():
+    results = set()
+    for seed in range(30):
+        party, enemies = mk_multi(seed)
+        ecs = EcsBattle(party, enemies, rng=random.Random(seed))
+        assert list(ecs.boss_id) == list(range(len(party), len(party) + len(enemies)))
+        got = ecs.run(max_rounds=20)
+        ref = Battle(party, enemies, rng=random.Random(seed), sink=NullSink())
+        assert got == ref.run(max_rounds=20)
+        assert ecs.round_no == ref.round_no
+        assert final_state(ecs.party + ecs.enemies) == final_state(party + enemies)
+        assert [ecs.phases[k] for k in range(len(enemies))] == [e.current_phase for e in enemies]
+        results.add(got["result"])
+    assert len(results) > 1
+
+def test_views_read_and_write_store_rows():
+    party, boss = mk_scenario(effects=True)
+    store = EntityStore(party + [boss])
+    w, b = store.view(0), store.view(3)
+    assert isinstance(w, WarriorView) and isinstance(b, BossView)
+    assert (w.name, w.hp, w.max_hp, w.str_) == ("Warrior", 80, party[0].max_hp, 6)
+    assert w.effects == [("Shield", 3, 30)]
+    w.hp = 10_000
+    assert w.hp == w.max_hp and store.hp[0] == w.max_hp
+    assert store.damage_one(0, 40) == 10 and w.effects == [("Shield", 3, 0)]
+    assert store.view(1).is_silenced()
+
+def test_ecs_does_not_mutate_template_and_rejects_unknown_classes():
+    party, boss = mk_scenario()
+    before = [dict(iter(e)) for e in party + [boss]]
+    EcsBattle(party, boss, seed=1).run(max_rounds=6)
+    assert [dict(iter(e)) for e in party + [boss]] == before
+
+    class Bard(Warrior):
+        pass
+    party.append(Bard("Bard", level=1, hp=50, mp=0, str_=2, agi=1, int_=1))
+    with pytest.raises(TypeError):
+        EcsBattle(party, boss)
@@ -50,3 +50,31 @@ def test_regen_heals_each_end_turn():
     w.tick_effects("end")
     w.tick_effects("end")
     assert w.hp == min(w.max_hp, 50 + 16)
+
+class Armor(Shield):
+    """Тестовая броня: режет урон вдвое и срабатывает раньше щитов."""
+    damage_priority = -1
+
+    def on_damage(self, target, incoming):
+        return incoming // 2
+
+def test_damage_chain_rebuilt_on_effect_changes_and_priority():
+    import copy, pickle
+    from app.items import Antidote
+
+    w = Warrior("W", level=1, hp=100, mp=0, str_=5, agi=3, int_=1)
+    assert w._damage_chain == ()
+    shield = Shield(amount=5, duration=1)
+    w.add_effect(shield)
+    w.add_effect(Armor(amount=1, duration=5))
+    assert len(w._damage_chain) == 2
+    # броня режет 20 -> 10, затем щит поглощает 5
+    assert w.receive_damage(20) == 5
+    for clone in (copy.deepcopy(w), pickle.loads(pickle.dumps(w))):
+        assert len(clone._damage_chain) == 2
+        assert all(fn.__self__ in clone._effects for fn in clone._damage_chain)
+    w.tick_effects("end")   # щит истёк
+    assert len(w._damage_chain) == 1
+    w.add_effect(Poison(dps=1, duration=2))
+    Antidote().use(w, w)
+    assert len(w._damage_chain) == 1
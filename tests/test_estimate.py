@@ -0,0 +1,33 @@
+import pytest
+from app.battle import run_many
+from app.estimate import wilson_interval, estimate_win_rate, sprt_win_rate
+from tests.test_battle import mk_scenario
+
+def test_wilson_interval_known_values():
+    low, high = wilson_interval(50, 100)
+    assert low == pytest.approx(0.4038, abs=1e-4) and high == pytest.approx(0.5962, abs=1e-4)
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(0, 10)
+    assert low == pytest.approx(0.0, abs=1e-12) and 0 < high < 0.35
+
+def test_run_many_start_index_continues_the_series():
+    party, boss = mk_scenario()
+    whole = run_many([(party, boss)] * 6, workers=1, master_seed=3)
+    parts = run_many([(party, boss)] * 3, workers=1, master_seed=3) + \
+        run_many([(party, boss)] * 3, workers=1, master_seed=3, start_index=3)
+    assert parts == whole
+
+def test_estimator_stops_at_requested_precision():
+    party, boss = mk_scenario()
+    res = estimate_win_rate(party, boss, precision=0.05, batch_size=64, master_seed=1)
+    assert res["stopped"] == "precision"
+    assert (res["high"] - res["low"]) / 2 <= 0.05
+    assert res["battles"] % 64 == 0 and res["battles"] < 1000
+    assert res["low"] <= res["win_rate"] <= res["high"]
+    assert estimate_win_rate(party, boss, precision=0.05, batch_size=64, master_seed=1) == res
+
+def test_sprt_decides_with_few_battles():
+    party, boss = mk_scenario()
+    res = sprt_win_rate(party, boss, threshold=0.5, delta=0.05, batch_size=32)
+    assert res["decision"] == "below"
+    assert res["battles"] <= res["simulated"] <= 64
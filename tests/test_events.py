@@ -0,0 +1,78 @@
+import random
+from app.battle import Battle
+from app.events import BattleEvent, NullSink, RingBufferSink, BatchedFileSink, StdoutSink
+from app.heroes import Warrior, Mage, Healer
+from app.boss import Boss
+
+def mk_battle(sink):
+    party = [
+        Warrior("Warrior", level=1, hp=80, mp=20, str_=6, agi=3, int_=1),
+        Mage("Mage", level=1, hp=60, mp=30, str_=1, agi=5, int_=7),
+        Healer("Healer", level=1, hp=70, mp=30, str_=1, agi=2, int_=6),
+    ]
+    boss = Boss("Dragon", level=3, hp=120, mp=0, str_=8, agi=4, int_=5)
+    return Battle(party, boss, rng=random.Random(1), sink=sink)
+
+def test_ring_buffer_collects_typed_events():
+    sink = RingBufferSink(capacity=1000)
+    res = mk_battle(sink).run(max_rounds=6)
+    events = sink.events()
+    assert events[0].kind == "round_start" and events[0].round == 1
+    assert any(e.kind == "skill" and e.skill == "fireball" for e in events)
+    end = [e for e in events if e.kind == "end"]
+    assert end[0].actor == res["result"]
+    assert str(BattleEvent(2, "Mage", "Dragon", "hit", 6)) == "Mage hits Dragon for 6"
+
+def test_ring_buffer_keeps_only_last_events():
+    sink = RingBufferSink(capacity=3)
+    mk_battle(sink).run(max_rounds=6)
+    assert len(sink.events()) == 3
+    assert sink.events()[-1].kind == "round_end"
+
+def test_null_sink_creates_no_events(monkeypatch):
+    created = []
+    monkeypatch.setattr("app.battle.BattleEvent", lambda *a: created.append(a))
+    mk_battle(NullSink()).run(max_rounds=6)
+    assert created == []
+
+def test_forks_of_a_quiet_battle_still_yield_events():
+    seen = []
+
+    class Probe:
+        def choose(self, battle, hero):
+            seen.extend(battle.fork().step({"type": "wait"}))
+            return {"type": "wait"}
+
+    battle = mk_battle(NullSink())
+    battle.set_planner(battle.party[0], Probe())
+    battle.run(max_rounds=2)
+    assert seen and all(isinstance(e, BattleEvent) for e in seen)
+    assert battle._quiet is False
+
+def test_null_sink_never_formats_events(monkeypatch):
+    def boom(self):
+        raise AssertionError("event formatted with logging off")
+    monkeypatch.setattr(BattleEvent, "__str__", boom)
+    assert mk_battle(NullSink()).run(max_rounds=6)["result"] in ("party", "boss", "draw")
+
+def test_stdout_sink_prints_like_before(capsys):
+    ring = RingBufferSink(capacity=1000)
+    mk_battle(ring).run(max_rounds=6)
+    assert {"phase", "tick"} <= {e.kind for e in ring.events()}
+    res = mk_battle(StdoutSink()).run(max_rounds=6)
+    out = capsys.readouterr().out
+    assert out.splitlines()[0] == "[ROUND 1] ---- start" and str(BattleEvent(0, res["result"], None, "end")) in out
+    # смена фазы и тики эффектов по умолчанию не печатаются, как до появления приёмников
+    assert "enters phase" not in out and "effects (" not in out
+    StdoutSink(verbose=True).emit(BattleEvent(2, "Dragon", None, "phase", 1))
+    assert capsys.readouterr().out == "Dragon enters phase 1\n"
+
+def test_batched_file_sink_flushes_by_size_and_on_close(tmp_path):
+    sink = BatchedFileSink("b.txt", log_dir=str(tmp_path), max_events=4, max_delay=3600)
+    for i in range(5):
+        sink.emit(BattleEvent(1, "A", "B", "hit", i))
+    # 4 события ушли на диск, пятое ещё в буфере
+    assert (tmp_path / "b.txt").read_text().count("\n") == 4
+    sink.close()
+    lines = (tmp_path / "b.txt").read_text().splitlines()
+    assert lines[-1] == "A hits B for 4"
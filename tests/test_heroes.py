@@ -45,3 +45,20 @@ def test_healer_heals_and_clamped_by_max_hp():
     assert val < 0  # отрицательное = лечение
     assert ally.hp <= before_max
     assert h._cooldowns.get("heal") == 2
+
+def test_cooldowns_are_ready_at_stamps():
+    import pickle
+    w = Warrior("W", level=1, hp=100, mp=50, str_=5, agi=3, int_=1)
+    dummy = Warrior("D", level=1, hp=200, mp=0, str_=1, agi=1, int_=1)
+
+    w.reduce_cooldowns()
+    w.use_skill(dummy, "power_strike")
+    stamps = dict(w._ready_at)
+    w.reduce_cooldowns()
+    assert w._ready_at == stamps          # конец хода не переписывает записи
+    assert not w.can_use("power_strike")
+    clone = pickle.loads(pickle.dumps(w))
+    assert clone._cooldowns == {"power_strike": 1}
+    # совместимый сеттер: задать остаток напрямую
+    w._cooldowns = {"power_strike": 0}
+    assert w.can_use("power_strike")
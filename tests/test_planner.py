@@ -0,0 +1,69 @@
+import pytest
+from app.battle import Battle, battle_rng
+from app.events import NullSink
+from app.items import Inventory, Potion
+from app.planner import MCTSPlanner, legal_actions, action_from_key
+from tests.test_battle import mk_scenario
+
+def mk_battle(inventory=None):
+    party, boss = mk_scenario()
+    return Battle(party, boss, rng=battle_rng(0, 0), sink=NullSink(), inventory=inventory)
+
+def advance_to(battle, hero):
+    while battle.next_actor() is not hero:
+        battle.step()
+
+def test_legal_actions_cover_skills_and_items():
+    inv = Inventory()
+    inv.add(Potion(heal_amount=30))
+    inv.add(Potion(heal_amount=30))
+    battle = mk_battle(inv)
+    war, mage, healer = battle.party
+    war.hp = 10
+    keys = legal_actions(battle, war)
+    assert ("basic",) in keys and ("skill", "power_strike", 3) in keys
+    # два одинаковых зелья — одно действие на цель, цели — только раненые (Healer цел)
+    items = [k for k in keys if k[0] == "item"]
+    assert ("item", 0, 0) in items and all(k[1] == 0 and k[2] != 2 for k in items)
+    advance_to(battle, war)
+    events = battle.step(action_from_key(battle, ("item", 0, 0)))
+    assert events[0].kind == "item" and war.hp == 40 and len(battle.inventory) == 1
+
+def test_state_key_tells_items_apart_by_params():
+    keys = []
+    for heal in (10, 40):
+        inv = Inventory()
+        inv.add(Potion(heal_amount=heal))
+        keys.append(mk_battle(inv).state_key())
+    assert keys[0] != keys[1]
+
+def test_step_action_requires_a_turn():
+    battle = mk_battle()
+    with pytest.raises(ValueError):
+        battle.step({"type": "basic", "target": battle.boss})
+
+def test_mcts_planner_beats_default_policy_and_reuses_table():
+    default = mk_battle().run(max_rounds=20)
+    assert default["result"] == "boss"
+
+    battle = mk_battle()
+    planner = MCTSPlanner(iterations=40, seed=1)
+    war = battle.party[0]
+    battle.set_planner(war, planner)
+    advance_to(battle, war)
+    battle.step()
+    size = len(planner.table)
+    assert size > 0
+    advance_to(battle, war)
+    # корень следующего хода уже был в таблице (поддерево переиспользуется)
+    assert battle.fork().state_key() in planner.table
+
+    for hero in battle.party[1:]:
+        battle.set_planner(hero, MCTSPlanner(iterations=40, seed=1))
+    assert battle.resume()["result"] == "party"
+
+def test_removing_planner_restores_default_behaviour():
+    battle = mk_battle()
+    battle.set_planner(battle.party[0], MCTSPlanner(iterations=5, seed=0))
+    battle.set_planner(battle.party[0], None)
+    assert list(battle.iter_events(20)) == list(mk_battle().iter_events(20))
@@ -0,0 +1,34 @@
+from app.battle import Battle, battle_rng
+from app.profiling import BattleProfiler, active_profiler, profiling
+from app.events import NullSink
+from tests.test_battle import mk_scenario
+
+def test_profiler_is_off_by_default_and_does_not_change_events():
+    party, boss = mk_scenario()
+    plain = Battle(party, boss, rng=battle_rng(1, 0), sink=NullSink())
+    assert plain.profiler is None
+    expected = list(plain.iter_events(20))
+    party, boss = mk_scenario()
+    prof = BattleProfiler()
+    assert list(Battle(party, boss, rng=battle_rng(1, 0), profiler=prof, sink=NullSink()).iter_events(20)) == expected
+    rounds = sum(1 for e in expected if e.kind == "round_start")
+    stages = prof.as_dict()["stages"]
+    assert stages["round;start_ticks"]["calls"] == rounds
+    assert stages["round;phase"]["calls"] == rounds
+    assert {"choose", "execute", "cooldowns", "check_end"} <= set(prof.as_dict()["by_class"]["Boss"])
+
+def test_profiling_context_wraps_many_battles_and_exports_collapsed():
+    with profiling() as prof:
+        assert active_profiler() is prof
+        for i in range(3):
+            party, boss = mk_scenario()
+            battle = Battle(party, boss, rng=battle_rng(2, i), sink=NullSink())
+            battle.run(max_rounds=5)
+            assert battle.fork().profiler is None
+    assert active_profiler() is None
+    data = prof.as_dict()
+    assert set(data["by_class"]) == {"Warrior", "Mage", "Healer", "Boss"}
+    assert data["by_class"]["Warrior"]["execute"]["calls"] >= 3
+    lines = prof.collapsed().splitlines()
+    assert "battle;turn;Mage;execute" in [line.rsplit(" ", 1)[0] for line in lines]
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
@@ -0,0 +1,65 @@
+import pytest
+from app.battle import Battle, battle_rng
+from app.boss import Boss
+from app.events import NullSink, RingBufferSink
+from app.items import Inventory, Potion
+from app.replay import Journal, Recorder, Replayer
+from tests.test_battle import mk_scenario
+
+class PotionFirst:
+    """Тестовый планировщик: сначала пьёт зелье, потом бьёт босса."""
+    def choose(self, battle, hero):
+        if len(battle.inventory):
+            return {"type": "item", "index": 0, "target": hero}
+        return {"type": "basic", "target": battle.boss}
+
+def record(sink=None):
+    party, boss = mk_scenario()
+    inv = Inventory()
+    inv.add(Potion(heal_amount=25))
+    battle = Battle(party, boss, rng=battle_rng(6, 0), sink=sink or NullSink(), inventory=inv)
+    battle.set_planner(party[2], PotionFirst())
+    rec = Recorder(battle, checkpoint_every=2)
+    return battle, rec.run(max_rounds=20), rec.journal
+
+def test_replay_reproduces_events_without_deciding(monkeypatch):
+    live = RingBufferSink(capacity=10_000)
+    battle, res, journal = record(live)
+    monkeypatch.setattr(Boss, "decide", lambda *a: pytest.fail("decide called"))
+    monkeypatch.setattr(Battle, "_choose_hero_action", lambda *a: pytest.fail("auto-logic called"))
+    replayed = RingBufferSink(capacity=10_000)
+    assert Replayer(Journal(journal.to_bytes())).replay(sink=replayed) == res
+    assert replayed.events() == live.events()
+    assert any(e.kind == "item" for e in replayed.events())
+
+def test_playback_jumps_to_round(tmp_path):
+    battle, res, journal = record()
+    journal.save(str(tmp_path / "j.bin"))
+    replayer = Replayer(Journal.load(str(tmp_path / "j.bin")))
+    assert replayer.result == res["result"]
+    playback = replayer.playback(5, sink=RingBufferSink())
+    assert playback.battle.round_no == 4 and not playback.battle._in_round
+    assert playback.step()[0].kind == "round_start" and playback.battle.round_no == 5
+    assert playback.run() == res
+    assert [dict(iter(e)) for e in playback.battle._entities] == [dict(iter(e)) for e in battle._entities]
+
+def test_journal_rejects_foreign_data():
+    with pytest.raises(ValueError):
+        Journal(b"XXXX\x00\x01")
+
+def test_journal_records_are_compact_and_not_pickled():
+    battle, res, journal = record()
+    records = list(journal.records())
+    # снимки — save_load.snapshot (данные, не pickle); на бросок — 9 байт
+    assert records[0][0] == "start" and records[0][1][:4] == b"PVBS"
+    assert any(r[0] == "draw" for r in records)
+    j = Journal()
+    j.append(("draw", 0.25))
+    j.append(("act", 3, ("skill", "heal", None, 2)))
+    j.append(("bits", 70, 2 ** 69 + 5))
+    j.append(("end", "party", 40))
+    assert len(j) - len(Journal()) == 9 + 20 + 12 + 11
+    assert list(j.records()) == [("draw", 0.25), ("act", 3, ("skill", "heal", None, 2)),
+                                 ("bits", 70, 2 ** 69 + 5), ("end", "party", 40)]
+    with pytest.raises(ValueError):
+        list(Journal(j.to_bytes()[:-3]).records())
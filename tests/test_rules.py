@@ -0,0 +1,84 @@
+import pytest
+from app.battle import Battle, battle_rng
+from app.boss import Boss
+from app.heroes import Warrior, Mage, Healer
+from app.rules import RuleEngine, default_rules
+from app.save_load import snapshot, restore
+from app.events import NullSink
+
+BOSS_RULES = {
+    "boss": {
+        "Boss": [
+            {"if": ["phase == 0"], "then": "basic", "target": "opponent max_agi"},
+            {"if": ["phase == 1"], "then": "skill toxic_spit", "target": "opponent min_hp"},
+            {"then": "skill enraged_blow", "target": "opponent max_str"},
+        ]
+    }
+}
+
+def mk_scenario():
+    party = [
+        Warrior("Warrior", level=1, hp=80, mp=20, str_=6, agi=3, int_=1),
+        Mage("Mage", level=1, hp=60, mp=30, str_=1, agi=5, int_=7),
+        Healer("Healer", level=1, hp=70, mp=30, str_=1, agi=2, int_=6),
+    ]
+    boss = Boss("Dragon", level=9, hp=0, mp=0, str_=12, agi=6, int_=8, thresholds=(0.9, 0.5))
+    return party, boss
+
+class Rogue(Warrior):
+    __slots__ = ()
+
+def test_boss_rules_match_default_strategies():
+    engine = RuleEngine({**default_rules().spec, **BOSS_RULES})
+    results = set()
+    for seed in range(30):
+        expected = Battle(*mk_scenario(), rng=battle_rng(seed, 0), sink=NullSink()).run(max_rounds=20)
+        party, boss = mk_scenario()
+        battle = Battle(party, boss, rng=battle_rng(seed, 0), rules=engine, sink=NullSink())
+        assert battle.run(max_rounds=20) == expected
+        results.add(expected["result"])
+    assert len(results) > 1
+
+def test_new_class_is_added_by_rules_only():
+    engine = RuleEngine({"party": {
+        "Rogue": [{"if": ["can_use power_strike", "mp >= 10", "not silenced"],
+                   "then": "skill power_strike", "target": "enemy"}],
+        "Warrior": [{"then": "basic"}],
+    }})
+    party, boss = mk_scenario()
+    rogue = Rogue("Rogue", level=1, hp=50, mp=10, str_=4, agi=9, int_=1)
+    battle = Battle(party + [rogue], boss, seed=1, rules=engine, sink=NullSink())
+    assert battle._choose_hero_action(rogue, [boss]) == {"type": "skill", "skill_id": "power_strike", "target": boss}
+    rogue.mp = 0
+    # ни одно правило Rogue не сработало — ожидание; таблица Warrior к Rogue не применяется
+    assert battle._choose_hero_action(rogue, [boss])["type"] == "wait"
+    # для класса без правил — прежний дефолт
+    assert battle._choose_hero_action(party[1], [boss]) == {"type": "basic", "target": boss}
+
+def test_bad_rules_are_rejected_at_compile_time():
+    with pytest.raises(ValueError, match="Bad rule #0 for Mage"):
+        RuleEngine({"party": {"Mage": [{"if": ["mana is full"], "then": "basic"}]}})
+    with pytest.raises(ValueError, match="Unknown rule target"):
+        RuleEngine({"party": {"Mage": [{"then": "basic", "target": "weakest"}]}})
+    with pytest.raises(ValueError, match="Unknown rule sections"):
+        RuleEngine({"heroes": {}})
+
+def test_rules_survive_snapshot_and_default_rules_are_shared():
+    engine = RuleEngine({**default_rules().spec, **BOSS_RULES})
+    battle = Battle(*mk_scenario(), seed=3, rules=engine, sink=NullSink())
+    battle.step()
+    copy = restore(snapshot(battle))
+    assert copy.rules.spec == engine.spec
+    assert restore(snapshot(Battle(*mk_scenario(), seed=3, sink=NullSink()))).rules is default_rules()
+
+def test_injured_threshold_comes_from_rules():
+    party, boss = mk_scenario()
+    war, mage, healer = party
+    mage.hp = 40    # 2/3 max_hp: не ранен по правилам по умолчанию
+    battle = Battle(party, boss, seed=1, sink=NullSink())
+    assert battle._choose_hero_action(healer, [boss])["type"] == "basic"
+    spec = {"party": {"Healer": [{"if": ["injured_ally 0.75"], "then": "skill heal", "target": "most_injured_ally 0.75"}]}}
+    battle = Battle(party, boss, seed=1, rules=RuleEngine(spec), sink=NullSink())
+    assert battle._choose_hero_action(healer, [boss]) == {"type": "skill", "skill_id": "heal", "target": mage}
+    with pytest.raises(ValueError, match="Unknown rule condition"):
+        RuleEngine({"party": {"Healer": [{"if": ["injured_ally"], "then": "basic"}]}})
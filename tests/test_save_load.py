@@ -0,0 +1,100 @@
+import json
+import pytest
+from app.battle import Battle, battle_rng
+from app.effects import Shield, Silence
+from app.events import NullSink, RingBufferSink
+from app.save_load import snapshot, restore, save, load, to_dict, export_json
+from tests.test_battle import mk_scenario
+
+def mk_midbattle(steps=9):
+    party, boss = mk_scenario()
+    party[0].add_effect(Shield(amount=15, duration=4))
+    party[1].add_effect(Silence(duration=3))
+    battle = Battle(party, boss, rng=battle_rng(2, 0), sink=NullSink())
+    for _ in range(steps):
+        battle.step()
+    return battle
+
+def test_restored_battle_continues_identically():
+    battle = mk_midbattle()
+    data = snapshot(battle)
+    branch = restore(data, sink=RingBufferSink())
+    assert branch.round_no == battle.round_no and branch.boss.current_phase == battle.boss.current_phase
+    assert branch.party[0] is not battle.party[0]
+    # снимок восстанавливает все поля боя, как pickle (Battle.__getstate__/__setstate__)
+    assert set(vars(branch)) == set(vars(battle))
+    expected = list(battle.resume_events())
+    assert list(branch.resume_events()) == expected
+    assert [dict(iter(e)) for e in branch._entities] == [dict(iter(e)) for e in battle._entities]
+    # из одного снимка — независимые ветки
+    assert restore(data).resume() == {"result": battle.result}
+
+def test_snapshot_is_versioned():
+    data = snapshot(mk_midbattle(2))
+    assert data[:4] == b"PVBS"
+    with pytest.raises(ValueError):
+        restore(b"JUNK" + data[4:])
+    with pytest.raises(ValueError):
+        restore(data[:4] + b"\xff\xff" + data[6:])
+
+def test_snapshot_refuses_half_read_step():
+    battle = mk_midbattle(0)
+    events = battle.resume_events()
+    next(events)
+    with pytest.raises(RuntimeError):
+        snapshot(battle)
+
+def test_save_load_and_json_export(tmp_path):
+    battle = mk_midbattle()
+    save(battle, str(tmp_path / "b.bin"))
+    loaded = load(str(tmp_path / "b.bin"))
+    assert to_dict(loaded) == to_dict(battle)
+    export_json(battle, str(tmp_path / "b.json"))
+    data = json.loads((tmp_path / "b.json").read_text(encoding="utf-8"))
+    assert data["boss"]["thresholds"] == [0.9, 0.5]
+    assert data["party"][0]["effects"][0]["type"] == "Shield"
+
+def test_json_export_keeps_party_inventory(tmp_path):
+    from app.items import Inventory, Potion, Antidote
+    party, boss = mk_scenario()
+    inventory = Inventory()
+    inventory.add(Potion(heal_amount=25))
+    inventory.add(Antidote())
+    battle = Battle(party, boss, rng=battle_rng(2, 0), sink=NullSink(), inventory=inventory)
+    battle.step()
+    copy = restore(snapshot(battle))
+    assert to_dict(copy) == to_dict(battle)
+    export_json(copy, str(tmp_path / "b.json"))
+    data = json.loads((tmp_path / "b.json").read_text(encoding="utf-8"))
+    assert data["inventory"] == [{"type": "Potion", "heal_amount": 25}, {"type": "Antidote", "removes": ["Poison"]}]
+    assert all("inventory" not in h for h in data["party"])
+
+def test_snapshot_is_data_not_pickle():
+    from app.effects import Effect
+    from app.save_load import MAGIC, VERSION, register_type
+    battle = mk_midbattle()
+    data = snapshot(battle)
+    # упакованные поля, а не pickle и не JSON; основная часть — состояние Mersenne Twister (624 uint32)
+    assert data[6:7] not in (b"\x80", b"{") and b"Dragon" in data and len(data) < 3200
+    # старые снимки (pickle — версия 1, JSON — версия 2) не читаются
+    for old in (1, 2):
+        with pytest.raises(ValueError, match=f"version: {old}"):
+            restore(MAGIC + old.to_bytes(2, "big") + data[6:])
+    # в снимке только классы из реестра; обрезанный или с хвостом — ValueError
+    with pytest.raises(ValueError, match="Unknown Character"):
+        restore(data.replace(b"Warrior", b"os.syst"))
+    for bad in (data[:-10], data + b"\x00"):
+        with pytest.raises(ValueError, match="Corrupt"):
+            restore(bad)
+
+    class Burn(Effect):
+        def __init__(self, duration):
+            super().__init__("Burn", duration)
+
+    battle.party[0].add_effect(Burn(2))
+    with pytest.raises(ValueError, match="not registered"):
+        snapshot(battle)
+    register_type(Burn)
+    copy = restore(snapshot(battle))
+    assert [type(e).__name__ for e in copy.party[0]._effects][-1] == "Burn"
+    assert VERSION == 3
@@ -0,0 +1,33 @@
+from app.sweep import expand_grid, sweep
+
+def spec():
+    return {
+        "party": [
+            # max_hp у этого Warrior = 50 + 10 + 30 = 90: hp 0 / 90 / 500 — одно и то же
+            {"class": "Warrior", "name": "Warrior", "level": 1, "hp": [0, 90, 500], "mp": 20, "str_": 6, "agi": 3, "int_": 1},
+            {"class": "Mage", "name": "Mage", "level": 1, "hp": 60, "mp": 30, "str_": 1, "agi": 5, "int_": [7, 8]},
+            {"class": "Healer", "name": "Healer", "level": 1, "hp": 70, "mp": 30, "str_": 1, "agi": 2, "int_": 6},
+        ],
+        "boss": {"name": "Dragon", "level": 9, "hp": 0, "str_": 12, "agi": 6, "int_": 8,
+                 "thresholds": [(0.9, 0.5), (0.5, 0.9), (0.8999, 0.5)]},
+    }
+
+def test_expand_grid_is_a_cartesian_product():
+    points = list(expand_grid(spec()))
+    assert len(points) == 3 * 2 * 3
+    assert points[0]["point"] == {"party.0.hp": 0, "party.1.int_": 7, "boss.thresholds": (0.9, 0.5)}
+    assert points[0]["boss"]["str_"] == 12
+
+def test_sweep_runs_each_unique_configuration_once():
+    res = sweep(spec(), battles=8, workers=1)
+    assert res["points"] == 18
+    # hp схлопывается в 1 вариант, пороги — в 1 (порядок и доли, дающие те же границы hp)
+    assert res["unique"] == 2
+    by_int = {}
+    for row in res["rows"]:
+        by_int.setdefault(row["point"]["party.1.int_"], set()).add((row["config"], row["party"], row["boss"]))
+    assert all(len(v) == 1 for v in by_int.values())
+    assert sum(r["party"] + r["boss"] + r["draw"] for r in res["rows"][:1]) == 8
+
+def test_sweep_is_identical_for_any_worker_count():
+    assert sweep(spec(), battles=4, workers=2, shard_size=1) == sweep(spec(), battles=4, workers=1)
@@ -0,0 +1,76 @@
+import random
+from app.battle import Battle
+from app.boss import Boss, Strategy
+from app.heroes import Warrior, Mage, Healer
+from app import targeting
+from app.targeting import Opponents, Selector, TargetIndex, select
+from app.events import NullSink
+
+def mk_party(n=12, seed=0):
+    r = random.Random(seed)
+    return [(Warrior, Mage, Healer)[i % 3](f"H{i}", level=1, hp=r.randint(1, 60), mp=r.randint(0, 30),
+                                           str_=r.randint(1, 5), agi=r.randint(1, 5), int_=1)
+            for i in range(n)]
+
+def test_index_matches_linear_selection_under_changes():
+    r = random.Random(1)
+    party = mk_party()
+    battle = Battle(party, Boss("Boss", level=1, hp=0, str_=1, agi=1, int_=1), seed=1, sink=NullSink())
+    index = battle._targets
+    for _ in range(300):
+        hero = r.choice(party)
+        stat = r.choice(["hp", "hp", "agi", "str_"])
+        # hp=0 — смерть, следующее hp>0 — воскрешение
+        setattr(hero, stat, r.choice([0, r.randint(0, 60)]) if stat == "hp" else r.randint(1, 5))
+        for name in ("max_agi", "min_hp", "max_str"):
+            assert index.best(name) is select(list(party), name)
+
+def test_ties_pick_first_in_party_order_and_empty_side_gives_none():
+    party = mk_party(4)
+    for h in party:
+        h.agi = 3
+    index = TargetIndex(party)
+    assert index.best("max_agi") is party[0]
+    party[0].hp = 0
+    assert index.best("max_agi") is party[1]
+    for h in party:
+        h.hp = 0
+    assert index.best("max_agi") is None and select(party, "max_agi") is None
+
+class DrainMana(Strategy):
+    def choose_action(self, boss, opponents):
+        return {"type": "basic", "skill_id": None, "target": select(opponents, "max_mp")}
+
+def test_custom_strategy_uses_registered_selector(monkeypatch):
+    # селектор регистрируется только на время теста — глобальный SELECTORS не засоряется
+    monkeypatch.setitem(targeting.SELECTORS, "max_mp", Selector("max_mp", lambda e: e.mp, largest=True, stats=("mp",)))
+    party = mk_party(6)
+    boss = Boss("Lich", level=1, hp=0, str_=1, agi=1, int_=1, strategies=[DrainMana()] * 3)
+    battle = Battle(party, boss, seed=2, sink=NullSink())
+    richest = max(party, key=lambda h: h.mp)
+    opponents = Opponents(battle._living_cached("party"), battle._targets)
+    assert boss.decide(opponents)["target"] is richest
+    richest.mp = 0
+    assert boss.decide(opponents)["target"] is max(party, key=lambda h: h.mp)
+
+class FinishWeakest(Strategy):
+    # стратегия в старом стиле: сортирует и правит список противников
+    def choose_action(self, boss, opponents):
+        opponents.sort(key=lambda h: h.hp)
+        weakest = opponents.pop(0)
+        return {"type": "basic", "skill_id": None, "target": weakest, "next": select(opponents, "min_hp")}
+
+def test_opponents_is_a_mutable_copy_for_strategies():
+    party = mk_party(6)
+    boss = Boss("Lich", level=1, hp=0, str_=1, agi=1, int_=1, strategies=[FinishWeakest()] * 3)
+    battle = Battle(party, boss, seed=3, sink=NullSink())
+    living = battle._living_cached("party")
+    opponents = Opponents(living, battle._targets)
+    action = boss.decide(opponents)
+    by_hp = sorted(party, key=lambda h: h.hp)
+    assert action["target"] is by_hp[0]
+    # после pop индекс отключён: select() ищет среди оставшихся, а не по всей стороне
+    assert action["next"] is by_hp[1]
+    assert opponents.targets is None and len(opponents) == 5
+    # кэш живых у боя не тронут
+    assert battle._living_cached("party") is living and len(living) == 6
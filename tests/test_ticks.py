@@ -89,3 +89,49 @@ def test_cooldowns_reduce_each_round_in_battle():
     assert w._cooldowns.get("power_strike") == 1
     battle.run(max_rounds=1)
     assert w._cooldowns.get("power_strike") == 0
+
+def test_scheduler_fires_only_effects_with_work():
+    from app.boss import Boss
+    heroes = [Warrior(f"W{i}", level=1, hp=100, mp=0, str_=5, agi=3, int_=1) for i in range(50)]
+    b = Warrior("BOSS", level=1, hp=100, mp=0, str_=5, agi=1, int_=1)
+    heroes[7].add_effect(Silence(duration=3))
+    heroes[9].add_effect(Poison(dps=5, duration=2))
+    battle = Battle(heroes, b)
+
+    battle.clock += 1
+    assert battle.effects.fire("start", battle.clock) == []      # стартовых хуков нет ни у кого
+    touched = battle.effects.fire("end", battle.clock)
+    assert [e.name for e, _ in touched] == ["W9"]                # таймер Silence не трогается каждый раунд
+    assert heroes[7].is_silenced()
+
+def test_silence_timer_expires_on_schedule_and_sync_reports_remaining():
+    h = Healer("H", level=1, hp=80, mp=50, str_=1, agi=2, int_=6)
+    b = Warrior("BOSS", level=1, hp=100, mp=0, str_=5, agi=1, int_=1)
+    sil = Silence(duration=3)
+    h.add_effect(sil)
+    battle = Battle([h], b)
+    battle.run(max_rounds=1)
+    battle.effects.sync()
+    assert sil.duration == 2 and h.is_silenced()
+    battle.run(max_rounds=2)
+    assert not h.is_silenced()
+    assert sil not in h._effects
+
+def test_effect_removed_mid_battle_does_not_tick():
+    from app.items import Antidote
+    w = Warrior("W", level=1, hp=100, mp=0, str_=5, agi=3, int_=1)
+    b = Warrior("BOSS", level=1, hp=100, mp=0, str_=5, agi=1, int_=1)
+    w.add_effect(Poison(dps=7, duration=3))
+    battle = Battle([w], b)
+    battle.run(max_rounds=1)
+    Antidote().use(w, w)
+    battle.run(max_rounds=2)
+    assert w.hp == w.max_hp - 7
+
+def test_silence_duration_is_current_after_run_without_sync():
+    h = Healer("H", level=1, hp=80, mp=50, str_=1, agi=2, int_=6)
+    b = Warrior("BOSS", level=1, hp=100, mp=0, str_=5, agi=1, int_=1)
+    sil = Silence(duration=3)
+    h.add_effect(sil)
+    Battle([h], b).run(max_rounds=1)
+    assert sil.duration == 2
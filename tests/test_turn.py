@@ -9,3 +9,32 @@ def test_turn_order_by_agi_desc_then_name():
     order = [e.name for e in TurnOrder([a, b, c])]
     # b имеет agi=7, дальше a и c оба с 5 — сортируем по имени A, C
     assert order == ["B", "A", "C"]
+
+def test_turn_order_matches_sort_after_removals_and_rekeys():
+    import random
+    rnd = random.Random(0)
+    heroes = [Warrior(f"H{rnd.randint(0, 30)}", level=1, hp=50, mp=0, str_=1, agi=rnd.randint(1, 8), int_=1)
+              for _ in range(200)]
+    order = TurnOrder(heroes)
+
+    for h in rnd.sample(heroes, 40):
+        h.hp = 0
+        order.discard(h)
+    for h in rnd.sample(heroes, 40):
+        h.agi = rnd.randint(1, 8)
+        order.rekey(h)
+
+    expected = sorted((h for h in heroes if h.is_alive), key=lambda x: (-x.agi, x.name))
+    assert list(order) == expected
+    assert len(order) == 160
+
+def test_turn_order_iteration_is_snapshot_of_living():
+    a = Warrior("A", level=1, hp=50, mp=0, str_=3, agi=5, int_=1)
+    b = Mage("B", level=1, hp=40, mp=0, str_=1, agi=7, int_=5)
+    order = TurnOrder([a, b])
+    seen = []
+    for e in order:
+        seen.append(e.name)
+        a.hp = 0  # смерть посреди раунда не меняет уже начатый обход
+    assert seen == ["B", "A"]
+    assert [e.name for e in order] == ["B"]